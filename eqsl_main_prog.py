@@ -5,17 +5,36 @@
 import sys
 import os
 import re 
-from PySide6.QtWidgets import (QApplication, QMainWindow, QMessageBox, QFileDialog)
-from PySide6.QtCore import (Slot, QSortFilterProxyModel, QItemSelection, QItemSelectionModel, 
-                            QModelIndex, Qt, QByteArray, QDir)
-from PySide6.QtSql import QSqlDatabase, QSqlTableModel
-from PySide6.QtGui import QPixmap 
+from datetime import datetime
+from PySide6.QtWidgets import (QApplication, QMainWindow, QMessageBox, QFileDialog, QProgressDialog,
+                               QMenu, QInputDialog)
+from PySide6.QtCore import (Slot, QItemSelection, QItemSelectionModel, 
+                            QModelIndex, Qt, QByteArray, QDir, QThread)
+from PySide6.QtSql import QSqlDatabase, QSqlQuery
+from PySide6.QtGui import QPixmap, QAction, QActionGroup
 
 # Correct imports (based on your structure)
 from gui_data.frm_main_window_ui import Ui_frm_main_window 
 from scripts.gui_manager import GuiManager 
 from scripts.settings_manager import SettingsManager 
 from scripts.image_viewer_dialog import ImageViewerDialog
+from scripts.tiled_image_view import pyramid_cache
+from scripts.image_exporter import ImageExportWorker, ZipExportWorker
+from scripts.mirror_sync import MirrorSyncWorker
+from scripts.search_query import build_terms_filter
+from scripts.fulltext_index import FTS_TABLE, build_fulltext_filter
+from scripts.db_schema import migrate_database, IMAGE_FILTER
+from scripts.connection_manager import configure as configure_connections, pragma_statements, close_manager, close_all
+from scripts.query_language import compile_query, is_structured_query, QuerySyntaxError
+from scripts.live_search import LiveSearchController, PAGE_SIZE
+from scripts.qso_table_model import QsoTableModel
+from scripts.facet_counts import FacetCountsController
+from scripts.facet_panel import FacetPanel
+from scripts.db_maintenance import IdleMaintenance
+from scripts.maintenance_dialog import MaintenanceDialog
+from scripts.db_backup import BackupScheduler
+from scripts.db_federation import Federation, SOURCE_COLUMN, MAIN_SCHEMA
+from scripts.db_merge import MergeWorker, POLICIES, DEFAULT_POLICY
 
 
 # Definition of column indexes (0-based)
@@ -39,54 +58,8 @@ SEARCHABLE_COLUMN_INDICES = [
     COL_SUB_MODE, COL_COUNTRY, COL_FREQ, COL_CQZ, COL_ITUZ, COL_GRID
 ]
 
-
-# ======================================================================
-# Custom proxy model for multi-column OR filtering
-# ======================================================================
-class MultiColumnFilterProxyModel(QSortFilterProxyModel):
-    def __init__(self, parent=None, searchable_indices=None):
-        super().__init__(parent)
-        self.search_terms = []
-        self.searchable_indices = searchable_indices if searchable_indices is not None else []
-
-    def setFilterString(self, text: str):
-        """
-        Sets the filter string. Spaces now act as OR separators.
-        """
-        # Split the text into terms and convert to lowercase
-        self.search_terms = [term.strip().lower() for term in text.split() if term.strip()]
-        # Restart filtering
-        self.invalidateFilter()
-
-    def filterAcceptsRow(self, source_row: int, source_parent: QModelIndex) -> bool:
-        """
-        Implements the OR logic: a row is accepted if ANY of the search terms 
-        in ANY of the defined columns is found.
-        """
-        if not self.search_terms:
-            return True 
-
-        source_model = self.sourceModel()
-        
-        # OR logic
-        for term in self.search_terms:
-            for col_index in self.searchable_indices:
-                index = source_model.index(source_row, col_index, source_parent)
-                data = source_model.data(index, Qt.ItemDataRole.DisplayRole)
-                
-                if data is None:
-                    continue
-                
-                try:
-                    data_str = str(data).lower()
-                    if term in data_str:
-                        # Term found => accept row (OR condition met)
-                        return True 
-                except:
-                    continue
-
-        # None of the search terms were found => reject row
-        return False
+# Static pre-filtering: Only show entries with an image
+BASE_FILTER = IMAGE_FILTER
 
 
 # ======================================================================
@@ -103,6 +76,40 @@ class EqslMainWindow(QMainWindow):
         # NEW: Storage variable for the default pixmap
         self.default_pixmap = QPixmap() 
         
+        # Background export (thread, worker and progress dialog while running)
+        self.export_thread: QThread | None = None
+        self.export_worker: ImageExportWorker | None = None
+        self.export_progress: QProgressDialog | None = None
+        self.export_report = None
+        
+        # Current search: parameterized WHERE clause plus optional FTS5 query for ranking
+        # (kept across refreshes and DB changes)
+        self.search_clause: dict = {'where': "", 'params': [], 'match': None}
+        
+        # True if the database has a usable full-text index (see _prepare_search_indexes)
+        self.fulltext_enabled = False
+        
+        # Rowids found by the live search (None = filter with search_clause directly)
+        self.search_rowids: list | None = None
+        # FTS5 query whose hits were last shown in rank order (a new one clears the column sort)
+        self.ranked_match: str | None = None
+        
+        # Databases attached to the open one and browsed as one view (see _setup_database_sets)
+        self.federation = Federation(self.db.databaseName(),
+                                     table_name=self.settings_manager.settings.get("table_name", "eqsl_data"))
+        
+        # Search-as-you-type on a read-only connection in a background thread
+        self.live_search = LiveSearchController(
+            self.db.databaseName(), BASE_FILTER,
+            self.settings_manager.settings.get("table_name", "eqsl_data"), parent=self
+        )
+        
+        # Facet counts (band, mode, ...) of the current filter, cached and counted in a thread
+        self.facet_counts = FacetCountsController(
+            self.db.databaseName(),
+            self.settings_manager.settings.get("table_name", "eqsl_data"), parent=self
+        )
+        
         self.gui_manager = GuiManager(
             db_conn=self.db, 
             settings_manager=self.settings_manager,
@@ -113,18 +120,21 @@ class EqslMainWindow(QMainWindow):
         self.ui.setupUi(self)
         self.setWindowTitle("eQSL Program (Main Window)")
 
+        self._setup_facet_panel()
+        self._setup_idle_maintenance()
+        self._setup_backup_scheduler()
+        self._check_fulltext_index()
         self._setup_models()
         self._setup_ui_elements()
         
         self._setup_connections()
+        self._setup_database_sets()
 
     def _setup_models(self):
         table_name = self.settings_manager.settings.get("table_name", "eqsl_data")
         
-        # 1. Initialize QSqlTableModel
-        self.source_model = QSqlTableModel(db=self.db)
-        self.source_model.setTable(table_name)
-        self.source_model.setEditStrategy(QSqlTableModel.EditStrategy.OnFieldChange)
+        # 1. Paged model: only the visible columns are selected, images are loaded on demand
+        self.source_model = QsoTableModel(self.db, table_name, SEARCHABLE_COLUMN_INDICES, self)
         
         # Set column headers
         self.source_model.setHeaderData(COL_CALL, Qt.Orientation.Horizontal, "Call")
@@ -137,22 +147,28 @@ class EqslMainWindow(QMainWindow):
         self.source_model.setHeaderData(COL_CQZ, Qt.Orientation.Horizontal, "CQ Zone")
         self.source_model.setHeaderData(COL_GRID, Qt.Orientation.Horizontal, "Grid")
         
-        # Static pre-filtering: Only show entries with an image
-        self.source_model.setFilter(f"EQSL_IMAGE_BLOB IS NOT NULL")
-        self.source_model.select()
+        # Edited rows must be re-checked by the trigram index of the live search
+        self.source_model.dataChanged.connect(self._on_source_data_changed)
 
-        # 2. Initialize MultiColumnFilterProxyModel
-        self.proxy_model = MultiColumnFilterProxyModel(self, searchable_indices=SEARCHABLE_COLUMN_INDICES) 
-        self.proxy_model.setSourceModel(self.source_model)
-        
-        # 3. Set view
-        self.ui.tbl_data_view_main.setModel(self.proxy_model)
+        # Static pre-filtering (only entries with an image) plus the current search
+        self._apply_source_filter()
+
+        # 2. Set view (filtering and sorting both happen in SQLite, no proxy model:
+        # a header click calls QsoTableModel.sort(), which reloads with ORDER BY)
+        self.ui.tbl_data_view_main.setModel(self.source_model)
         self.ui.tbl_data_view_main.setSelectionBehavior(self.ui.tbl_data_view_main.SelectionBehavior.SelectRows)
         self.ui.tbl_data_view_main.setSortingEnabled(True)
 
-        # Hide columns
+        self._hide_columns()
+
+    def _hide_columns(self):
+        """Shows the searchable columns (plus the source of a database set), hides the others."""
         total_columns = self.source_model.columnCount()
         visible_indices = set(SEARCHABLE_COLUMN_INDICES + [COL_IMAGE_BLOB]) 
+        if SOURCE_COLUMN in self.source_model.column_names:
+            source_index = self.source_model.column_names.index(SOURCE_COLUMN)
+            visible_indices.add(source_index)
+            self.source_model.setHeaderData(source_index, Qt.Orientation.Horizontal, "Source")
 
         for col_index in range(total_columns):
             if col_index not in visible_indices or col_index == COL_IMAGE_BLOB:
@@ -160,7 +176,6 @@ class EqslMainWindow(QMainWindow):
             else:
                 self.ui.tbl_data_view_main.setColumnHidden(col_index, False)
 
-
     def _setup_ui_elements(self):
         """Configures UI elements and loads the default image."""
         # Configure preview label for image display
@@ -177,6 +192,62 @@ class EqslMainWindow(QMainWindow):
         else:
              self.ui.lb_preview_image_main.setText("No image selected. (Default image missing.)")
 
+        # Label text is replaced by the error message of an invalid query
+        self.search_label_text = self.ui.lb_searchfield_main.text()
+
+
+    def _setup_facet_panel(self):
+        """Dock with the facet counts; clicking a value adds it to the search."""
+        self.facet_panel = FacetPanel(self)
+        self.addDockWidget(Qt.DockWidgetArea.RightDockWidgetArea, self.facet_panel)
+        # Show/hide entry in the File menu
+        self.ui.menuFile.insertAction(self.ui.actionExit, self.facet_panel.toggleViewAction())
+
+    def _setup_database_sets(self):
+        """
+        'Database Set' submenu: named sets of databases ("database_sets" in the
+        settings) that are attached to the open one and browsed as one view.
+        The active set is restored at the start.
+        """
+        self.database_set_menu = QMenu("Database Set", self)
+        self.database_set_group = QActionGroup(self)
+        self.database_set_group.setExclusive(True)
+        self.ui.menuFile.insertMenu(self.ui.actionExit, self.database_set_menu)
+        self._populate_database_set_menu()
+
+        active_set = self.settings_manager.settings.get("active_database_set", "")
+        if active_set and self.db.isOpen():
+            self.set_database_set(active_set)
+
+    def _populate_database_set_menu(self):
+        self.database_set_menu.clear()
+        for action in self.database_set_group.actions():
+            self.database_set_group.removeAction(action)
+
+        active_set = self.settings_manager.settings.get("active_database_set", "")
+        for name in [""] + sorted(self.settings_manager.settings.get("database_sets", {})):
+            action = QAction(name or "Open Database Only", self.database_set_menu)
+            action.setCheckable(True)
+            action.setChecked(name == active_set)
+            action.triggered.connect(lambda _checked=False, set_name=name: self.set_database_set(set_name))
+            self.database_set_group.addAction(action)
+            self.database_set_menu.addAction(action)
+
+        self.database_set_menu.addSeparator()
+        new_set_action = self.database_set_menu.addAction("New Set from Databases...")
+        new_set_action.triggered.connect(self.create_database_set)
+
+    def _setup_idle_maintenance(self):
+        """Optimize/vacuum/checkpoint in the background after some minutes without user input."""
+        self.idle_maintenance = IdleMaintenance(
+            self.db.databaseName(), self.settings_manager.settings.get("maintenance_idle_minutes", 10), parent=self
+        )
+        QApplication.instance().installEventFilter(self.idle_maintenance)
+
+    def _setup_backup_scheduler(self):
+        """Scheduled online backups ("backup_interval_hours" in the settings, 0 = off)."""
+        self.backup_scheduler = BackupScheduler(self.db.databaseName(), self.settings_manager.settings, parent=self)
+        self.backup_scheduler.finished.connect(self._on_scheduled_backup_finished)
 
     def _set_default_preview(self):
         """Helper function to set the scaled default image."""
@@ -195,8 +266,19 @@ class EqslMainWindow(QMainWindow):
     def _setup_connections(self):
         """Connects UI elements to the GuiManager or local slots."""
         
-        # Filtering
+        # Filtering (live while typing, the button and Enter search without delay)
         self.ui.btn_search_main.clicked.connect(lambda: self.filter_data_flex(self.ui.txt_search_field_main.text()))
+        self.ui.txt_search_field_main.returnPressed.connect(lambda: self.filter_data_flex(self.ui.txt_search_field_main.text()))
+        self.ui.txt_search_field_main.textChanged.connect(self._on_search_text_changed)
+        self.live_search.page_ready.connect(self._on_search_page_ready)
+        self.live_search.results_ready.connect(self._on_search_results_ready)
+        self.live_search.failed.connect(self._on_search_failed)
+        
+        # Facets (counted only while the panel is visible)
+        self.facet_counts.counts_ready.connect(self.facet_panel.show_counts)
+        self.facet_counts.failed.connect(self._on_facets_failed)
+        self.facet_panel.filter_requested.connect(self._add_search_term)
+        self.facet_panel.visibilityChanged.connect(self._on_facet_panel_visibility_changed)
         self.ui.btn_reset_main.clicked.connect(self.reset_filter) # ADJUSTED
         
         # Selection
@@ -206,6 +288,8 @@ class EqslMainWindow(QMainWindow):
         # Actions for images
         self.ui.btn_show_image.clicked.connect(self.show_selected_images)
         self.ui.btn_export_image.clicked.connect(self.download_selected_images)
+        if hasattr(self.ui, 'btn_export_zip'):
+            self.ui.btn_export_zip.clicked.connect(self.export_selected_images_zip)
         
         # Preview on selection change
         self.ui.tbl_data_view_main.selectionModel().currentChanged.connect(self.show_preview)
@@ -222,6 +306,14 @@ class EqslMainWindow(QMainWindow):
             self.ui.actionManual.triggered.connect(self.gui_manager.open_help) 
         if hasattr(self.ui, 'actionVersionInfo'):
             self.ui.actionVersionInfo.triggered.connect(self.gui_manager.open_version_info)
+        if hasattr(self.ui, 'actionSync_Card_Mirror'):
+            self.ui.actionSync_Card_Mirror.triggered.connect(self.sync_card_mirror)
+        if hasattr(self.ui, 'actionBackup_Database'):
+            self.ui.actionBackup_Database.triggered.connect(self.backup_database)
+        if hasattr(self.ui, 'actionDatabase_Maintenance'):
+            self.ui.actionDatabase_Maintenance.triggered.connect(self.open_maintenance)
+        if hasattr(self.ui, 'actionMerge_Database'):
+            self.ui.actionMerge_Database.triggered.connect(self.merge_database)
         if hasattr(self.ui, 'actionExit'):
             self.ui.actionExit.triggered.connect(self.close)
         if hasattr(self.ui, 'btn_edit'):
@@ -237,10 +329,184 @@ class EqslMainWindow(QMainWindow):
     # LOCAL SLOTS
     # ----------------------------------------------------------------------
     
+    def _check_fulltext_index(self):
+        """
+        Checks that the current database has the FTS5 index (created by the schema
+        migrations, see db_schema) and that the Qt SQLite driver can query it.
+        Without it the search uses LIKE.
+        """
+        self.fulltext_enabled = False
+        if not self.db.isOpen():
+            return
+        if self.federation.is_federated:
+            # The full-text index of each database only knows its own rows: LIKE over the whole set
+            print("EqslMainWindow: Database set attached, searching with LIKE.")
+            return
+
+        probe = QSqlQuery(self.db)
+        self.fulltext_enabled = probe.exec(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH 'eqsl' LIMIT 0")
+        if not self.fulltext_enabled:
+            print(f"EqslMainWindow: Full-text index not usable, searching with LIKE: {probe.lastError().text()}")
+
+    def _apply_source_filter(self):
+        """Sets base filter AND current search on the source model and reselects it."""
+        clause = self.search_clause['where']
+        params = self.search_clause['params']
+
+        if self.search_rowids is not None:
+            # Result of the live search (in relevance order for full-text hits):
+            # the model only does primary key lookups, no scan in the GUI thread
+            self.source_model.set_rowids(self.search_rowids)
+            self.source_model.set_filter(BASE_FILTER)
+        else:
+            self.source_model.set_rowids(None)
+            if clause:
+                self.source_model.set_filter(f"{BASE_FILTER} AND {clause}", params)
+            else:
+                self.source_model.set_filter(BASE_FILTER)
+
+        self.source_model.select()
+        self._update_facets()
+
+    def _view_condition(self) -> tuple[str, list]:
+        """Complete condition of the view (base filter AND current search) with its parameters."""
+        if self.search_clause['where']:
+            return f"{BASE_FILTER} AND {self.search_clause['where']}", list(self.search_clause['params'])
+        return BASE_FILTER, []
+
+    def _update_facets(self):
+        """Requests the facet counts of the current filter (from the cache if possible)."""
+        if not self.facet_panel.isVisible() or not self.db.isOpen():
+            return
+        self.facet_panel.set_counting()
+        self.facet_counts.request(*self._view_condition())
+
+    @Slot(bool)
+    def _on_facet_panel_visibility_changed(self, visible: bool):
+        if visible:
+            self._update_facets()
+        else:
+            self.facet_counts.cancel()
+
+    @Slot(str)
+    def _on_facets_failed(self, message: str):
+        self.statusBar().showMessage(f"Facet counts failed ({message}).", 10000)
+
+    @Slot(str)
+    def _add_search_term(self, term: str):
+        """Adds a facet value (e.g. band:20M) to the search and searches right away."""
+        text = self.ui.txt_search_field_main.text().strip()
+        if f" {term} " in f" {text} ":
+            return
+        text = f"{text} {term}".strip()
+        # Set without the debounced textChanged search, the search below runs immediately
+        self.ui.txt_search_field_main.blockSignals(True)
+        self.ui.txt_search_field_main.setText(text)
+        self.ui.txt_search_field_main.blockSignals(False)
+        self.filter_data_flex(text)
+
+    def _clear_sort(self):
+        """Removes the column sort (rows in rank or qso_id order) without reloading the model."""
+        header = self.ui.tbl_data_view_main.horizontalHeader()
+        header.blockSignals(True)
+        header.setSortIndicator(-1, Qt.SortOrder.AscendingOrder)
+        header.blockSignals(False)
+        self.source_model.set_sort(-1, Qt.SortOrder.AscendingOrder)
+
     @Slot()
-    def filter_data_flex(self, text: str):
-        """Passes the search text to the custom proxy model for multi-column OR search."""
-        self.proxy_model.setFilterString(text)
+    def filter_data_flex(self, text: str, immediate: bool = True):
+        """
+        Multi-column OR search: spaces separate the terms. The search is translated
+        into a WHERE clause so the filtering runs inside SQLite. Terms with at least
+        3 characters are looked up in the full-text index and ranked by relevance.
+        Queries with fields/operators (e.g. "call:DL* band:20") use query_language;
+        an invalid query is reported in the search label and the view is kept.
+        The query runs in the live search thread, 'immediate' skips the debounce delay.
+        """
+        try:
+            search = self._build_search(text)
+        except QuerySyntaxError as e:
+            self._show_search_error(str(e))
+            return
+
+        self._show_search_error("")
+        self.search_clause = search
+
+        if search['match'] and search['match'] != self.ranked_match:
+            # A new ranked search shows its hits in rank order instead of the column sort;
+            # refreshes and database switches rerun the same search and keep the sort
+            self._clear_sort()
+        self.ranked_match = search['match']
+
+        if not search['where'] or not self.db.isOpen():
+            # Nothing to search (or no database): show all entries directly
+            self.live_search.cancel()
+            self.search_rowids = None
+            self._apply_source_filter()
+            self.statusBar().clearMessage()
+            return
+
+        self.statusBar().showMessage("Searching ...")
+        self.live_search.submit(search, immediate=immediate)
+
+    @Slot(str)
+    def _on_search_text_changed(self, text: str):
+        """Search-as-you-type (debounced)."""
+        self.filter_data_flex(text, immediate=False)
+
+    @Slot(QModelIndex, QModelIndex)
+    def _on_source_data_changed(self, top_left: QModelIndex, bottom_right: QModelIndex):
+        """Reports edited rows (ROWID in column 0) to the live search."""
+        rowids = [self.source_model.data(self.source_model.index(row, 0))
+                  for row in range(top_left.row(), bottom_right.row() + 1)]
+        self.live_search.mark_rows_changed([int(rowid) for rowid in rowids if rowid])
+
+    @Slot(int, list)
+    def _on_search_page_ready(self, generation: int, rowids: list):
+        """First page of the live search: show it right away, the total follows."""
+        self.search_rowids = rowids
+        self._apply_source_filter()
+        if len(rowids) == PAGE_SIZE:
+            self.statusBar().showMessage(f"{len(rowids)}+ matches, counting ...")
+
+    @Slot(int, list)
+    def _on_search_results_ready(self, generation: int, rowids: list):
+        """Complete result of the live search."""
+        if self.search_rowids is None or len(rowids) != len(self.search_rowids):
+            self.search_rowids = rowids
+            self._apply_source_filter()
+        self.statusBar().showMessage(f"{len(rowids)} matches")
+
+    @Slot(int, str)
+    def _on_search_failed(self, generation: int, message: str):
+        """Live search not possible (e.g. database locked): filter directly in the model."""
+        self.search_rowids = None
+        self._apply_source_filter()
+        self.statusBar().showMessage(f"Live search failed ({message}), searched directly.")
+
+    def _show_search_error(self, message: str):
+        """Shows a query error inline (label and red search field), empty message resets it."""
+        if message:
+            self.ui.lb_searchfield_main.setText(f"Invalid search: {message}")
+            self.ui.lb_searchfield_main.setStyleSheet("color: red;")
+            self.ui.txt_search_field_main.setStyleSheet("border: 1px solid red;")
+        else:
+            self.ui.lb_searchfield_main.setText(self.search_label_text)
+            self.ui.lb_searchfield_main.setStyleSheet("")
+            self.ui.txt_search_field_main.setStyleSheet("")
+
+    def _build_search(self, text: str) -> dict:
+        """
+        Compiles the search text, via the full-text index if the database has one.
+        Raises QuerySyntaxError for an invalid field query.
+        """
+        if is_structured_query(text):
+            return compile_query(text, FTS_TABLE if self.fulltext_enabled else None)
+        if self.fulltext_enabled:
+            return build_fulltext_filter(text)
+        clause, params = build_terms_filter(text)
+        # 'terms' lets the live search narrow the LIKE search with its trigram index
+        return {'where': clause, 'params': params, 'match': None, 'terms': text.split()}
         
     @Slot()
     def reset_filter(self):
@@ -258,10 +524,14 @@ class EqslMainWindow(QMainWindow):
         # Clearing the selection at the beginning is necessary because otherwise the selection remains in the SelectionModel
         self.ui.tbl_data_view_main.selectionModel().clearSelection() 
         
-        row_count = self.proxy_model.rowCount()
+        # The model loads pages while scrolling; "all" means all matches
+        while self.source_model.canFetchMore():
+            self.source_model.fetchMore()
+        
+        row_count = self.source_model.rowCount()
         if row_count > 0:
-            top_left = self.proxy_model.index(0, 0)
-            bottom_right = self.proxy_model.index(row_count - 1, self.proxy_model.columnCount() - 1)
+            top_left = self.source_model.index(0, 0)
+            bottom_right = self.source_model.index(row_count - 1, self.source_model.columnCount() - 1)
             
             selection = QItemSelection(top_left, bottom_right)
             self.ui.tbl_data_view_main.selectionModel().select(
@@ -286,9 +556,7 @@ class EqslMainWindow(QMainWindow):
             self._set_default_preview() 
             return
 
-        source_index = self.proxy_model.mapToSource(current_index)
-        blob_index = self.source_model.index(source_index.row(), COL_IMAGE_BLOB)
-        blob_data = self.source_model.data(blob_index, Qt.ItemDataRole.DisplayRole)
+        blob_data = self.source_model.load_image(current_index.row())
 
         if isinstance(blob_data, QByteArray) and not blob_data.isEmpty():
             pixmap = QPixmap()
@@ -315,13 +583,11 @@ class EqslMainWindow(QMainWindow):
         selected_rows = self.ui.tbl_data_view_main.selectionModel().selectedRows()
         
         image_list = []
-        for proxy_index in selected_rows:
-            source_index = self.proxy_model.mapToSource(proxy_index)
-            blob_index = self.source_model.index(source_index.row(), COL_IMAGE_BLOB)
-            blob_data = self.source_model.data(blob_index)
+        for index in selected_rows:
+            blob_data = self.source_model.load_image(index.row())
             
-            if isinstance(blob_data, QByteArray) and not blob_data.isEmpty():
-                image_list.append(blob_data)
+            if not blob_data.isEmpty():
+                image_list.append((self.source_model.rowid(index.row()), blob_data))
 
         if image_list:
             viewer = ImageViewerDialog(image_list, self)
@@ -329,9 +595,29 @@ class EqslMainWindow(QMainWindow):
         else:
             QMessageBox.information(self, "No Selection", "Please select records with images.")
 
+    def _collect_export_jobs(self) -> list[dict]:
+        """Collects ROWID and filename fields of the selected rows (the BLOBs are read by the worker)."""
+        jobs = []
+        for index in self.ui.tbl_data_view_main.selectionModel().selectedRows():
+            row = index.row()
+            
+            jobs.append({
+                'rowid': self.source_model.rowid(row),
+                'call': self.source_model.data(self.source_model.index(row, COL_CALL)),
+                'date': self.source_model.data(self.source_model.index(row, COL_QSO_DATE)),
+                'time': self.source_model.data(self.source_model.index(row, COL_TIME_ON)),
+                'band': self.source_model.data(self.source_model.index(row, COL_BAND)),
+                'mode': self.source_model.data(self.source_model.index(row, COL_MODE)),
+            })
+        return jobs
+
     @Slot()
     def download_selected_images(self):
-        """Downloads selected images to the folder defined in the settings."""
+        """
+        Exports the selected images to the folder defined in the settings.
+        JPEG/PNG cards are written unchanged, other formats are converted to PNG.
+        The export runs in a background thread with a cancellable progress dialog.
+        """
         
         download_folder = self.settings_manager.get_current_download_dir()
         
@@ -340,53 +626,281 @@ class EqslMainWindow(QMainWindow):
                                  "The download path is not set or invalid in the settings. Please check the settings.")
             return
         
-        file_format = "PNG" 
+        if self.export_thread is not None:
+            QMessageBox.warning(self, "Export running", "An export is already running. Please wait until it is finished.")
+            return
 
-        selected_rows = self.ui.tbl_data_view_main.selectionModel().selectedRows()
-        if not selected_rows:
+        jobs = self._collect_export_jobs()
+        if not jobs:
             QMessageBox.warning(self, "No Selection", "Please select records to export.")
             return
 
-        success_count = 0
-        for proxy_index in selected_rows:
-            source_index = self.proxy_model.mapToSource(proxy_index)
-            
-            # Retrieve data fields for the filename
-            call = self.source_model.data(self.source_model.index(source_index.row(), COL_CALL))
-            date = self.source_model.data(self.source_model.index(source_index.row(), COL_QSO_DATE))
-            time = self.source_model.data(self.source_model.index(source_index.row(), COL_TIME_ON))
-            band = self.source_model.data(self.source_model.index(source_index.row(), COL_BAND))
-            mode = self.source_model.data(self.source_model.index(source_index.row(), COL_MODE))
-            
-            # Retrieve image BLOB
-            blob_index = self.source_model.index(source_index.row(), COL_IMAGE_BLOB)
-            blob_data = self.source_model.data(blob_index)
+        table_name = self.settings_manager.settings.get("table_name", "eqsl_data")
+        worker = ImageExportWorker(self.db.databaseName(), jobs, download_folder, table_name,
+                                   federation=self.federation)
+        self._start_export_worker(worker, "Exporting images...", len(jobs), self._show_export_report)
 
-            if not isinstance(blob_data, QByteArray) or blob_data.isEmpty():
-                continue
+    @Slot()
+    def export_selected_images_zip(self):
+        """Exports the selected images into one ZIP archive (streamed, ZIP64 for large archives)."""
+        if self.export_thread is not None:
+            QMessageBox.warning(self, "Export running", "An export is already running. Please wait until it is finished.")
+            return
 
-            # Create and sanitize filename
-            filename_base = f"{call}_{date}_{time}_{band}_{mode}"
-            safe_filename = re.sub(r'[^\w\-]', '_', str(filename_base)) 
-            
-            file_path = os.path.join(download_folder, f"{safe_filename}.{file_format.lower()}")
+        jobs = self._collect_export_jobs()
+        if not jobs:
+            QMessageBox.warning(self, "No Selection", "Please select records to export.")
+            return
 
-            # Save
-            pixmap = QPixmap()
-            if pixmap.loadFromData(blob_data):
-                success = pixmap.save(file_path, file_format) 
-                if success:
-                    success_count += 1
-            
-        QMessageBox.information(self, "Export Completed", 
-                                f"{success_count} of {len(selected_rows)} records successfully exported. (Destination: {download_folder})")
+        download_folder = self.settings_manager.get_current_download_dir()
+        start_dir = download_folder if download_folder and os.path.isdir(download_folder) else os.path.expanduser("~")
+        default_name = f"eqsl_cards_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
+
+        zip_path, _ = QFileDialog.getSaveFileName(
+            self,
+            "Save ZIP archive",
+            os.path.join(start_dir, default_name),
+            "ZIP Archives (*.zip);;All Files (*)"
+        )
+        if not zip_path:
+            return
+        if not zip_path.lower().endswith('.zip'):
+            zip_path += '.zip'
+
+        table_name = self.settings_manager.settings.get("table_name", "eqsl_data")
+        worker = ZipExportWorker(self.db.databaseName(), jobs, zip_path, table_name, federation=self.federation)
+        self._start_export_worker(worker, "Writing ZIP archive...", len(jobs), self._show_export_report)
 
     @Slot()
-    def _refresh_model(self):
-        """Refreshes the data model, e.g., after an import."""
-        self.source_model.select()
-        print("EqslMainWindow: Data model refreshed after import.")
-        QMessageBox.information(self, "Update", "The data view has been successfully refreshed.")
+    def sync_card_mirror(self):
+        """Brings the card mirror in the download directory up to date (only new/changed cards are written)."""
+        download_folder = self.settings_manager.get_current_download_dir()
+        
+        if not download_folder or not os.path.isdir(download_folder):
+            QMessageBox.critical(self, "Mirror Error", 
+                                 "The download path is not set or invalid in the settings. Please check the settings.")
+            return
+        
+        if self.export_thread is not None:
+            QMessageBox.warning(self, "Export running", "An export is already running. Please wait until it is finished.")
+            return
+
+        table_name = self.settings_manager.settings.get("table_name", "eqsl_data")
+        worker = MirrorSyncWorker(self.db.databaseName(), download_folder, table_name)
+        self._start_export_worker(worker, "Synchronizing card mirror...", 0, self._show_mirror_report)
+
+    @Slot()
+    def backup_database(self):
+        """Online backup of the open database while the program keeps running."""
+        db_path = self.db.databaseName()
+        if not db_path or not os.path.exists(db_path):
+            QMessageBox.critical(self, "Backup Error", "No database is open.")
+            return
+
+        if self.export_thread is not None:
+            QMessageBox.warning(self, "Export running", "An export is already running. Please wait until it is finished.")
+            return
+
+        worker = self.backup_scheduler.create_worker()
+        self._start_export_worker(worker, "Backing up database...", 0, self._show_backup_report, title="Backup")
+
+    @Slot(dict)
+    def _on_scheduled_backup_finished(self, results: dict):
+        if results['error']:
+            self.statusBar().showMessage(f"Scheduled backup failed ({results['error']}).", 10000)
+        elif results['path']:
+            self.statusBar().showMessage(f"Scheduled backup written: {os.path.basename(results['path'])}", 10000)
+
+    @Slot()
+    def open_maintenance(self):
+        """Opens the maintenance dialog (the idle maintenance pauses while it is open)."""
+        db_path = self.db.databaseName()
+        if not db_path or not os.path.exists(db_path):
+            QMessageBox.critical(self, "Maintenance Error", "No database is open.")
+            return
+
+        self.idle_maintenance.set_paused(True)
+        try:
+            MaintenanceDialog(db_path, parent=self).exec()
+        finally:
+            self.idle_maintenance.set_paused(False)
+
+    @Slot()
+    def merge_database(self):
+        """Merges another logbook database (QSOs and cards) into the open one."""
+        db_path = self.db.databaseName()
+        if not db_path or not os.path.exists(db_path):
+            QMessageBox.critical(self, "Merge Error", "No database is open.")
+            return
+
+        if self.export_thread is not None:
+            QMessageBox.warning(self, "Export running", "An export is already running. Please wait until it is finished.")
+            return
+
+        source_path, _ = QFileDialog.getOpenFileName(
+            self,
+            "Logbook database to merge into the open database",
+            os.path.dirname(db_path),
+            "SQLite Databases (*.db *.sqlite *.sqlite3);;All Files (*)"
+        )
+        if not source_path:
+            return
+
+        labels = list(POLICIES.values())
+        label, ok = QInputDialog.getItem(self, "Merge Logbook Database",
+                                         "QSOs found in both logbooks with different fields:",
+                                         labels, labels.index(POLICIES[DEFAULT_POLICY]), False)
+        if not ok:
+            return
+        policy = next(name for name, text in POLICIES.items() if text == label)
+
+        table_name = self.settings_manager.settings.get("table_name", "eqsl_data")
+        worker = MergeWorker(db_path, source_path, table_name, policy)
+        self._start_export_worker(worker, "Merging logbook database...", 0, self._show_merge_report, title="Merge")
+
+    def _start_export_worker(self, worker, label: str, total: int, report, title: str = "Export"):
+        """
+        Moves an export worker into its own thread and shows a cancellable progress dialog.
+        'report' is called with the result dict once the worker has finished.
+        """
+        self.export_worker = worker
+        self.export_report = report
+        self.export_thread = QThread(self)
+        self.export_worker.moveToThread(self.export_thread)
+
+        self.export_progress = QProgressDialog(label, "Cancel", 0, total, self)
+        self.export_progress.setWindowTitle(title)
+        self.export_progress.setWindowModality(Qt.WindowModality.WindowModal)
+        self.export_progress.setMinimumDuration(0)
+        self.export_progress.setValue(0)
+
+        # Worker -> GUI (queued across threads)
+        self.export_worker.progress.connect(self._on_export_progress)
+        self.export_worker.finished.connect(self._on_export_finished)
+        # Cancel is a thread-safe flag, so call it directly instead of queueing it behind run()
+        self.export_progress.canceled.connect(self.export_worker.cancel, Qt.ConnectionType.DirectConnection)
+        # Workers with several phases (backup: copy, compress) update the label
+        if hasattr(self.export_worker, 'status'):
+            self.export_worker.status.connect(self.export_progress.setLabelText)
+        self.export_thread.started.connect(self.export_worker.run)
+
+        self.export_thread.start()
+
+    @Slot(int, int)
+    def _on_export_progress(self, processed: int, total: int):
+        if self.export_progress is not None:
+            self.export_progress.setMaximum(total)
+            self.export_progress.setValue(processed)
+
+    @Slot(dict)
+    def _on_export_finished(self, results: dict):
+        """Cleans up the export thread and shows the report."""
+        if self.export_progress is not None:
+            self.export_progress.canceled.disconnect()
+            self.export_progress.close()
+            self.export_progress = None
+
+        self.export_thread.quit()
+        self.export_thread.wait()
+        self.export_worker.deleteLater()
+        self.export_thread.deleteLater()
+        self.export_worker = None
+        self.export_thread = None
+
+        report, self.export_report = self.export_report, None
+        report(results)
+
+    def _show_export_report(self, results: dict):
+        title = "Export Cancelled" if results['cancelled'] else "Export Completed"
+        QMessageBox.information(self, title, 
+                                f"{results['exported']} of {results['total']} records successfully exported.\n"
+                                f"Written unchanged: {results['passed_through']}, converted to PNG: {results['converted']}\n"
+                                f"Without image: {results['no_image']}, failed: {results['failed']}\n"
+                                f"{results['bytes_written'] / (1024 * 1024):.1f} MB written in {results['elapsed']:.1f} s "
+                                f"({results['files_per_second']:.1f} files/s)\n"
+                                f"(Destination: {results['destination']})")
+
+    def _show_backup_report(self, results: dict):
+        if results['error']:
+            QMessageBox.critical(self, "Backup Error", f"The backup failed:\n{results['error']}")
+            return
+        if results['cancelled']:
+            QMessageBox.information(self, "Backup Cancelled", "The backup was cancelled, no file was written.")
+            return
+
+        QMessageBox.information(self, "Backup Completed", 
+                                f"Backup written: {results['path']}\n"
+                                f"{results['database_bytes'] / (1024 * 1024):.1f} MB database, "
+                                f"{results['backup_bytes'] / (1024 * 1024):.1f} MB on disk, "
+                                f"{results['elapsed']:.1f} s\n"
+                                f"Old backups removed: {len(results['removed'])}")
+
+    def _show_merge_report(self, results: dict):
+        if results['error']:
+            QMessageBox.critical(self, "Merge Error", f"The merge failed, the database is unchanged:\n{results['error']}")
+            return
+        if results['cancelled']:
+            QMessageBox.information(self, "Merge Cancelled", "The merge was cancelled, the database is unchanged.")
+            return
+
+        if results['rowids']:
+            self._refresh_model(results['rowids'])
+
+        message = QMessageBox(QMessageBox.Icon.Information, "Merge Completed",
+                              f"{results['source_rows']} QSOs in {os.path.basename(results['source'])}.\n"
+                              f"New: {results['inserted']}, updated: {results['updated']}, "
+                              f"cards copied: {results['images_copied']}\n"
+                              f"Found in both logbooks: {results['identical']} identical, "
+                              f"{results['conflicts']} with {results['differences']} differing fields\n"
+                              f"{results['elapsed']:.1f} s", parent=self)
+        if results['diff_path']:
+            message.setInformativeText(f"All differences: {results['diff_path']}")
+            message.setDetailedText("\n".join(
+                f"{call} {date} {time_on}  {field}: ours '{ours}', theirs '{theirs}' ({action})"
+                for _qso_id, call, date, time_on, field, ours, theirs, action in results['diff']))
+        message.exec()
+
+    def _show_mirror_report(self, results: dict):
+        if results['error']:
+            QMessageBox.critical(self, "Mirror Error", f"Mirror synchronization failed:\n{results['error']}")
+            return
+
+        title = "Mirror Sync Cancelled" if results['cancelled'] else "Mirror Sync Completed"
+        QMessageBox.information(self, title, 
+                                f"{results['total']} cards with image in the database.\n"
+                                f"Written (new/changed): {results['written']}, unchanged: {results['unchanged']}\n"
+                                f"Removed (deleted cards): {results['removed']}, failed: {results['failed']}\n"
+                                f"{results['bytes_written'] / (1024 * 1024):.1f} MB written in {results['elapsed']:.1f} s\n"
+                                f"(Mirror: {results['destination']})")
+
+    @Slot(list)
+    def _refresh_model(self, rowids: list):
+        """
+        Updates the rows of an import in the model (ROWIDs from qso_data_updated).
+        No reload: selection, sort and scroll position of the table are kept.
+        """
+        # Images of these QSOs may have been replaced, their tile pyramids are outdated
+        for rowid in rowids:
+            pyramid_cache.invalidate(rowid)
+        # Merges and card re-imports also change existing rows: their trigrams
+        # are outdated (new rows are indexed by update_index)
+        self.live_search.mark_rows_changed(rowids)
+        self.live_search.update_index()
+
+        # Same condition as the view: base filter AND current search
+        visible = self.source_model.refresh_rows(rowids, *self._view_condition())
+
+        # Cached facet counts do not contain the imported QSOs
+        self.facet_counts.invalidate()
+        self._update_facets()
+
+        # The preview of the current row may show a replaced image
+        current_index = self.ui.tbl_data_view_main.currentIndex()
+        if current_index.isValid() and self.source_model.rowid(current_index.row()) in rowids:
+            self.show_preview(current_index, QModelIndex())
+
+        print(f"EqslMainWindow: {len(rowids)} QSOs updated after import, {visible} shown.")
+        self.statusBar().showMessage(f"Import: {len(rowids)} QSOs added or updated, {visible} shown in the current view.", 10000)
 
     @Slot()
     def _handle_edit_qso(self):
@@ -399,8 +913,7 @@ class EqslMainWindow(QMainWindow):
             return
     
     # Nur die erste ausgewählte Zeile verwenden
-        proxy_index = selected_indices[0] 
-        source_index = self.proxy_model.mapToSource(proxy_index)
+        source_index = selected_indices[0] 
         source_model = self.source_model
     
     # WICHTIG: Die ROWID (interne ID) ist für das Update nötig. Sie ist normalerweise Spalte 0.
@@ -408,6 +921,12 @@ class EqslMainWindow(QMainWindow):
         if not qso_id:
             QMessageBox.critical(self, "Fehler", "Konnte die interne Datensatz-ID (ROWID) nicht abrufen.")
             return
+        if self.federation.locate(qso_id)[0] != MAIN_SCHEMA:
+            # The card import writes into the open database only
+            QMessageBox.information(self, "Database Set",
+                                    f"This QSO belongs to the attached database "
+                                    f"'{self.federation.label_of(qso_id)}'. Open it to edit the QSO.")
+            return
         
     # Abrufen der anzuzeigenden Daten
     # Definierte Spaltenindizes aus eqsl_main_prog.py verwenden
@@ -427,6 +946,115 @@ class EqslMainWindow(QMainWindow):
     # Öffnet das Importfenster im "Edit"-Modus mit den Daten
         self.gui_manager.open_single_card_import(qso_data=qso_data)    
 
+    def _active_set_paths(self) -> list[str]:
+        active_set = self.settings_manager.settings.get("active_database_set", "")
+        return list(self.settings_manager.settings.get("database_sets", {}).get(active_set, []))
+
+    def _build_federation(self, db_path: str, source_paths: list[str]) -> Federation:
+        """Database set of the open database; attached databases are migrated first (same columns and indexes)."""
+        table_name = self.settings_manager.settings.get("table_name", "eqsl_data")
+        usable = []
+        for path in source_paths:
+            if os.path.exists(path) and not migrate_database(path, table_name):
+                print(f"[WARNING] Schema of {path} could not be updated, not attached.")
+                continue
+            usable.append(path)
+        return Federation(db_path, usable, table_name)
+
+    def _apply_federation(self, federation: Federation) -> bool:
+        """
+        Attaches a database set to the GUI connection and shows it in the same
+        model (no new model or view; the model switches between table and view
+        of the set). Returns False if the set could not be attached, the open
+        database is then shown alone.
+        """
+        table_name = self.settings_manager.settings.get("table_name", "eqsl_data")
+        for statement in self.federation.detach_statements():
+            query = QSqlQuery(self.db)
+            if not query.exec(statement):
+                print(f"[WARNING] {statement} failed: {query.lastError().text()}")
+
+        ok = True
+        record = self.db.record(table_name)
+        columns = [record.fieldName(i) for i in range(record.count())]
+        for sql, params in federation.attach_statements(columns):
+            query = QSqlQuery(self.db)
+            query.prepare(sql)
+            for value in params:
+                query.addBindValue(value)
+            if not query.exec():
+                print(f"[WARNING] Attaching the database set failed: {query.lastError().text()}")
+                ok = False
+                break
+        if not ok:
+            for statement in federation.detach_statements():
+                QSqlQuery(self.db).exec(statement)
+            federation = Federation(self.db.databaseName(), table_name=table_name)
+
+        # Row ids of the previous set (tile cache, search result) are no longer valid
+        self.federation = federation
+        pyramid_cache.clear()
+        self.live_search.set_federation(federation)
+        self.facet_counts.set_federation(federation)
+        self.search_rowids = None
+
+        self._check_fulltext_index()
+        self.source_model.set_table(table_name, federation)
+        self._hide_columns()
+        # Rerun the current search on the set (full-text or LIKE)
+        self.search_clause = {'where': "", 'params': [], 'match': None}
+        self._apply_source_filter()
+        self.filter_data_flex(self.ui.txt_search_field_main.text())
+        return ok
+
+    def set_database_set(self, name: str):
+        """Switches to a named database set ("" = the open database only)."""
+        database_sets = self.settings_manager.settings.get("database_sets", {})
+        if name and name not in database_sets:
+            print(f"[WARNING] Database set '{name}' not found, showing the open database only.")
+            name = ""
+        if not self.db.isOpen():
+            QMessageBox.critical(self, "Database Set", "No database is open.")
+            return
+
+        federation = self._build_federation(self.db.databaseName(), database_sets.get(name, []))
+        if not self._apply_federation(federation):
+            QMessageBox.warning(self, "Database Set",
+                                f"The databases of '{name}' could not be attached. Showing the open database only.")
+            name = ""
+
+        if self.settings_manager.settings.get("active_database_set", "") != name:
+            self.settings_manager.settings["active_database_set"] = name
+            self.settings_manager.save_settings()
+        for action in self.database_set_group.actions():
+            action.setChecked(action.text() == (name or "Open Database Only"))
+
+        attached = len(self.federation.source_paths)
+        self.statusBar().showMessage(f"Database set: {name or 'open database only'}"
+                                     + (f" ({attached} databases attached)" if attached else ""), 10000)
+
+    @Slot()
+    def create_database_set(self):
+        """Asks for the databases to attach to the open one and a name, saves and activates the set."""
+        start_dir = os.path.dirname(self.db.databaseName()) or os.path.expanduser("~")
+        paths, _ = QFileDialog.getOpenFileNames(
+            self,
+            "Databases to attach to the open database",
+            start_dir,
+            "SQLite Databases (*.db *.sqlite *.sqlite3);;All Files (*)"
+        )
+        if not paths:
+            return
+        name, ok = QInputDialog.getText(self, "Database Set", "Name of the database set:")
+        name = name.strip()
+        if not ok or not name:
+            return
+
+        self.settings_manager.settings.setdefault("database_sets", {})[name] = paths
+        self.settings_manager.save_settings()
+        self._populate_database_set_menu()
+        self.set_database_set(name)
+
     @Slot(str)
     def _handle_db_path_changed(self, new_db_path: str):
         """
@@ -435,33 +1063,38 @@ class EqslMainWindow(QMainWindow):
         QMessageBox.information(self, "Database Change", 
                                 f"Attempting to change the database connection to: {new_db_path}")
         
-        # 1. Close old connection
+        # 1. Close old connection (ROWIDs of the old DB are no longer valid for the tile cache)
+        pyramid_cache.clear()
+        self.live_search.set_database(new_db_path)
+        self.facet_counts.set_database(new_db_path)
+        self.idle_maintenance.set_database(new_db_path)
+        self.backup_scheduler.set_database(new_db_path)
+        self.search_rowids = None
+        old_db_path = self.db.databaseName()
         if self.db.isOpen():
             self.db.close()
+        if old_db_path and os.path.abspath(old_db_path) != os.path.abspath(new_db_path):
+            close_manager(old_db_path)
             
-        # 2. Change database name in QSqlDatabase object
+        # 2. Bring the schema up to date (new indexes/columns), then change the database name
+        table_name = self.settings_manager.settings.get("table_name", "eqsl_data")
+        if not migrate_database(new_db_path, table_name):
+            QMessageBox.warning(self, "Database Warning",
+                                "The database schema could not be updated. Search and sorting may be slower.")
         self.db.setDatabaseName(new_db_path)
         
         # 3. Open new connection
         if self.db.open():
-            # 4. Reinitialize model 
-            table_name = self.settings_manager.settings.get("table_name", "eqsl_data")
-            
-            self.source_model.setTable(table_name)
-            self.source_model.setFilter(f"EQSL_IMAGE_BLOB IS NOT NULL")
-            self.source_model.select()
+            apply_sqlite_profile(self.db)
+            # 4. Reinitialize model with the active database set attached to the new database,
+            # then rerun the current search on it (full-text or LIKE)
+            self.federation = Federation(new_db_path, table_name=table_name)
+            self._apply_federation(self._build_federation(new_db_path, self._active_set_paths()))
             
-            self.ui.tbl_data_view_main.setModel(self.proxy_model) 
+            self.ui.tbl_data_view_main.setModel(self.source_model) 
             
             # Hide columns again.
-            total_columns = self.source_model.columnCount()
-            visible_indices = set(SEARCHABLE_COLUMN_INDICES + [COL_IMAGE_BLOB])
-            
-            for col_index in range(total_columns):
-                 if col_index not in visible_indices or col_index == COL_IMAGE_BLOB:
-                    self.ui.tbl_data_view_main.setColumnHidden(col_index, True)
-                 else:
-                    self.ui.tbl_data_view_main.setColumnHidden(col_index, False)
+            self._hide_columns()
                     
             self.setWindowTitle(f"eQSL Program (Main Window) - DB: {os.path.basename(new_db_path)}")
             QMessageBox.information(self, "Database Change", 
@@ -470,11 +1103,32 @@ class EqslMainWindow(QMainWindow):
             QMessageBox.critical(self, "Database Error", 
                                  f"Could not open new database '{new_db_path}'. Retaining old state if possible.")
 
+    def closeEvent(self, event):
+        """Stops the live search, facet, maintenance and backup threads before the window closes."""
+        self.live_search.shutdown()
+        self.facet_counts.shutdown()
+        self.idle_maintenance.shutdown()
+        self.backup_scheduler.shutdown()
+        close_all()
+        super().closeEvent(event)
+
 
 # ----------------------------------------------------------------------
 # main() Function for program start 
 # ----------------------------------------------------------------------
 
+def apply_sqlite_profile(db: QSqlDatabase):
+    """
+    Gives the GUI connection the PRAGMA profile of the connection manager
+    (WAL, busy_timeout, cache). It is not part of the manager's writer lock,
+    edits in the table wait for an import through busy_timeout.
+    """
+    query = QSqlQuery(db)
+    for statement in pragma_statements():
+        if not query.exec(statement):
+            print(f"[WARNING] {statement} failed: {query.lastError().text()}")
+
+
 def main():
     """Defined start function for the application and database connection."""
     app = QApplication(sys.argv)
@@ -488,8 +1142,15 @@ def main():
         sys.exit(1) 
         
     db_path = settings_manager.get_current_db_path() 
+    configure_connections(settings_manager.settings.get("sqlite_profile"))
     
-    # 2. Establish database connection
+    # 2. Bring the schema up to date (once per start, no-op if the database is current)
+    if db_path and os.path.exists(db_path):
+        if not migrate_database(db_path, settings_manager.settings.get("table_name", "eqsl_data")):
+            QMessageBox.warning(None, "Database Warning",
+                                "The database schema could not be updated. Search and sorting may be slower.")
+
+    # 3. Establish database connection
     db = QSqlDatabase.addDatabase("QSQLITE")
     db.setDatabaseName(db_path) 
     
@@ -503,11 +1164,13 @@ def main():
         QMessageBox.critical(None, "Database Error", 
                              f"Could not open database '{db_path}'. Please check the path in the settings. The application will start without data access.")
         db_ok = False
+    elif db_path:
+        apply_sqlite_profile(db)
         
-    # 3. Instantiate main window with DB connection AND Settings Manager
+    # 4. Instantiate main window with DB connection AND Settings Manager
     main_window = EqslMainWindow(db, settings_manager) 
     
-    # 4. Show GUI
+    # 5. Show GUI
     main_window.show()
     sys.exit(app.exec())
 
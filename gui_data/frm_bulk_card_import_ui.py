@@ -15,8 +15,8 @@ from PySide6.QtGui import (QBrush, QColor, QConicalGradient, QCursor,
     QFont, QFontDatabase, QGradient, QIcon,
     QImage, QKeySequence, QLinearGradient, QPainter,
     QPalette, QPixmap, QRadialGradient, QTransform)
-from PySide6.QtWidgets import (QApplication, QDialog, QLabel, QLineEdit,
-    QPushButton, QSizePolicy, QWidget)
+from PySide6.QtWidgets import (QApplication, QCheckBox, QDialog, QLabel,
+    QLineEdit, QPlainTextEdit, QPushButton, QSizePolicy, QWidget)
 
 class Ui_frm_bulk_card_import(object):
     def setupUi(self, frm_bulk_card_import):
@@ -32,11 +32,11 @@ class Ui_frm_bulk_card_import(object):
         self.btn_select_path_bulkcard_upload.setFont(font)
         self.btn_import_bulkcard = QPushButton(frm_bulk_card_import)
         self.btn_import_bulkcard.setObjectName(u"btn_import_bulkcard")
-        self.btn_import_bulkcard.setGeometry(QRect(660, 340, 85, 27))
+        self.btn_import_bulkcard.setGeometry(QRect(690, 340, 85, 27))
         self.btn_import_bulkcard.setFont(font)
         self.btn_reset_bulkcard = QPushButton(frm_bulk_card_import)
         self.btn_reset_bulkcard.setObjectName(u"btn_reset_bulkcard")
-        self.btn_reset_bulkcard.setGeometry(QRect(540, 340, 85, 27))
+        self.btn_reset_bulkcard.setGeometry(QRect(490, 340, 85, 27))
         self.btn_reset_bulkcard.setFont(font)
         self.lb_path_bulkcard = QLabel(frm_bulk_card_import)
         self.lb_path_bulkcard.setObjectName(u"lb_path_bulkcard")
@@ -57,6 +57,18 @@ class Ui_frm_bulk_card_import(object):
         self.lb_bulk_card_upload_section.setGeometry(QRect(110, 50, 601, 27))
         self.lb_bulk_card_upload_section.setFont(font1)
         self.lb_bulk_card_upload_section.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.btn_plan_bulkcard = QPushButton(frm_bulk_card_import)
+        self.btn_plan_bulkcard.setObjectName(u"btn_plan_bulkcard")
+        self.btn_plan_bulkcard.setGeometry(QRect(590, 340, 85, 27))
+        self.btn_plan_bulkcard.setFont(font)
+        self.chk_bulk_cards = QCheckBox(frm_bulk_card_import)
+        self.chk_bulk_cards.setObjectName(u"chk_bulk_cards")
+        self.chk_bulk_cards.setGeometry(QRect(70, 378, 500, 25))
+        self.chk_bulk_cards.setFont(font1)
+        self.txt_plan_bulkcard = QPlainTextEdit(frm_bulk_card_import)
+        self.txt_plan_bulkcard.setObjectName(u"txt_plan_bulkcard")
+        self.txt_plan_bulkcard.setGeometry(QRect(70, 410, 705, 130))
+        self.txt_plan_bulkcard.setReadOnly(True)
         self.btn_cancel_frm_bulk_import = QPushButton(frm_bulk_card_import)
         self.btn_cancel_frm_bulk_import.setObjectName(u"btn_cancel_frm_bulk_import")
         self.btn_cancel_frm_bulk_import.setGeometry(QRect(360, 550, 85, 27))
@@ -77,6 +89,15 @@ class Ui_frm_bulk_card_import(object):
         self.lb_warning_bulk_upload_1.setText(QCoreApplication.translate("frm_bulk_card_import", u"<html><head/><body><p align=\"center\">Warning! Images for upload must have a filename defined by the AC9HP downloader,<br>which should be like this and the .jpg or .png format: <br><br><br>\n"
 "<span style=\" font-size:10pt; font-weight:700;\">Callsign=EA2BHE_VisitorCallsign=OE4VMB_QSODate=2025-09-01_15_23_00_0_Band=20M_Mode=FT8</span></p><p><br/></p><p><br/></p></body></html>", None))
         self.lb_bulk_card_upload_section.setText(QCoreApplication.translate("frm_bulk_card_import", u"Bulk Card Import for Eqsl downloaded by AC9HP Downloader", None))
+#if QT_CONFIG(tooltip)
+        self.btn_plan_bulkcard.setToolTip(QCoreApplication.translate("frm_bulk_card_import", u"Dry run: match the cards and show what an import would do, nothing is written", None))
+#endif // QT_CONFIG(tooltip)
+        self.btn_plan_bulkcard.setText(QCoreApplication.translate("frm_bulk_card_import", u"Plan", None))
+#if QT_CONFIG(tooltip)
+        self.chk_bulk_cards.setToolTip(QCoreApplication.translate("frm_bulk_card_import", u"Large initial loads: safety backup first, indexes rebuilt after the load (faster, but a crash during the load needs the backup)", None))
+#endif // QT_CONFIG(tooltip)
+        self.chk_bulk_cards.setText(QCoreApplication.translate("frm_bulk_card_import", u"Bulk-load mode (large initial import)", None))
+        self.txt_plan_bulkcard.setPlaceholderText(QCoreApplication.translate("frm_bulk_card_import", u"Plan: matched cards, QSOs not found and ambiguous matches", None))
         self.btn_cancel_frm_bulk_import.setText(QCoreApplication.translate("frm_bulk_card_import", u"Back", None))
     # retranslateUi
 
@@ -47,6 +47,14 @@ class Ui_frm_main_window(object):
         self.actionVersionInfo.setObjectName(u"actionVersionInfo")
         self.actionBulk_Card_Import = QAction(frm_main_window)
         self.actionBulk_Card_Import.setObjectName(u"actionBulk_Card_Import")
+        self.actionSync_Card_Mirror = QAction(frm_main_window)
+        self.actionSync_Card_Mirror.setObjectName(u"actionSync_Card_Mirror")
+        self.actionBackup_Database = QAction(frm_main_window)
+        self.actionBackup_Database.setObjectName(u"actionBackup_Database")
+        self.actionDatabase_Maintenance = QAction(frm_main_window)
+        self.actionDatabase_Maintenance.setObjectName(u"actionDatabase_Maintenance")
+        self.actionMerge_Database = QAction(frm_main_window)
+        self.actionMerge_Database.setObjectName(u"actionMerge_Database")
         self.centralwidget = QWidget(frm_main_window)
         self.centralwidget.setObjectName(u"centralwidget")
         self.txt_search_field_main = QLineEdit(self.centralwidget)
@@ -66,7 +74,7 @@ class Ui_frm_main_window(object):
         self.btn_search_main.setFont(font1)
         self.btn_reset_main = QPushButton(self.centralwidget)
         self.btn_reset_main.setObjectName(u"btn_reset_main")
-        self.btn_reset_main.setGeometry(QRect(850, 160, 85, 27))
+        self.btn_reset_main.setGeometry(QRect(880, 160, 85, 27))
         self.btn_reset_main.setFont(font1)
         self.btn_markall_main = QPushButton(self.centralwidget)
         self.btn_markall_main.setObjectName(u"btn_markall_main")
@@ -80,6 +88,10 @@ class Ui_frm_main_window(object):
         self.btn_export_image.setObjectName(u"btn_export_image")
         self.btn_export_image.setGeometry(QRect(690, 160, 85, 27))
         self.btn_export_image.setFont(font1)
+        self.btn_export_zip = QPushButton(self.centralwidget)
+        self.btn_export_zip.setObjectName(u"btn_export_zip")
+        self.btn_export_zip.setGeometry(QRect(785, 160, 85, 27))
+        self.btn_export_zip.setFont(font1)
         self.btn_show_image = QPushButton(self.centralwidget)
         self.btn_show_image.setObjectName(u"btn_show_image")
         self.btn_show_image.setGeometry(QRect(690, 110, 85, 27))
@@ -89,7 +101,7 @@ class Ui_frm_main_window(object):
         self.lb_preview_image_main.setGeometry(QRect(140, 20, 255, 170))
         self.btn_edit = QPushButton(self.centralwidget)
         self.btn_edit.setObjectName(u"btn_edit")
-        self.btn_edit.setGeometry(QRect(850, 110, 85, 27))
+        self.btn_edit.setGeometry(QRect(880, 110, 85, 27))
         self.btn_edit.setFont(font1)
         self.tbl_data_view_main = QTableView(self.centralwidget)
         self.tbl_data_view_main.setObjectName(u"tbl_data_view_main")
@@ -113,16 +125,21 @@ class Ui_frm_main_window(object):
         QWidget.setTabOrder(self.btn_markall_main, self.btn_unmarkall_main)
         QWidget.setTabOrder(self.btn_unmarkall_main, self.btn_show_image)
         QWidget.setTabOrder(self.btn_show_image, self.btn_export_image)
-        QWidget.setTabOrder(self.btn_export_image, self.btn_edit)
+        QWidget.setTabOrder(self.btn_export_image, self.btn_export_zip)
+        QWidget.setTabOrder(self.btn_export_zip, self.btn_edit)
         QWidget.setTabOrder(self.btn_edit, self.btn_reset_main)
 
         self.menubar.addAction(self.menuFile.menuAction())
         self.menubar.addAction(self.menuUpload.menuAction())
         self.menubar.addAction(self.menuHelp.menuAction())
         self.menuFile.addAction(self.actionSettings)
+        self.menuFile.addAction(self.actionSync_Card_Mirror)
+        self.menuFile.addAction(self.actionBackup_Database)
+        self.menuFile.addAction(self.actionDatabase_Maintenance)
         self.menuFile.addAction(self.actionExit)
         self.menuUpload.addAction(self.actionSingle_Card_Import)
         self.menuUpload.addAction(self.actionBulk_Card_Import)
+        self.menuUpload.addAction(self.actionMerge_Database)
         self.menuHelp.addAction(self.actionManual)
         self.menuHelp.addAction(self.actionVersionInfo)
 
@@ -140,6 +157,13 @@ class Ui_frm_main_window(object):
         self.actionManual.setText(QCoreApplication.translate("frm_main_window", u"Manual", None))
         self.actionVersionInfo.setText(QCoreApplication.translate("frm_main_window", u"About", None))
         self.actionBulk_Card_Import.setText(QCoreApplication.translate("frm_main_window", u"Bulk Card Import", None))
+        self.actionSync_Card_Mirror.setText(QCoreApplication.translate("frm_main_window", u"Sync Card Mirror", None))
+        self.actionBackup_Database.setText(QCoreApplication.translate("frm_main_window", u"Backup Database Now", None))
+        self.actionDatabase_Maintenance.setText(QCoreApplication.translate("frm_main_window", u"Database Maintenance...", None))
+        self.actionMerge_Database.setText(QCoreApplication.translate("frm_main_window", u"Merge Logbook Database...", None))
+#if QT_CONFIG(tooltip)
+        self.txt_search_field_main.setToolTip(QCoreApplication.translate("frm_main_window", u"Free text or fields: call:DL*  band:20  mode:FT8  date:2024-01..2024-06  cqz:14  country:Germany  grid:JN88  has:image  -country:Italy  (band:20 OR band:40)", None))
+#endif // QT_CONFIG(tooltip)
         self.txt_search_field_main.setPlaceholderText(QCoreApplication.translate("frm_main_window", u"160M ,  JN87kg ,  EA7.. .. .. ,  Greece,  20250902,", None))
         self.lb_searchfield_main.setText(QCoreApplication.translate("frm_main_window", u"Search for . . . ", None))
         self.btn_search_main.setText(QCoreApplication.translate("frm_main_window", u"Search", None))
@@ -147,6 +171,10 @@ class Ui_frm_main_window(object):
         self.btn_markall_main.setText(QCoreApplication.translate("frm_main_window", u"Mark all", None))
         self.btn_unmarkall_main.setText(QCoreApplication.translate("frm_main_window", u"Unmark all", None))
         self.btn_export_image.setText(QCoreApplication.translate("frm_main_window", u"Export", None))
+#if QT_CONFIG(tooltip)
+        self.btn_export_zip.setToolTip(QCoreApplication.translate("frm_main_window", u"Export the selected cards into one ZIP archive", None))
+#endif // QT_CONFIG(tooltip)
+        self.btn_export_zip.setText(QCoreApplication.translate("frm_main_window", u"Export ZIP", None))
         self.btn_show_image.setText(QCoreApplication.translate("frm_main_window", u"Show", None))
         self.lb_preview_image_main.setText("")
         self.btn_edit.setText(QCoreApplication.translate("frm_main_window", u"Edit", None))
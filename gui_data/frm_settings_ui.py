@@ -15,8 +15,8 @@ from PySide6.QtGui import (QBrush, QColor, QConicalGradient, QCursor,
     QFont, QFontDatabase, QGradient, QIcon,
     QImage, QKeySequence, QLinearGradient, QPainter,
     QPalette, QPixmap, QRadialGradient, QTransform)
-from PySide6.QtWidgets import (QApplication, QDialog, QLabel, QLineEdit,
-    QPushButton, QSizePolicy, QWidget)
+from PySide6.QtWidgets import (QApplication, QCheckBox, QDialog, QLabel,
+    QLineEdit, QPushButton, QSizePolicy, QWidget)
 
 class Ui_frm_settings(object):
     def setupUi(self, frm_settings):
@@ -84,6 +84,10 @@ class Ui_frm_settings(object):
         self.btn_import_adif.setObjectName(u"btn_import_adif")
         self.btn_import_adif.setGeometry(QRect(530, 230, 85, 27))
         self.btn_import_adif.setFont(font1)
+        self.chk_bulk_adif = QCheckBox(frm_settings)
+        self.chk_bulk_adif.setObjectName(u"chk_bulk_adif")
+        self.chk_bulk_adif.setGeometry(QRect(40, 268, 415, 25))
+        self.chk_bulk_adif.setFont(font)
 
         self.retranslateUi(frm_settings)
 
@@ -105,5 +109,9 @@ class Ui_frm_settings(object):
         self.lb_adif_list_import.setText(QCoreApplication.translate("frm_settings", u"ADIF List Import", None))
         self.btn_search_adif.setText(QCoreApplication.translate("frm_settings", u"Select", None))
         self.btn_import_adif.setText(QCoreApplication.translate("frm_settings", u"Import", None))
+#if QT_CONFIG(tooltip)
+        self.chk_bulk_adif.setToolTip(QCoreApplication.translate("frm_settings", u"Large initial loads: safety backup first, indexes rebuilt after the load (faster, but a crash during the load needs the backup)", None))
+#endif // QT_CONFIG(tooltip)
+        self.chk_bulk_adif.setText(QCoreApplication.translate("frm_settings", u"Bulk-load mode (large initial import)", None))
     # retranslateUi
 
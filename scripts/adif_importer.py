@@ -1,9 +1,14 @@
 import sqlite3
 import os
 import re
+from contextlib import nullcontext
 
 from typing import List, Dict, Tuple
 
+from .db_schema import migrate
+from .connection_manager import get_manager
+from .bulk_load import bulk_load
+
 # --------------------------------------------------------------------------------
 # CONFIGURATION & STRUCTURE
 # --------------------------------------------------------------------------------
@@ -124,6 +129,7 @@ class AdifImporter:
   def __init__(self, db_filepath: str):
     self.db_filepath = db_filepath
     self.table_name = "eqsl_data"
+    self.last_inserted_rowids: List[int] = []
 
   # 2. NEW FUNCTION FOR FREQUENCY-TO-BAND MAPPING
   def _get_band_from_freq(self, freq_val: float) -> str:
@@ -136,72 +142,15 @@ class AdifImporter:
         return band_name
     return "" # Return an empty string if no band is found
 
-  def _create_schema(self, conn: sqlite3.Connection):
-    """Creates the eqsl_data table if it does not already exist."""
-    cursor = conn.cursor()
-    # HERE IS THE PROTECTION AGAINST DUPLICATES:
-    # Only combinations of CALL, QSO_DATE, and TIME_ON that do not already exist will be inserted.
-    sql_create_table = f"""
-    CREATE TABLE IF NOT EXISTS {self.table_name} (
-      qso_id INTEGER PRIMARY KEY,
-  
-      -- IMPORTANT QSO DATA FOR UNIQUE KEY
-      CALL TEXT NOT NULL,       -- Call sign of the QSO partner
-      QSO_DATE TEXT NOT NULL,   -- Date (YYYYMMDD)
-      TIME_ON TEXT NOT NULL,    -- Start time (HHMMSS)
-  
-      -- GENERAL QSO DATA
-      BAND TEXT,                -- Band (e.g., 20)
-      MODE TEXT,                -- Mode (e.g., FT8)
-      SUBMODE TEXT,             -- Submode (e.g., FT4)
-      FREQ REAL,                -- Frequency (e.g., 14.0764)
-      RST_SENT TEXT,            -- Sent RST
-      RST_RCVD TEXT,            -- Received RST
-      TX_PWR REAL,              -- Transmit Power (e.g., 30.0)
-  
-      -- GEOGRAPHICAL DATA OF THE PARTNER
-      CONT TEXT,                -- Continent
-      COUNTRY TEXT,             -- Land (Name)
-      DXCC INTEGER,             -- DXCC-Nummer
-      PFX TEXT,                 -- Prefix
-      CQZ INTEGER,              -- CQ Zone
-      ITUZ INTEGER,             -- ITU Zone
-      GRIDSQUARE TEXT,          -- Locator (e.g., JO55RM)
-      LAT REAL,                 -- Latitude (N050 51.151)
-      LON REAL,                 -- Longitude (E004 49.287)
-
-      -- PERSONAL DATA OF THE PARTNER
-      NAME TEXT,            -- Name (First and Last)
-      QTH TEXT,             -- Location/City
-      ADDRESS TEXT,         -- Complete Address
-      EMAIL TEXT,
-      AGE INTEGER,
-  
-      -- eQSL-STATUS
-      EQSL_QSL_SENT TEXT,
-      EQSL_QSLS_DATE TEXT,      -- Sent Date (YYYYMMDD)
-      EQSL_QSL_RCVD TEXT,
-      EQSL_QSLR_DATE TEXT,      -- Received Date (YYYYMMDD)
-      EQSL_IMAGE_BLOB BLOB,     -- eQSL Image as BLOB  
-
-      
-      -- DX-INDEXES (If desired, e.g., SOTA/POTA/IOTA)
-      SOTA_REF TEXT,      -- Although not explicitly in the file, retained if needed
-      POTA_REF TEXT,      -- Ditto
-      IOTA_REF TEXT,      -- Dito
-  
-      -- UNIQUE constraint for duplicate detection (important!)
-      UNIQUE(CALL, QSO_DATE, TIME_ON) 
-    );
+  def import_adif_file(self, adif_filepath: str, bulk: bool = False) -> int:
+    """
+    Performs the import process.
+    Returns the number of new records; their ROWIDs are kept in last_inserted_rowids.
+    bulk=True: bulk-load mode for large initial loads (safety backup, indexes
+    rebuilt after the insert, synchronous=OFF, see bulk_load).
     """
-    cursor.execute(sql_create_table)
-    conn.commit()
-    print(f"[INFO] database schema ({self.table_name}) checked and created.")
-
-
-  def import_adif_file(self, adif_filepath: str) -> int:
-    """Performs the import process."""
     conn = None 
+    self.last_inserted_rowids = []
     
     try:
       # 1. ADIF-Datei parsen
@@ -214,12 +163,13 @@ class AdifImporter:
       print(f"[INFO] Found {len(qso_records)} potential QSOs.")
 
       # 2. Connect to the database
-      conn = sqlite3.connect(self.db_filepath)
+      manager = get_manager(self.db_filepath)
+      conn = manager.acquire_writer()
       cursor = conn.cursor()
       cursor.execute("PRAGMA foreign_keys = ON;")
       
-      # 2b. Check/create schema
-      self._create_schema(conn)
+      # 2b. Create/upgrade the schema (no-op if the database is current)
+      migrate(conn, self.table_name)
 
       # 3. DATA INSERTION AND PREPARATION (including frequency/band logic)
       data_for_insert = []
@@ -273,9 +223,15 @@ class AdifImporter:
       VALUES ({placeholders})
       """
       
-      cursor.executemany(sql_insert, data_for_insert)
-      
-      inserted_count = cursor.rowcount
+      # In bulk mode the whole block is one transaction that bulk_load commits
+      with bulk_load(conn, self.db_filepath, self.table_name) if bulk else nullcontext():
+        # New rows get ROWIDs above the current maximum (this is the only writer during the import)
+        max_rowid = cursor.execute(f"SELECT COALESCE(MAX(qso_id), 0) FROM {self.table_name}").fetchone()[0]
+        cursor.executemany(sql_insert, data_for_insert)
+        
+        inserted_count = cursor.rowcount
+        self.last_inserted_rowids = [row[0] for row in cursor.execute(
+          f"SELECT qso_id FROM {self.table_name} WHERE qso_id > ? ORDER BY qso_id", (max_rowid,))]
       conn.commit() 
       
       print(f"\n[SUCCESS] ADIF import completed. {inserted_count} NEW records inserted.")
@@ -299,7 +255,7 @@ class AdifImporter:
       return 0
     finally:
       if conn:
-        conn.close()
+        manager.release_writer()
 
 
 def main():
@@ -0,0 +1,76 @@
+import os
+import sqlite3
+from typing import BinaryIO, Iterator
+
+# Chunk size for all incremental BLOB reads and writes.
+# Per card only one chunk is held in memory, independent of the image size.
+BLOB_CHUNK_SIZE = 256 * 1024
+
+IMAGE_COLUMN = "EQSL_IMAGE_BLOB"
+
+
+def write_file_to_blob(conn: sqlite3.Connection, table_name: str, rowid: int, file_path: str,
+                       column: str = IMAGE_COLUMN, chunk_size: int = BLOB_CHUNK_SIZE) -> int:
+    """
+    Stores a file in the BLOB column of a row without reading it completely into memory:
+    the column is first set to zeroblob(n), then the file is written in chunks via blobopen.
+    Does not commit. Returns the number of bytes written.
+    """
+    file_size = os.path.getsize(file_path)
+    cursor = conn.execute(f"UPDATE {table_name} SET {column} = zeroblob(?) WHERE ROWID = ?", (file_size, rowid))
+    if cursor.rowcount != 1:
+        raise sqlite3.OperationalError(f"ROWID {rowid} not found in {table_name}")
+
+    if file_size == 0:
+        return 0
+
+    bytes_written = 0
+    with open(file_path, 'rb') as f, conn.blobopen(table_name, column, rowid) as blob:
+        while chunk := f.read(chunk_size):
+            # The file may have grown since getsize(), a BLOB cannot grow
+            chunk = chunk[:file_size - bytes_written]
+            if not chunk:
+                break
+            blob.write(chunk)
+            bytes_written += len(chunk)
+    return bytes_written
+
+
+def open_image_blob(conn: sqlite3.Connection, table_name: str, rowid: int,
+                    column: str = IMAGE_COLUMN, schema: str = "main"):
+    """
+    Opens a read-only BLOB handle for the image of a row.
+    Returns None if the row does not exist or has no image (NULL).
+    """
+    try:
+        return conn.blobopen(table_name, column, rowid, readonly=True, name=schema)
+    except sqlite3.OperationalError:
+        return None
+
+
+def iter_blob_chunks(blob, chunk_size: int = BLOB_CHUNK_SIZE) -> Iterator[bytes]:
+    """Yields the remaining content of an open BLOB handle in chunks."""
+    while chunk := blob.read(chunk_size):
+        yield chunk
+
+
+def copy_blob_to_stream(blob, stream: BinaryIO, chunk_size: int = BLOB_CHUNK_SIZE, digest=None) -> int:
+    """
+    Copies the remaining content of an open BLOB handle to a writable stream. Returns bytes copied.
+    An optional hashlib object ('digest') is updated with the same chunks.
+    """
+    bytes_copied = 0
+    for chunk in iter_blob_chunks(blob, chunk_size):
+        stream.write(chunk)
+        if digest is not None:
+            digest.update(chunk)
+        bytes_copied += len(chunk)
+    return bytes_copied
+
+
+def read_blob_header(blob, size: int = 16) -> bytes:
+    """Reads the first bytes of a BLOB (e.g. for format sniffing) and rewinds the handle."""
+    blob.seek(0)
+    header = blob.read(size)
+    blob.seek(0)
+    return header
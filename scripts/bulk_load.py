@@ -0,0 +1,126 @@
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+
+from .fulltext_index import FTS_TABLE, FTS_COLUMNS, has_fulltext_index
+
+# Insert trigger of the full-text index (see fulltext_index.ensure_fulltext_index).
+# Only this one is dropped: the update and delete triggers stay, so edits made
+# during a bulk load are still indexed.
+FTS_INSERT_TRIGGER = f"{FTS_TABLE}_ai"
+
+
+def backup_path_for(db_filepath: str) -> str:
+    """Safety copy written before a bulk load (next to the database, overwritten each time)."""
+    root, ext = os.path.splitext(db_filepath)
+    return f"{root}.before_bulk_load{ext or '.db'}"
+
+
+def _write_safety_backup(conn: sqlite3.Connection, db_filepath: str):
+    """Checkpoints the WAL into the database file and copies the database (online backup API)."""
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+    backup_path = backup_path_for(db_filepath)
+    start_time = time.perf_counter()
+    target = sqlite3.connect(backup_path)
+    try:
+        conn.backup(target)
+    finally:
+        target.close()
+    print(f"[INFO] Bulk load: safety backup written to {backup_path} "
+          f"({time.perf_counter() - start_time:.2f} s).")
+
+
+def _secondary_objects(conn: sqlite3.Connection, table_name: str) -> list[tuple[str, str, str]]:
+    """(type, name, sql) of the indexes and the FTS insert trigger that are rebuilt after the load."""
+    # Automatic indexes (UNIQUE constraint, sql IS NULL) cannot be dropped and are
+    # needed anyway: INSERT OR IGNORE detects duplicates with them
+    return conn.execute(
+        "SELECT type, name, sql FROM sqlite_master "
+        "WHERE tbl_name = ? AND sql IS NOT NULL "
+        "AND (type = 'index' OR (type = 'trigger' AND name = ?)) "
+        "ORDER BY type, name",
+        (table_name, FTS_INSERT_TRIGGER)).fetchall()
+
+
+def _index_new_rows(conn: sqlite3.Connection, table_name: str, max_rowid: int) -> int:
+    """Adds the rows inserted during the load (qso_id > max_rowid) to the full-text index in one statement."""
+    columns = ', '.join(FTS_COLUMNS)
+    cursor = conn.execute(f"INSERT INTO {FTS_TABLE}(rowid, {columns}) "
+                          f"SELECT qso_id, {columns} FROM {table_name} WHERE qso_id > ?", (max_rowid,))
+    return cursor.rowcount
+
+
+@contextmanager
+def bulk_load(conn: sqlite3.Connection, db_filepath: str, table_name: str = "eqsl_data",
+              rebuild_indexes: bool = True, backup: bool = True):
+    """
+    Bulk-load mode for large initial imports on the writer connection:
+    durability is relaxed (synchronous=OFF) for the duration of the block,
+    ANALYZE runs afterwards. The database is not locked exclusively: the GUI
+    and the pooled readers keep their connections (WAL readers see the state
+    before the load until it commits), other writers of the program wait for
+    the writer connection of the ConnectionManager.
+    Before it starts the WAL is checkpointed and, with backup=True, the
+    database is copied to backup_path_for(db_filepath), because a power loss
+    during synchronous=OFF can corrupt the file.
+
+    rebuild_indexes=True (new rows): the block runs in ONE transaction in which
+    the secondary indexes and the FTS insert trigger are dropped first and
+    rebuilt at the end (one sort per index instead of a B-tree insert per row,
+    new rows added to the full-text index with one INSERT ... SELECT). The
+    block must not commit; an exception rolls everything back, including the
+    dropped indexes. Rows must get new ROWIDs (no explicit qso_id).
+
+    rebuild_indexes=False (e.g. image updates, which do not touch any index):
+    only the PRAGMAs are changed, the block commits itself (in batches).
+    """
+    if conn.in_transaction:
+        conn.commit()
+    if backup:
+        _write_safety_backup(conn, db_filepath)
+    else:
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+
+    synchronous = conn.execute("PRAGMA synchronous").fetchone()[0]
+    conn.execute("PRAGMA synchronous = OFF")
+    start_time = time.perf_counter()
+    try:
+        if not rebuild_indexes:
+            yield conn
+        else:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                max_rowid = conn.execute(f"SELECT COALESCE(MAX(qso_id), 0) FROM {table_name}").fetchone()[0]
+                objects = _secondary_objects(conn, table_name)
+                for object_type, name, _sql in objects:
+                    conn.execute(f"DROP {object_type.upper()} {name}")
+
+                yield conn
+                load_seconds = time.perf_counter() - start_time
+
+                for object_type, _name, sql in objects:
+                    if object_type == 'index':
+                        conn.execute(sql)
+                if has_fulltext_index(conn):
+                    _index_new_rows(conn, table_name, max_rowid)
+                for object_type, _name, sql in objects:
+                    if object_type == 'trigger':
+                        conn.execute(sql)
+                conn.commit()
+                print(f"[INFO] Bulk load: rows loaded in {load_seconds:.2f} s, "
+                      f"{len(objects)} indexes/triggers rebuilt in "
+                      f"{time.perf_counter() - start_time - load_seconds:.2f} s.")
+            except BaseException:
+                # Restores the dropped indexes and triggers as well
+                conn.rollback()
+                raise
+
+        analyze_start = time.perf_counter()
+        conn.execute("ANALYZE")
+        conn.commit()
+        print(f"[INFO] Bulk load: ANALYZE in {time.perf_counter() - analyze_start:.2f} s.")
+    finally:
+        if conn.in_transaction:
+            conn.rollback()
+        conn.execute(f"PRAGMA synchronous = {int(synchronous)}")
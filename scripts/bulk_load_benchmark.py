@@ -0,0 +1,114 @@
+"""
+Compares the normal and the bulk-load mode of the ADIF and the card import
+on synthetic data (temporary databases, nothing of the real data is touched).
+
+    python -m scripts.bulk_load_benchmark [QSOS] [CARDS] [CARD_KB]
+
+Defaults: 50000 QSOs, 2000 cards of 40 KB each.
+"""
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+
+from .adif_importer import AdifImporter
+from .qsl_image_importer import QslImageImporter
+from .connection_manager import close_all
+from .db_schema import migrate_database
+
+BANDS = [("20M", 14.074), ("40M", 7.074), ("80M", 3.573), ("15M", 21.074), ("10M", 28.074)]
+MODES = ["FT8", "SSB", "CW", "FT4", "RTTY"]
+COUNTRIES = ["Austria", "Germany", "Italy", "United States", "Japan", "Brazil", "New Zealand"]
+
+
+def _adif_field(tag: str, value) -> str:
+    value = str(value)
+    return f"<{tag}:{len(value)}>{value} "
+
+
+def _make_qsos(count: int) -> list[dict]:
+    rng = random.Random(42)
+    qsos = []
+    for index in range(count):
+        band, freq = rng.choice(BANDS)
+        qsos.append({
+            'CALL': f"{rng.choice('DFGIKNW')}{rng.randint(1, 9)}{index:06d}",
+            'QSO_DATE': f"{rng.randint(1990, 2025)}{rng.randint(1, 12):02d}{rng.randint(1, 28):02d}",
+            'TIME_ON': f"{rng.randint(0, 23):02d}{rng.randint(0, 59):02d}{rng.randint(0, 59):02d}",
+            'BAND': band,
+            'FREQ': freq,
+            'MODE': rng.choice(MODES),
+            'COUNTRY': rng.choice(COUNTRIES),
+            'CQZ': rng.randint(1, 40),
+            'RST_SENT': "-10",
+            'RST_RCVD': "-12",
+        })
+    return qsos
+
+
+def _write_adif(path: str, qsos: list[dict]):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(_adif_field("ADIF_VER", "3.1.4") + "<EOH>\n")
+        for qso in qsos:
+            f.write(''.join(_adif_field(tag, value) for tag, value in qso.items()) + "<EOR>\n")
+
+
+def _write_cards(directory: str, qsos: list[dict], card_bytes: int):
+    """Card files named like the eQSL downloads (see QslImageImporter.FILENAME_PATTERN)."""
+    payload = os.urandom(card_bytes)
+    for qso in qsos:
+        date = qso['QSO_DATE']
+        time_on = qso['TIME_ON']
+        filename = (f"Callsign={qso['CALL']}_VisitorCallsign=OE4VMB_"
+                    f"QSODate={date[:4]}-{date[4:6]}-{date[6:]}_"
+                    f"{time_on[:2]}_{time_on[2:4]}_{time_on[4:]}_0_"
+                    f"Band={qso['BAND']}_Mode={qso['MODE']}.jpg")
+        with open(os.path.join(directory, filename), 'wb') as f:
+            f.write(payload)
+
+
+def _timed(function, *args, **kwargs):
+    """Runs the importer without its console output, returns (result, seconds)."""
+    start_time = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = function(*args, **kwargs)
+    return result, time.perf_counter() - start_time
+
+
+def run_benchmark(qso_count: int = 50000, card_count: int = 2000, card_kb: int = 40) -> list[tuple]:
+    """Returns (mode, adif seconds, QSOs inserted, card seconds, cards imported) per mode."""
+    rows = []
+    with tempfile.TemporaryDirectory(prefix="eqsl_bulk_benchmark_") as work_dir:
+        qsos = _make_qsos(qso_count)
+        adif_path = os.path.join(work_dir, "log.adi")
+        _write_adif(adif_path, qsos)
+        card_dir = os.path.join(work_dir, "cards")
+        os.makedirs(card_dir)
+        _write_cards(card_dir, qsos[:card_count], card_kb * 1024)
+
+        for mode, bulk in (("normal", False), ("bulk", True)):
+            db_path = os.path.join(work_dir, f"{mode}.db")
+            _timed(migrate_database, db_path)
+            inserted, adif_seconds = _timed(AdifImporter(db_path).import_adif_file, adif_path, bulk=bulk)
+            results, card_seconds = _timed(QslImageImporter(db_path).bulk_import_images, card_dir, bulk=bulk)
+            rows.append((mode, adif_seconds, inserted, card_seconds, results['imported']))
+        close_all()
+    return rows
+
+
+def main():
+    args = [int(arg) for arg in sys.argv[1:4]]
+    qso_count, card_count, card_kb = args + [50000, 2000, 40][len(args):]
+    print(f"--- Bulk load benchmark: {qso_count} QSOs, {card_count} cards of {card_kb} KB ---")
+    print(f"{'Mode':<8}{'ADIF [s]':>10}{'QSOs/s':>10}{'Cards [s]':>11}{'Cards/s':>10}")
+    for mode, adif_seconds, inserted, card_seconds, imported in run_benchmark(qso_count, card_count, card_kb):
+        print(f"{mode:<8}{adif_seconds:>10.2f}{inserted / max(adif_seconds, 1e-9):>10.0f}"
+              f"{card_seconds:>11.2f}{imported / max(card_seconds, 1e-9):>10.0f}")
+    print("(bulk includes the safety backup, index rebuild and ANALYZE)")
+
+
+if __name__ == "__main__":
+    main()
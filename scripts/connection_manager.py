@@ -0,0 +1,207 @@
+import os
+import re
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+# PRAGMA profile of all connections ("sqlite_profile" in settings.json overrides
+# single values). WAL lets the browsing view read while an import writes,
+# busy_timeout waits for a lock instead of failing with "database is locked".
+DEFAULT_PROFILE = {
+    'auto_vacuum': 'INCREMENTAL',   # new databases only, existing ones with the next VACUUM
+    'journal_mode': 'WAL',
+    'busy_timeout': 5000,           # ms
+    'synchronous': 'NORMAL',        # safe with WAL, no fsync per commit
+    'cache_size': -65536,           # negative = KiB (64 MB page cache per connection)
+    'mmap_size': 268435456,         # 256 MB memory mapped reads
+    'temp_store': 'MEMORY',         # temp B-trees of ORDER BY/GROUP BY in RAM
+}
+
+# journal_mode and auto_vacuum are properties of the database file, only the writer sets them
+_WRITER_ONLY_PRAGMAS = {'auto_vacuum', 'journal_mode'}
+
+# Idle read connections kept per database
+MAX_IDLE_READERS = 4
+
+# Background tasks waiting for the writer check their cancel event this often (s)
+WRITER_WAIT_INTERVAL = 0.2
+
+_PRAGMA_VALUE_RE = re.compile(r'-?\w+')
+
+_profile = dict(DEFAULT_PROFILE)
+_managers: dict[str, "ConnectionManager"] = {}
+_managers_lock = threading.Lock()
+
+
+def configure(profile: dict | None):
+    """Sets the PRAGMA profile (from the settings) for all connections opened afterwards."""
+    global _profile
+    merged = dict(DEFAULT_PROFILE)
+    for name, value in (profile or {}).items():
+        if name not in DEFAULT_PROFILE:
+            print(f"ConnectionManager: Unknown PRAGMA '{name}' in the profile ignored.")
+        elif not _PRAGMA_VALUE_RE.fullmatch(str(value)):
+            print(f"ConnectionManager: Invalid value '{value}' for PRAGMA {name} ignored.")
+        elif name == 'busy_timeout' and not str(value).lstrip('-').isdigit():
+            print(f"ConnectionManager: busy_timeout must be a number of ms, '{value}' ignored.")
+        else:
+            merged[name] = value
+    _profile = merged
+
+
+def pragma_statements(writer: bool = True) -> list[str]:
+    """PRAGMA statements of the profile (also used for the Qt connection of the GUI)."""
+    return [f"PRAGMA {name} = {value}" for name, value in _profile.items()
+            if writer or name not in _WRITER_ONLY_PRAGMAS]
+
+
+def get_manager(db_filepath: str) -> "ConnectionManager":
+    """The shared ConnectionManager of a database file."""
+    key = os.path.abspath(db_filepath)
+    with _managers_lock:
+        manager = _managers.get(key)
+        if manager is None or manager.closed:
+            manager = _managers[key] = ConnectionManager(key)
+        return manager
+
+
+def close_manager(db_filepath: str):
+    """Closes the connections of one database (e.g. after switching to another one)."""
+    with _managers_lock:
+        manager = _managers.pop(os.path.abspath(db_filepath), None)
+    if manager is not None:
+        manager.close()
+
+
+def close_all():
+    with _managers_lock:
+        managers = list(_managers.values())
+        _managers.clear()
+    for manager in managers:
+        manager.close()
+
+
+class WriterBusy(sqlite3.OperationalError):
+    """The writer connection is in use by another task of this program (see acquire_writer)."""
+
+
+class ConnectionManager:
+    """
+    Connections of one database: a pool of read-only connections and one
+    writer connection that is handed out to one caller at a time (lock).
+    All connections get the PRAGMA profile and keep their page cache between
+    uses. Connections may be passed between threads, but are only used by
+    one thread at a time (acquire/release).
+    """
+
+    def __init__(self, db_filepath: str):
+        self.db_filepath = db_filepath
+        self.closed = False
+        self._lock = threading.Lock()
+        self._idle_readers: list[sqlite3.Connection] = []
+        self._writer: sqlite3.Connection | None = None
+        self._writer_lock = threading.Lock()
+
+    def _apply_profile(self, conn: sqlite3.Connection, writer: bool):
+        for statement in pragma_statements(writer):
+            conn.execute(statement).fetchall()
+
+    # ------------------------------------------------------------------
+    # Readers
+    # ------------------------------------------------------------------
+
+    def acquire_reader(self) -> sqlite3.Connection:
+        """A read-only connection from the pool (give it back with release_reader)."""
+        with self._lock:
+            if self._idle_readers:
+                return self._idle_readers.pop()
+        uri = Path(self.db_filepath).resolve().as_uri() + "?mode=ro"
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        self._apply_profile(conn, writer=False)
+        return conn
+
+    def release_reader(self, conn: sqlite3.Connection):
+        if conn.in_transaction:
+            conn.rollback()
+        with self._lock:
+            if not self.closed and len(self._idle_readers) < MAX_IDLE_READERS:
+                self._idle_readers.append(conn)
+                return
+        conn.close()
+
+    @contextmanager
+    def reader(self):
+        conn = self.acquire_reader()
+        try:
+            yield conn
+        finally:
+            self.release_reader(conn)
+
+    # ------------------------------------------------------------------
+    # Writer
+    # ------------------------------------------------------------------
+
+    def acquire_writer(self, cancel_event: threading.Event | None = None) -> sqlite3.Connection:
+        """
+        The writer connection, exclusively until release_writer(). Waits up to
+        busy_timeout for another writer of this program, then raises
+        WriterBusy. Background tasks pass their cancel event instead: they
+        wait as long as the other writer needs and get WriterBusy only if
+        they are cancelled while waiting.
+        """
+        if cancel_event is not None:
+            while not self._writer_lock.acquire(timeout=WRITER_WAIT_INTERVAL):
+                if cancel_event.is_set():
+                    raise WriterBusy("database is busy (cancelled while waiting for another task)")
+        else:
+            try:
+                timeout = max(int(_profile['busy_timeout']) / 1000.0, 0.0)
+            except ValueError:
+                timeout = DEFAULT_PROFILE['busy_timeout'] / 1000.0
+            if not self._writer_lock.acquire(timeout=timeout):
+                raise WriterBusy("database is busy (another import or maintenance task is running)")
+        try:
+            if self._writer is None:
+                self._writer = sqlite3.connect(self.db_filepath, check_same_thread=False)
+                self._apply_profile(self._writer, writer=True)
+            return self._writer
+        except sqlite3.Error:
+            self._writer_lock.release()
+            raise
+
+    def release_writer(self):
+        """Returns the writer; an open transaction is rolled back (commit before releasing)."""
+        try:
+            if self._writer is not None and self._writer.in_transaction:
+                self._writer.rollback()
+            if self.closed and self._writer is not None:
+                self._writer.close()
+                self._writer = None
+        finally:
+            self._writer_lock.release()
+
+    @contextmanager
+    def writer(self, cancel_event: threading.Event | None = None):
+        """Writer connection; commits when the block ends without an exception."""
+        conn = self.acquire_writer(cancel_event)
+        try:
+            yield conn
+            conn.commit()
+        finally:
+            self.release_writer()
+
+    def close(self):
+        """Closes the idle connections; connections in use are closed when they are released."""
+        with self._lock:
+            self.closed = True
+            readers, self._idle_readers = self._idle_readers, []
+        for conn in readers:
+            conn.close()
+        if self._writer_lock.acquire(blocking=False):
+            try:
+                if self._writer is not None:
+                    self._writer.close()
+                    self._writer = None
+            finally:
+                self._writer_lock.release()
@@ -0,0 +1,287 @@
+import os
+import re
+import gzip
+import lzma
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from PySide6.QtCore import QObject, QThread, QTimer, Signal, Slot
+
+from .connection_manager import get_manager
+
+# Compression of the backup file: name -> (file extension, open function)
+COMPRESSIONS = {
+    'none': ("", None),
+    'gzip': (".gz", gzip.open),
+    'lzma': (".xz", lzma.open),
+}
+
+# Defaults of the "backup_*" settings
+DEFAULT_STEP_PAGES = 1024           # pages copied per backup step (4 MB with 4 KB pages)
+DEFAULT_KEEP = 7                    # backups kept per database, older ones are deleted
+DEFAULT_COMPRESSION = 'gzip'
+
+# Subfolder next to the database if no backup directory is set
+BACKUP_SUBDIR = "backups"
+
+# Pause between two backup steps (s), gives the importers room to write
+STEP_SLEEP = 0.05
+
+# Chunk size of the compression (bytes)
+COMPRESS_CHUNK_SIZE = 1024 * 1024
+
+# How often the scheduler checks whether a backup is due, first check after the start (ms)
+SCHEDULE_CHECK_MS = 10 * 60 * 1000
+SCHEDULE_START_DELAY_MS = 60 * 1000
+
+_TIMESTAMP_FORMAT = "%Y%m%d_%H%M%S"
+
+
+class BackupCancelled(Exception):
+    pass
+
+
+def backup_directory(db_filepath: str, configured_dir: str = "") -> str:
+    """Directory of the backups: the configured one or a 'backups' folder next to the database."""
+    if configured_dir:
+        return configured_dir
+    return os.path.join(os.path.dirname(os.path.abspath(db_filepath)), BACKUP_SUBDIR)
+
+
+def _backup_name_re(db_filepath: str) -> re.Pattern:
+    stem = os.path.splitext(os.path.basename(db_filepath))[0]
+    return re.compile(re.escape(stem) + r"_(\d{8}_\d{6})\.db(\.gz|\.xz)?$")
+
+
+def list_backups(db_filepath: str, directory: str) -> list[tuple[datetime, str]]:
+    """(time, path) of the backups of this database in 'directory', newest first."""
+    if not os.path.isdir(directory):
+        return []
+    name_re = _backup_name_re(db_filepath)
+    backups = []
+    for entry in os.scandir(directory):
+        match = name_re.match(entry.name)
+        if match and entry.is_file():
+            backups.append((datetime.strptime(match.group(1), _TIMESTAMP_FORMAT), entry.path))
+    return sorted(backups, reverse=True)
+
+
+def rotate_backups(db_filepath: str, directory: str, keep: int) -> list[str]:
+    """Deletes all but the 'keep' newest backups; only files named like our backups are touched."""
+    removed = []
+    for _created, path in list_backups(db_filepath, directory)[max(keep, 1):]:
+        try:
+            os.remove(path)
+            removed.append(path)
+        except OSError as e:
+            print(f"BackupWorker: Could not remove old backup {path}: {e}")
+    return removed
+
+
+class BackupWorker(QObject):
+    """
+    Online backup of the database with the SQLite backup API while the program
+    keeps running. The pages are copied in steps of 'step_pages' from ONE read
+    transaction: in WAL mode the importers keep writing, the backup stays a
+    consistent snapshot and never restarts (the WAL cannot be checkpointed
+    past the snapshot until the backup is done). The copy is then optionally
+    compressed (gzip/lzma) and older backups are rotated out.
+    """
+
+    progress = Signal(int, int)     # pages copied / KB compressed, total
+    status = Signal(str)            # current phase (for the progress dialog)
+    finished = Signal(dict)         # backup report
+
+    def __init__(self, db_filepath: str, target_dir: str = "", compression: str = DEFAULT_COMPRESSION,
+                 keep: int = DEFAULT_KEEP, step_pages: int = DEFAULT_STEP_PAGES):
+        super().__init__()
+        self.db_filepath = db_filepath
+        self.target_dir = backup_directory(db_filepath, target_dir)
+        if compression not in COMPRESSIONS:
+            print(f"BackupWorker: Unknown compression '{compression}', using '{DEFAULT_COMPRESSION}'.")
+            compression = DEFAULT_COMPRESSION
+        self.compression = compression
+        self.keep = keep
+        self.step_pages = max(int(step_pages), 1)
+        self._cancel_event = threading.Event()
+
+    def cancel(self):
+        """Requests cancellation; may be called from any thread."""
+        self._cancel_event.set()
+
+    def _on_step(self, status: int, remaining: int, total: int):
+        """Progress callback of Connection.backup(); raising aborts the backup."""
+        self.progress.emit(total - remaining, total)
+        if self._cancel_event.is_set():
+            raise BackupCancelled()
+
+    def _copy_pages(self, temp_path: str):
+        manager = get_manager(self.db_filepath)
+        source = manager.acquire_reader()
+        target = sqlite3.connect(temp_path)
+        try:
+            # Snapshot for all steps (otherwise every write of an import restarts the backup)
+            source.execute("BEGIN")
+            source.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+            source.backup(target, pages=self.step_pages, progress=self._on_step, sleep=STEP_SLEEP)
+        finally:
+            target.close()
+            manager.release_reader(source)
+
+    def _compress(self, temp_path: str, final_path: str):
+        _extension, open_function = COMPRESSIONS[self.compression]
+        total = os.path.getsize(temp_path)
+        done = 0
+        with open(temp_path, 'rb') as source, open_function(final_path, 'wb') as target:
+            while True:
+                chunk = source.read(COMPRESS_CHUNK_SIZE)
+                if not chunk:
+                    break
+                target.write(chunk)
+                done += len(chunk)
+                # Progress of this phase in KB (fits the int signal for multi-GB files)
+                self.progress.emit(done // 1024, total // 1024)
+                if self._cancel_event.is_set():
+                    raise BackupCancelled()
+
+    @Slot()
+    def run(self):
+        results = {
+            'path': '',
+            'database_bytes': 0,
+            'backup_bytes': 0,
+            'removed': [],
+            'elapsed': 0.0,
+            'cancelled': False,
+            'destination': self.target_dir,
+            'error': ''
+        }
+        start_time = time.perf_counter()
+        stem = os.path.splitext(os.path.basename(self.db_filepath))[0]
+        extension = COMPRESSIONS[self.compression][0]
+        base_path = os.path.join(self.target_dir, f"{stem}_{datetime.now().strftime(_TIMESTAMP_FORMAT)}.db")
+        final_path = base_path + extension
+        temp_path = base_path + ".part"
+        compressed_temp_path = None
+
+        try:
+            os.makedirs(self.target_dir, exist_ok=True)
+            self._copy_pages(temp_path)
+            results['database_bytes'] = os.path.getsize(temp_path)
+
+            if extension:
+                self.status.emit(f"Compressing backup ({self.compression})...")
+                compressed_temp_path = final_path + ".part"
+                self._compress(temp_path, compressed_temp_path)
+                os.remove(temp_path)
+                temp_path = compressed_temp_path
+
+            # Only complete backups get the final name (and count for the rotation)
+            os.replace(temp_path, final_path)
+            results['path'] = final_path
+            results['backup_bytes'] = os.path.getsize(final_path)
+            results['removed'] = rotate_backups(self.db_filepath, self.target_dir, self.keep)
+
+        except BackupCancelled:
+            results['cancelled'] = True
+        except (sqlite3.Error, OSError, lzma.LZMAError) as e:
+            print(f"BackupWorker: Backup failed: {e}")
+            results['error'] = str(e)
+        finally:
+            for path in (temp_path, compressed_temp_path):
+                if path and os.path.exists(path):
+                    try:
+                        os.remove(path)
+                    except OSError as e:
+                        print(f"BackupWorker: Could not remove {path}: {e}")
+            results['elapsed'] = time.perf_counter() - start_time
+            self.finished.emit(results)
+
+
+class BackupScheduler(QObject):
+    """
+    Scheduled backups: every SCHEDULE_CHECK_MS it checks whether the newest
+    backup is older than 'interval_hours' and then runs a BackupWorker in its
+    own thread. interval_hours = 0 disables the schedule.
+    """
+
+    finished = Signal(dict)
+
+    def __init__(self, db_filepath: str, settings: dict, parent=None):
+        super().__init__(parent)
+        self.db_filepath = db_filepath
+        self.settings = settings
+        self.thread: QThread | None = None
+        self.worker: BackupWorker | None = None
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.check_due)
+        self.timer.start(SCHEDULE_CHECK_MS)
+        QTimer.singleShot(SCHEDULE_START_DELAY_MS, self.check_due)
+
+    @property
+    def interval_hours(self) -> float:
+        try:
+            return max(float(self.settings.get("backup_interval_hours", 0)), 0.0)
+        except (TypeError, ValueError):
+            return 0.0
+
+    def create_worker(self) -> BackupWorker:
+        """BackupWorker with the backup settings (also used for the manual backup)."""
+        return BackupWorker(
+            self.db_filepath,
+            self.settings.get("backup_directory", ""),
+            self.settings.get("backup_compression", DEFAULT_COMPRESSION),
+            self.settings.get("backup_keep", DEFAULT_KEEP),
+            self.settings.get("backup_step_pages", DEFAULT_STEP_PAGES),
+        )
+
+    def set_database(self, db_filepath: str):
+        self.cancel()
+        self.db_filepath = db_filepath
+
+    def is_due(self) -> bool:
+        if not self.interval_hours or not self.db_filepath or not os.path.exists(self.db_filepath):
+            return False
+        directory = backup_directory(self.db_filepath, self.settings.get("backup_directory", ""))
+        backups = list_backups(self.db_filepath, directory)
+        if not backups:
+            return True
+        age_hours = (datetime.now() - backups[0][0]).total_seconds() / 3600
+        return age_hours >= self.interval_hours
+
+    @Slot()
+    def check_due(self):
+        if self.thread is not None or not self.is_due():
+            return
+        self.worker = self.create_worker()
+        self.thread = QThread(self)
+        self.worker.moveToThread(self.thread)
+        self.worker.finished.connect(self._on_finished)
+        self.thread.started.connect(self.worker.run)
+        self.thread.start()
+
+    def cancel(self):
+        if self.worker is not None:
+            self.worker.cancel()
+
+    def shutdown(self):
+        self.timer.stop()
+        self.cancel()
+        if self.thread is not None:
+            self.thread.quit()
+            self.thread.wait()
+
+    @Slot(dict)
+    def _on_finished(self, results: dict):
+        self.thread.quit()
+        self.thread.wait()
+        self.worker.deleteLater()
+        self.thread.deleteLater()
+        self.worker = None
+        self.thread = None
+        if results['path']:
+            print(f"[INFO] Scheduled backup written: {results['path']} ({results['elapsed']:.1f} s).")
+        self.finished.emit(results)
@@ -0,0 +1,208 @@
+import os
+import sqlite3
+from pathlib import Path
+
+from .connection_manager import get_manager
+
+# TEMP view over all databases of a set (exists per connection, see Federation.attach)
+FEDERATED_VIEW = "eqsl_federated"
+
+# Extra columns of the view: label of the source database (shown in the table)
+# and its position in the set (0 = the open database)
+SOURCE_COLUMN = "SOURCE_DB"
+SOURCE_NO_COLUMN = "SOURCE_NO"
+
+MAIN_SCHEMA = "main"
+
+# Rows are identified across the set by source number * ID_STRIDE + qso_id
+ID_STRIDE = 1 << 40
+
+# Federated id of a row of the view, and "federated id in a JSON list" as a
+# condition on the view. In every arm SOURCE_NO is a constant, so the list is
+# reduced to the qso_ids of that source and looked up by primary key.
+ID_SQL = f"{SOURCE_NO_COLUMN} * {ID_STRIDE} + qso_id"
+ID_LIST_CONDITION = (f"qso_id IN (SELECT value % {ID_STRIDE} FROM json_each(?) "
+                     f"WHERE value / {ID_STRIDE} = {SOURCE_NO_COLUMN})")
+
+# SQLite's default limit of attached databases (SQLITE_MAX_ATTACHED)
+MAX_ATTACHED = 10
+
+
+def federated_id(source_no: int, qso_id: int) -> int:
+    return source_no * ID_STRIDE + qso_id
+
+
+def split_id(row_id: int) -> tuple[int, int]:
+    """(source number, qso_id) of a federated id."""
+    return divmod(int(row_id), ID_STRIDE)
+
+
+def _sql_text(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+class Federation:
+    """
+    A set of databases that is queried as one: the open database (source 0,
+    schema 'main') plus up to MAX_ATTACHED archives or station logbooks,
+    ATTACHed as src1, src2, ...
+    FEDERATED_VIEW is a UNION ALL of their tables plus SOURCE_DB/SOURCE_NO.
+    SQLite pushes the WHERE of a query on the view into every arm and merges
+    ORDER BY ... LIMIT from the arms, so each source keeps using its own
+    indexes (partial HAS_IMAGE indexes, sort indexes, primary key lookups).
+    Without attached databases there is no view: view_name is the table and
+    the ids are the plain qso_ids, so the single-database path is unchanged.
+    """
+
+    def __init__(self, db_filepath: str, source_paths: list[str] | None = None, table_name: str = "eqsl_data"):
+        self.db_filepath = db_filepath
+        self.table_name = table_name
+        self.sources: list[tuple[str, str]] = [(MAIN_SCHEMA, db_filepath)]
+        seen = {os.path.abspath(db_filepath)} if db_filepath else set()
+
+        for path in source_paths or []:
+            if not path or os.path.abspath(path) in seen:
+                continue
+            if not os.path.exists(path):
+                print(f"Federation: Database {path} not found, not attached.")
+                continue
+            if len(self.sources) > MAX_ATTACHED:
+                print(f"Federation: At most {MAX_ATTACHED} databases can be attached, {path} skipped.")
+                continue
+            seen.add(os.path.abspath(path))
+            self.sources.append((f"src{len(self.sources)}", path))
+
+        self.labels = self._make_labels()
+
+    def _make_labels(self) -> list[str]:
+        """File names without extension, numbered if two sources have the same name."""
+        labels = []
+        for _schema, path in self.sources:
+            label = os.path.splitext(os.path.basename(path))[0] or "main"
+            candidate, number = label, 2
+            while candidate in labels:
+                candidate = f"{label}_{number}"
+                number += 1
+            labels.append(candidate)
+        return labels
+
+    @property
+    def is_federated(self) -> bool:
+        return len(self.sources) > 1
+
+    @property
+    def view_name(self) -> str:
+        return FEDERATED_VIEW if self.is_federated else self.table_name
+
+    @property
+    def id_sql(self) -> str:
+        """Select expression of the row id (federated id or qso_id)."""
+        return ID_SQL if self.is_federated else "qso_id"
+
+    @property
+    def id_list_condition(self) -> str:
+        """Condition 'row id in the JSON list bound to ?'."""
+        return ID_LIST_CONDITION if self.is_federated else "qso_id IN (SELECT value FROM json_each(?))"
+
+    @property
+    def source_paths(self) -> list[str]:
+        """The attached databases (without the open one)."""
+        return [path for _schema, path in self.sources[1:]]
+
+    def locate(self, row_id: int) -> tuple[str, int]:
+        """(schema, qso_id) of a row id; ids of unknown sources raise KeyError."""
+        if not self.is_federated:
+            return MAIN_SCHEMA, int(row_id)
+        source_no, qso_id = split_id(row_id)
+        if not 0 <= source_no < len(self.sources):
+            raise KeyError(f"No source {source_no} in the database set")
+        return self.sources[source_no][0], qso_id
+
+    def label_of(self, row_id: int) -> str:
+        source_no = split_id(row_id)[0] if self.is_federated else 0
+        return self.labels[source_no] if source_no < len(self.labels) else ""
+
+    # ------------------------------------------------------------------
+    # SQL (shared by the Qt connection of the GUI and the sqlite3 workers)
+    # ------------------------------------------------------------------
+
+    def view_sql(self, columns: list[str]) -> str:
+        column_list = ", ".join(columns)
+        arms = [f"SELECT {column_list}, {_sql_text(label)} AS {SOURCE_COLUMN}, {source_no} AS {SOURCE_NO_COLUMN} "
+                f"FROM {schema}.{self.table_name}"
+                for source_no, ((schema, _path), label) in enumerate(zip(self.sources, self.labels))]
+        return f"CREATE TEMP VIEW {FEDERATED_VIEW} AS " + " UNION ALL ".join(arms)
+
+    def attach_statements(self, columns: list[str], read_only: bool = False) -> list[tuple[str, list]]:
+        """
+        (sql, params) that attach the sources and create the view on a connection.
+        'columns' are the table columns of the open database; read_only attaches
+        through a mode=ro URI (for connections opened with uri=True).
+        """
+        if not self.is_federated:
+            return []
+        statements = [(f"DROP VIEW IF EXISTS temp.{FEDERATED_VIEW}", [])]
+        for schema, path in self.sources[1:]:
+            target = Path(path).resolve().as_uri() + "?mode=ro" if read_only else path
+            statements.append((f"ATTACH DATABASE ? AS {schema}", [target]))
+        statements.append((self.view_sql(columns), []))
+        return statements
+
+    def detach_statements(self) -> list[str]:
+        if not self.is_federated:
+            return []
+        return [f"DROP VIEW IF EXISTS temp.{FEDERATED_VIEW}"] + [f"DETACH DATABASE {schema}"
+                                                               for schema, _path in self.sources[1:]]
+
+    # ------------------------------------------------------------------
+    # Worker connections (pooled readers of the open database)
+    # ------------------------------------------------------------------
+
+    def attach(self, conn: sqlite3.Connection, read_only: bool = True):
+        if not self.is_federated:
+            return
+        columns = [row[1] for row in conn.execute(f"PRAGMA {MAIN_SCHEMA}.table_info({self.table_name})")]
+        try:
+            for sql, params in self.attach_statements(columns, read_only):
+                conn.execute(sql, params)
+        except sqlite3.Error:
+            self.detach(conn)
+            raise
+
+    def detach(self, conn: sqlite3.Connection) -> bool:
+        """
+        Removes view and sources again. Returns False if a source is still
+        attached (e.g. an open BLOB handle locks it); sources that were not
+        attached are ignored.
+        """
+        if conn.in_transaction:
+            conn.rollback()
+        for sql in self.detach_statements():
+            try:
+                conn.execute(sql)
+            except sqlite3.OperationalError:
+                pass
+        attached = {row[1] for row in conn.execute("PRAGMA database_list")}
+        return not attached.intersection(schema for schema, _path in self.sources[1:])
+
+    def acquire_reader(self) -> sqlite3.Connection:
+        """Read-only connection with the whole set attached (give it back with release_reader)."""
+        manager = get_manager(self.db_filepath)
+        conn = manager.acquire_reader()
+        try:
+            self.attach(conn)
+        except sqlite3.Error:
+            manager.release_reader(conn)
+            raise
+        return conn
+
+    def release_reader(self, conn: sqlite3.Connection):
+        # Pooled connections go back without the attached databases
+        try:
+            clean = self.detach(conn)
+        except sqlite3.Error:
+            clean = False
+        if not clean:
+            conn.close()
+            return
+        get_manager(self.db_filepath).release_reader(conn)
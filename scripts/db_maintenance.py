@@ -0,0 +1,365 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from PySide6.QtCore import QObject, QThread, QTimer, QEvent, Signal, Slot
+
+from .connection_manager import get_manager, WriterBusy
+
+# Maintenance tasks: name -> (label, needs the writer connection).
+# They run in this order, whatever order they were selected in.
+TASKS = OrderedDict([
+    ('optimize', ("Optimize query plans (PRAGMA optimize)", True)),
+    ('analyze', ("Update all statistics (ANALYZE)", True)),
+    ('incremental_vacuum', ("Release free pages (incremental vacuum)", True)),
+    ('vacuum', ("Rebuild the database (VACUUM, enables incremental vacuum)", True)),
+    ('checkpoint', ("Checkpoint and truncate the WAL", True)),
+    ('quick_check', ("Quick check", False)),
+    ('integrity_check', ("Integrity check (reads every page)", False)),
+    ('space', ("Space usage per table and index (dbstat)", False)),
+])
+
+# Cheap tasks run automatically after some minutes without user input
+IDLE_TASKS = ['optimize', 'incremental_vacuum', 'checkpoint']
+
+# Minimum time between two idle runs (s)
+IDLE_RUN_INTERVAL = 3600
+
+# Pages released per incremental_vacuum step; each step is a short write
+# transaction, so an import waits at most one step and a cancel keeps the progress
+VACUUM_STEP_PAGES = 2000
+
+# Rows examined per table and index by PRAGMA optimize/ANALYZE (approximate statistics)
+ANALYSIS_LIMIT = 1000
+
+# Error messages kept from quick_check/integrity_check
+CHECK_MAX_ERRORS = 100
+
+AUTO_VACUUM_MODES = {0: "none", 1: "full", 2: "incremental"}
+
+
+class MaintenanceCancelled(Exception):
+    pass
+
+
+def database_info(conn: sqlite3.Connection, db_filepath: str) -> dict:
+    """Page counts and file sizes of the database (cheap, header values only)."""
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+    freelist_count = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    wal_path = db_filepath + "-wal"
+    return {
+        'page_size': page_size,
+        'page_count': page_count,
+        'freelist_count': freelist_count,
+        'free_bytes': freelist_count * page_size,
+        'auto_vacuum': AUTO_VACUUM_MODES.get(conn.execute("PRAGMA auto_vacuum").fetchone()[0], "unknown"),
+        'file_bytes': os.path.getsize(db_filepath) if os.path.exists(db_filepath) else 0,
+        'wal_bytes': os.path.getsize(wal_path) if os.path.exists(wal_path) else 0,
+    }
+
+
+def space_usage(conn: sqlite3.Connection) -> list[dict]:
+    """
+    Bytes per table and index from the dbstat virtual table, largest first.
+    Reads every page of the database (seconds for a multi-GB card database).
+    Returns an empty list if SQLite was built without dbstat.
+    """
+    try:
+        rows = conn.execute("""
+            SELECT s.name, COALESCE(m.type, 'table'), COALESCE(m.tbl_name, s.name),
+                   COUNT(*), SUM(s.pgsize), SUM(s.payload), SUM(s.unused),
+                   SUM(s.pagetype = 'overflow')
+            FROM dbstat AS s
+            LEFT JOIN sqlite_master AS m ON m.name = s.name
+            GROUP BY s.name
+            ORDER BY SUM(s.pgsize) DESC
+        """).fetchall()
+    except sqlite3.OperationalError as e:
+        if "dbstat" not in str(e):
+            raise
+        print(f"[WARNING] SQLite without dbstat, no space report: {e}")
+        return []
+    return [{'name': name, 'type': object_type, 'table': table_name, 'pages': pages,
+             'bytes': size, 'payload': payload, 'unused': unused, 'overflow_pages': overflow}
+            for name, object_type, table_name, pages, size, payload, unused, overflow in rows]
+
+
+class MaintenanceWorker(QObject):
+    """
+    Runs maintenance tasks (see TASKS) in a QThread. Writing tasks use the shared
+    writer connection one task (or one vacuum step) at a time, checks and the
+    space report use a reader. cancel() interrupts the running statement.
+    """
+
+    progress = Signal(int, int)         # finished tasks, total
+    task_finished = Signal(str, str)    # task name, result message
+    finished = Signal(dict)             # maintenance report
+
+    def __init__(self, db_filepath: str, tasks: list[str]):
+        super().__init__()
+        self.db_filepath = db_filepath
+        self.tasks = [name for name in TASKS if name in tasks]
+        self._cancel_event = threading.Event()
+        self._conn: sqlite3.Connection | None = None
+
+    def cancel(self):
+        """Requests cancellation and interrupts the running statement; may be called from any thread."""
+        self._cancel_event.set()
+        conn = self._conn
+        if conn is not None:
+            conn.interrupt()
+
+    def _check_cancel(self):
+        if self._cancel_event.is_set():
+            raise MaintenanceCancelled()
+
+    def _interruptible(self, conn: sqlite3.Connection, function):
+        """Calls function(conn) so that cancel() can interrupt it (conn.interrupt())."""
+        self._conn = conn
+        try:
+            self._check_cancel()
+            return function(conn)
+        except sqlite3.OperationalError as e:
+            if self._cancel_event.is_set() and "interrupt" in str(e):
+                raise MaintenanceCancelled()
+            raise
+        finally:
+            self._conn = None
+
+    def _acquire_writer(self, manager) -> sqlite3.Connection:
+        """Waits for the writer connection (e.g. while an import runs); cancel() ends the wait."""
+        try:
+            return manager.acquire_writer(self._cancel_event)
+        except WriterBusy:
+            raise MaintenanceCancelled()
+
+    def _write(self, *statements: str) -> list:
+        """Runs the statements on the writer connection, commits and returns the rows of the last one."""
+        manager = get_manager(self.db_filepath)
+        conn = self._acquire_writer(manager)
+        try:
+            rows = []
+            for sql in statements:
+                rows = self._interruptible(conn, lambda c: c.execute(sql).fetchall())
+            if conn.in_transaction:
+                conn.commit()
+            return rows
+        finally:
+            manager.release_writer()
+
+    def _read(self, function):
+        """function(conn) on a reader connection."""
+        with get_manager(self.db_filepath).reader() as conn:
+            return self._interruptible(conn, function)
+
+    # ------------------------------------------------------------------
+    # Tasks (return the message for the log)
+    # ------------------------------------------------------------------
+
+    def _task_optimize(self) -> str:
+        manager = get_manager(self.db_filepath)
+        conn = self._acquire_writer(manager)
+        try:
+            # 0x10002: ANALYZE every table whose statistics are missing or outdated,
+            # not only the tables this (freshly opened) connection has queried
+            self._interruptible(conn, lambda c: c.execute(f"PRAGMA analysis_limit = {ANALYSIS_LIMIT}").fetchall()
+                                + c.execute("PRAGMA optimize(0x10002)").fetchall())
+            if conn.in_transaction:
+                conn.commit()
+        finally:
+            # The limit is a setting of the shared writer connection (bulk_load runs a full ANALYZE)
+            conn.execute("PRAGMA analysis_limit = 0").fetchall()
+            manager.release_writer()
+        return "Statistics of changed tables updated."
+
+    def _task_analyze(self) -> str:
+        self._write("ANALYZE")
+        return "Statistics of all tables and indexes updated."
+
+    def _task_checkpoint(self) -> str:
+        busy, wal_pages, checkpointed = self._write("PRAGMA wal_checkpoint(TRUNCATE)")[0]
+        if wal_pages < 0:
+            return "Not in WAL mode, nothing to checkpoint."
+        if busy:
+            return f"{checkpointed} of {wal_pages} WAL pages written; readers still active, WAL not truncated."
+        return f"{checkpointed} WAL pages written to the database, WAL truncated."
+
+    def _task_incremental_vacuum(self) -> str:
+        info = self._read(lambda conn: database_info(conn, self.db_filepath))
+        if info['auto_vacuum'] != "incremental":
+            return (f"{info['freelist_count']} free pages; auto_vacuum is '{info['auto_vacuum']}', "
+                    f"they are only released by a rebuild (VACUUM).")
+
+        released = 0
+        free_pages = info['freelist_count']
+        while free_pages:
+            remaining = self._write(f"PRAGMA incremental_vacuum({VACUUM_STEP_PAGES})",
+                                    "PRAGMA freelist_count")[0][0]
+            if remaining >= free_pages:
+                break
+            released += free_pages - remaining
+            free_pages = remaining
+        return f"{released} free pages ({released * info['page_size'] / (1024 * 1024):.1f} MB) released."
+
+    def _task_vacuum(self) -> str:
+        size_before = self._read(lambda conn: database_info(conn, self.db_filepath))['page_count']
+        # Takes effect with this VACUUM; afterwards incremental_vacuum can release free pages
+        self._write("PRAGMA auto_vacuum = INCREMENTAL", "VACUUM")
+        info = self._read(lambda conn: database_info(conn, self.db_filepath))
+        return (f"Database rebuilt: {size_before} -> {info['page_count']} pages, "
+                f"auto_vacuum is '{info['auto_vacuum']}'.")
+
+    def _check(self, pragma: str) -> str:
+        messages = [row[0] for row in self._read(
+            lambda conn: conn.execute(f"PRAGMA {pragma}({CHECK_MAX_ERRORS})").fetchall())]
+        if messages == ['ok']:
+            return "ok"
+        self.report['problems'].extend(messages)
+        return f"{len(messages)} problem(s) found:\n" + "\n".join(messages[:10])
+
+    def _task_quick_check(self) -> str:
+        return self._check("quick_check")
+
+    def _task_integrity_check(self) -> str:
+        return self._check("integrity_check")
+
+    def _task_space(self) -> str:
+        self.report['space'] = self._read(space_usage)
+        if not self.report['space']:
+            return "dbstat is not available in this SQLite version."
+        largest = self.report['space'][0]
+        return f"{len(self.report['space'])} tables/indexes, largest: {largest['name']} ({largest['bytes'] / (1024 * 1024):.1f} MB)."
+
+    @Slot()
+    def run(self):
+        self.report = {
+            'tasks': {},
+            'info': {},
+            'space': [],
+            'problems': [],
+            'cancelled': False,
+            'error': '',
+            'elapsed': 0.0
+        }
+        start_time = time.perf_counter()
+
+        try:
+            for done, name in enumerate(self.tasks):
+                self.progress.emit(done, len(self.tasks))
+                self._check_cancel()
+                task_start = time.perf_counter()
+                message = getattr(self, f"_task_{name}")()
+                message += f" ({time.perf_counter() - task_start:.1f} s)"
+                self.report['tasks'][name] = message
+                self.task_finished.emit(name, message)
+            self.progress.emit(len(self.tasks), len(self.tasks))
+        except MaintenanceCancelled:
+            self.report['cancelled'] = True
+        except (sqlite3.Error, OSError) as e:
+            print(f"MaintenanceWorker: Maintenance failed: {e}")
+            self.report['error'] = str(e)
+
+        try:
+            with get_manager(self.db_filepath).reader() as conn:
+                self.report['info'] = database_info(conn, self.db_filepath)
+        except (sqlite3.Error, OSError) as e:
+            print(f"MaintenanceWorker: Database info not available: {e}")
+
+        self.report['elapsed'] = time.perf_counter() - start_time
+        self.finished.emit(self.report)
+
+
+class IdleMaintenance(QObject):
+    """
+    Runs IDLE_TASKS in the background after 'idle_minutes' without keyboard or
+    mouse input, at most once per IDLE_RUN_INTERVAL. Any input cancels a
+    running idle maintenance. Install with QApplication.installEventFilter().
+    """
+
+    finished = Signal(dict)
+
+    _ACTIVITY_EVENTS = {QEvent.Type.KeyPress, QEvent.Type.MouseButtonPress, QEvent.Type.Wheel}
+
+    def __init__(self, db_filepath: str, idle_minutes: int = 10, parent=None):
+        super().__init__(parent)
+        self.db_filepath = db_filepath
+        self.paused = False
+        self.thread: QThread | None = None
+        self.worker: MaintenanceWorker | None = None
+        self._last_run = 0.0
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self._on_idle)
+        self.set_idle_minutes(idle_minutes)
+
+    def set_idle_minutes(self, idle_minutes: int):
+        """0 disables the idle maintenance."""
+        self.idle_ms = max(int(idle_minutes), 0) * 60 * 1000
+        if self.idle_ms:
+            self.timer.start(self.idle_ms)
+        else:
+            self.timer.stop()
+
+    def set_database(self, db_filepath: str):
+        self.cancel()
+        self.db_filepath = db_filepath
+        self._last_run = 0.0
+
+    def set_paused(self, paused: bool):
+        """Paused while the maintenance dialog runs its own tasks."""
+        self.paused = paused
+        if paused:
+            self.cancel()
+
+    def cancel(self):
+        if self.worker is not None:
+            self.worker.cancel()
+
+    def shutdown(self):
+        self.timer.stop()
+        self.cancel()
+        if self.thread is not None:
+            self.thread.quit()
+            self.thread.wait()
+
+    def eventFilter(self, watched, event) -> bool:
+        if event.type() in self._ACTIVITY_EVENTS:
+            self.cancel()
+            if self.idle_ms:
+                self.timer.start(self.idle_ms)
+        return False
+
+    @Slot()
+    def _on_idle(self):
+        if self.paused or self.thread is not None or not self.db_filepath:
+            return
+        if self._last_run and time.monotonic() - self._last_run < IDLE_RUN_INTERVAL:
+            return
+        self._last_run = time.monotonic()
+        self.worker = MaintenanceWorker(self.db_filepath, IDLE_TASKS)
+        self.thread = QThread(self)
+        self.worker.moveToThread(self.thread)
+        self.worker.finished.connect(self._on_finished)
+        self.thread.started.connect(self.worker.run)
+        self.thread.start()
+
+    @Slot(dict)
+    def _on_finished(self, report: dict):
+        self.thread.quit()
+        self.thread.wait()
+        self.worker.deleteLater()
+        self.thread.deleteLater()
+        self.worker = None
+        self.thread = None
+
+        if report['cancelled']:
+            # Interrupted by user input, try again at the next idle time
+            self._last_run = 0.0
+        else:
+            print(f"[INFO] Idle maintenance finished in {report['elapsed']:.1f} s: "
+                  + "; ".join(report['tasks'].values()))
+        self.finished.emit(report)
@@ -0,0 +1,363 @@
+import csv
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from PySide6.QtCore import QObject, Signal, Slot
+
+from .connection_manager import get_manager, WriterBusy
+
+# Schema name of the merged database on the writer connection
+MERGE_SCHEMA = "merge_src"
+
+# A QSO is the same QSO in both logbooks if this UNIQUE key matches
+KEY_COLUMNS = ["CALL", "QSO_DATE", "TIME_ON"]
+
+IMAGE_COLUMN = "EQSL_IMAGE_BLOB"
+
+# Not copied: the row id (new rows get their own) and the flag kept by the triggers
+SKIPPED_COLUMNS = {"QSO_ID", "HAS_IMAGE"}
+
+# What happens with a field that differs in both logbooks:
+# keep = our value stays, fill = theirs only where ours is empty, replace = theirs unless empty
+POLICIES = {
+    'keep': "Keep our values (only add new QSOs)",
+    'fill': "Fill empty fields from the other logbook",
+    'replace': "Take the other logbook's values",
+}
+DEFAULT_POLICY = 'fill'
+
+# Conflicting QSOs read per fetch of the diff pass (progress and cancel granularity)
+DIFF_FETCH_ROWS = 2000
+
+# Diff lines kept in the report (all of them go to the CSV file)
+DIFF_PREVIEW_ROWS = 50
+
+_TIMESTAMP_FORMAT = "%Y%m%d_%H%M%S"
+
+
+class MergeCancelled(Exception):
+    pass
+
+
+def _empty(sql: str) -> str:
+    """NULL and '' count as an empty field."""
+    return f"COALESCE({sql}, '') = ''"
+
+
+def _is_empty(value) -> bool:
+    return value is None or value == ''
+
+
+def _image_text(has_image: int, size: int | None) -> str:
+    return f"image {size / 1024:.1f} KB" if has_image else "no image"
+
+
+def diff_path_for(db_filepath: str, source_path: str) -> str:
+    """CSV with the per-field differences, next to the database."""
+    root = os.path.splitext(db_filepath)[0]
+    source_stem = os.path.splitext(os.path.basename(source_path))[0]
+    return f"{root}_merge_{source_stem}_{datetime.now().strftime(_TIMESTAMP_FORMAT)}.csv"
+
+
+class MergeWorker(QObject):
+    """
+    Merges another logbook database into the open one with set-based SQL:
+    the other database is ATTACHed to the writer connection and copied with
+    one INSERT ... SELECT ... ON CONFLICT(CALL, QSO_DATE, TIME_ON) DO UPDATE.
+    Rows and card images (BLOB overflow pages) are copied inside SQLite,
+    nothing passes through Python; the UNIQUE index resolves the conflicts.
+    Before the copy one JOIN over the UNIQUE key compares the QSOs found in
+    both logbooks field by field and writes the differences to a CSV file.
+    Everything runs in ONE transaction: cancel() or an error leaves the
+    database unchanged. The other database is only read.
+    """
+
+    progress = Signal(int, int)     # conflicting QSOs compared, total
+    status = Signal(str)            # current phase (for the progress dialog)
+    finished = Signal(dict)         # merge report
+
+    def __init__(self, db_filepath: str, source_path: str, table_name: str = "eqsl_data",
+                 policy: str = DEFAULT_POLICY):
+        super().__init__()
+        self.db_filepath = db_filepath
+        self.source_path = source_path
+        self.table_name = table_name
+        if policy not in POLICIES:
+            print(f"MergeWorker: Unknown conflict policy '{policy}', using '{DEFAULT_POLICY}'.")
+            policy = DEFAULT_POLICY
+        self.policy = policy
+        self._cancel_event = threading.Event()
+        self._conn: sqlite3.Connection | None = None
+
+    def cancel(self):
+        """Requests cancellation and interrupts the running statement; may be called from any thread."""
+        self._cancel_event.set()
+        conn = self._conn
+        if conn is not None:
+            conn.interrupt()
+
+    def _check_cancel(self):
+        if self._cancel_event.is_set():
+            raise MergeCancelled()
+
+    # ------------------------------------------------------------------
+    # SQL
+    # ------------------------------------------------------------------
+
+    def _columns(self, conn: sqlite3.Connection) -> list[str]:
+        """Columns copied: the data columns of our table (no generated ones) that the other table has too."""
+        ours = [row[1] for row in conn.execute(f"PRAGMA main.table_info({self.table_name})")
+                if row[1].upper() not in SKIPPED_COLUMNS]
+        theirs = {row[1].upper() for row in conn.execute(f"PRAGMA {MERGE_SCHEMA}.table_info({self.table_name})")}
+        missing = [column for column in KEY_COLUMNS if column not in theirs]
+        if missing:
+            raise sqlite3.DatabaseError(f"{self.source_path} has no table {self.table_name} "
+                                        f"with the columns {', '.join(KEY_COLUMNS)}")
+        return [column for column in ours if column.upper() in theirs]
+
+    def _key_join(self) -> str:
+        return " AND ".join(f"t.{column} = s.{column}" for column in KEY_COLUMNS)
+
+    def _update_clause(self, columns: list[str]) -> tuple[str, str]:
+        """SET list and WHERE of the DO UPDATE for the policy (WHERE skips rows that would not change)."""
+        table = self.table_name
+        assignments, changes = [], []
+        for column in columns:
+            if column in KEY_COLUMNS:
+                continue
+            if column == IMAGE_COLUMN:
+                # HAS_IMAGE tells whether a card exists without reading the BLOB
+                ours_empty, theirs_empty = f"{table}.HAS_IMAGE = 0", "excluded.HAS_IMAGE = 0"
+                differs = (f"(length({table}.{column}) IS NOT length(excluded.{column}) "
+                           f"OR {table}.{column} IS NOT excluded.{column})")
+            else:
+                ours_empty, theirs_empty = _empty(f"{table}.{column}"), _empty(f"excluded.{column}")
+                differs = f"{table}.{column} IS NOT excluded.{column}"
+
+            if self.policy == 'fill':
+                take = f"{ours_empty} AND NOT {theirs_empty}"
+            else:
+                take = f"NOT {theirs_empty} AND {differs}"
+            assignments.append(f"{column} = CASE WHEN {take} THEN excluded.{column} ELSE {table}.{column} END")
+            changes.append(f"({take})")
+
+        if IMAGE_COLUMN in columns:
+            assignments.append(f"HAS_IMAGE = max({table}.HAS_IMAGE, excluded.HAS_IMAGE)")
+        return ", ".join(assignments), " OR ".join(changes) or "0"
+
+    def _merge_sql(self, columns: list[str]) -> str:
+        column_list = ", ".join(columns)
+        select_list = column_list
+        if IMAGE_COLUMN in columns:
+            # Written directly, so the insert trigger has nothing to correct
+            column_list += ", HAS_IMAGE"
+            select_list += f", ({IMAGE_COLUMN} IS NOT NULL)"
+        # "WHERE true": without it SQLite would parse ON CONFLICT as a join constraint
+        sql = (f"INSERT INTO main.{self.table_name} ({column_list}) "
+               f"SELECT {select_list} FROM {MERGE_SCHEMA}.{self.table_name} WHERE true "
+               f"ON CONFLICT({', '.join(KEY_COLUMNS)}) DO ")
+        if self.policy == 'keep':
+            return sql + "NOTHING"
+        assignments, where = self._update_clause(columns)
+        return sql + f"UPDATE SET {assignments} WHERE {where}"
+
+    # ------------------------------------------------------------------
+    # Phases
+    # ------------------------------------------------------------------
+
+    def _take(self, ours_empty: bool, theirs_empty: bool) -> bool:
+        if self.policy == 'fill':
+            return ours_empty and not theirs_empty
+        if self.policy == 'replace':
+            return not theirs_empty
+        return False
+
+    def _write_diff(self, conn: sqlite3.Connection, columns: list[str], diff_path: str, report: dict) -> list[int]:
+        """
+        Compares the QSOs found in both logbooks (JOIN over the UNIQUE key) and
+        writes one CSV line per differing field. Returns the qso_ids of our
+        QSOs that the policy changes.
+        """
+        fields = [column for column in columns if column not in KEY_COLUMNS and column != IMAGE_COLUMN]
+        select_list = ", ".join(f"t.{column}, s.{column}" for column in fields)
+        if IMAGE_COLUMN in columns:
+            # Card contents are only compared if both have one of the same size (CASE short-circuits)
+            select_list += (f", t.HAS_IMAGE, s.{IMAGE_COLUMN} IS NOT NULL, "
+                            f"length(t.{IMAGE_COLUMN}), length(s.{IMAGE_COLUMN}), "
+                            f"CASE WHEN length(t.{IMAGE_COLUMN}) IS NOT length(s.{IMAGE_COLUMN}) THEN 1 "
+                            f"ELSE t.{IMAGE_COLUMN} IS NOT s.{IMAGE_COLUMN} END")
+
+        total = conn.execute(f"SELECT COUNT(*) FROM {MERGE_SCHEMA}.{self.table_name} s "
+                             f"JOIN main.{self.table_name} t ON {self._key_join()}").fetchone()[0]
+        cursor = conn.execute(f"SELECT t.qso_id, {', '.join('t.' + c for c in KEY_COLUMNS)}, {select_list} "
+                              f"FROM {MERGE_SCHEMA}.{self.table_name} s "
+                              f"JOIN main.{self.table_name} t ON {self._key_join()}")
+
+        changed_ids = []
+        done = 0
+        with open(diff_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(["qso_id"] + KEY_COLUMNS + ["field", "ours", "theirs", "action"])
+            while True:
+                rows = cursor.fetchmany(DIFF_FETCH_ROWS)
+                if not rows:
+                    break
+                for row in rows:
+                    qso_id, key = row[0], row[1:1 + len(KEY_COLUMNS)]
+                    values = row[1 + len(KEY_COLUMNS):]
+                    differences = []
+                    for index, column in enumerate(fields):
+                        ours, theirs = values[2 * index], values[2 * index + 1]
+                        if ours != theirs and not (_is_empty(ours) and _is_empty(theirs)):
+                            differences.append((column, ours, theirs, _is_empty(ours), _is_empty(theirs)))
+                    if IMAGE_COLUMN in columns:
+                        ours_has, theirs_has, ours_size, theirs_size, content_differs = values[2 * len(fields):]
+                        if ours_has != theirs_has or (ours_has and content_differs):
+                            differences.append((IMAGE_COLUMN, _image_text(ours_has, ours_size),
+                                                _image_text(theirs_has, theirs_size), not ours_has, not theirs_has))
+
+                    if not differences:
+                        report['identical'] += 1
+                        continue
+                    report['conflicts'] += 1
+                    taken_any = False
+                    for column, ours, theirs, ours_empty, theirs_empty in differences:
+                        taken = self._take(ours_empty, theirs_empty)
+                        taken_any = taken_any or taken
+                        if taken and column == IMAGE_COLUMN:
+                            report['images_copied'] += 1
+                        line = [qso_id, *key, column, ours, theirs, "taken" if taken else "kept"]
+                        writer.writerow(line)
+                        report['differences'] += 1
+                        if len(report['diff']) < DIFF_PREVIEW_ROWS:
+                            report['diff'].append(line)
+                    if taken_any:
+                        changed_ids.append(qso_id)
+
+                done += len(rows)
+                self.progress.emit(done, total)
+                self._check_cancel()
+        return changed_ids
+
+    def _merge(self, conn: sqlite3.Connection, report: dict):
+        columns = self._columns(conn)
+        diff_path = diff_path_for(self.db_filepath, self.source_path)
+
+        # Writer lock for the whole merge: the diff describes exactly what is written
+        conn.execute("BEGIN IMMEDIATE")
+        report['source_rows'] = conn.execute(f"SELECT COUNT(*) FROM {MERGE_SCHEMA}.{self.table_name}").fetchone()[0]
+        max_rowid = conn.execute(f"SELECT COALESCE(MAX(qso_id), 0) FROM main.{self.table_name}").fetchone()[0]
+
+        self.status.emit("Comparing QSOs found in both logbooks...")
+        try:
+            changed_ids = self._write_diff(conn, columns, diff_path, report)
+        except BaseException:
+            os.remove(diff_path)
+            raise
+        if report['differences']:
+            report['diff_path'] = diff_path
+        else:
+            os.remove(diff_path)
+
+        self.status.emit(f"Copying {report['source_rows']} QSOs and their cards...")
+        self.progress.emit(0, 0)
+        cursor = conn.execute(self._merge_sql(columns))
+        self._check_cancel()
+
+        # Rows inserted or updated by the statement itself (not by the triggers)
+        report['updated'] = len(changed_ids)
+        new_ids = [row[0] for row in conn.execute(
+            f"SELECT qso_id FROM main.{self.table_name} WHERE qso_id > ?", (max_rowid,))]
+        report['inserted'] = len(new_ids)
+        if report['inserted'] + report['updated'] != cursor.rowcount:
+            print(f"MergeWorker: {cursor.rowcount} rows written, "
+                  f"{report['inserted']} new and {report['updated']} updated expected.")
+        if IMAGE_COLUMN in columns and new_ids:
+            report['images_copied'] += conn.execute(
+                f"SELECT COUNT(*) FROM main.{self.table_name} WHERE qso_id > ? AND HAS_IMAGE = 1",
+                (max_rowid,)).fetchone()[0]
+        report['rowids'] = new_ids + changed_ids
+        conn.commit()
+
+    @Slot()
+    def run(self):
+        report = {
+            'source': self.source_path,
+            'policy': self.policy,
+            'source_rows': 0,
+            'inserted': 0,
+            'updated': 0,
+            'identical': 0,
+            'conflicts': 0,
+            'differences': 0,
+            'images_copied': 0,
+            'diff': [],
+            'diff_path': '',
+            'rowids': [],
+            'elapsed': 0.0,
+            'cancelled': False,
+            'error': ''
+        }
+        start_time = time.perf_counter()
+
+        if os.path.abspath(self.source_path) == os.path.abspath(self.db_filepath):
+            report['error'] = "A database cannot be merged into itself."
+            self.finished.emit(report)
+            return
+
+        manager = get_manager(self.db_filepath)
+        try:
+            # Waits for a running import or maintenance task; cancel() ends the wait
+            conn = manager.acquire_writer(self._cancel_event)
+        except WriterBusy:
+            report['cancelled'] = True
+            self.finished.emit(report)
+            return
+        except sqlite3.Error as e:
+            print(f"MergeWorker: Database not available: {e}")
+            report['error'] = str(e)
+            self.finished.emit(report)
+            return
+
+        self._conn = conn
+        attached = False
+        try:
+            if conn.in_transaction:
+                conn.commit()
+            conn.execute(f"ATTACH DATABASE ? AS {MERGE_SCHEMA}", (self.source_path,))
+            attached = True
+            self._merge(conn, report)
+        except MergeCancelled:
+            report['cancelled'] = True
+        except sqlite3.OperationalError as e:
+            if self._cancel_event.is_set() and "interrupt" in str(e):
+                report['cancelled'] = True
+            else:
+                print(f"MergeWorker: Merge failed: {e}")
+                report['error'] = str(e)
+        except (sqlite3.Error, OSError) as e:
+            print(f"MergeWorker: Merge failed: {e}")
+            report['error'] = str(e)
+        finally:
+            self._conn = None
+            if conn.in_transaction:
+                conn.rollback()
+            if attached:
+                try:
+                    conn.execute(f"DETACH DATABASE {MERGE_SCHEMA}")
+                except sqlite3.Error as e:
+                    print(f"MergeWorker: Could not detach {self.source_path}: {e}")
+            manager.release_writer()
+
+        if report['cancelled'] or report['error']:
+            # Rolled back: nothing was merged, the diff does not describe the database
+            report['inserted'] = report['updated'] = report['images_copied'] = 0
+            report['rowids'] = []
+            if report['diff_path'] and os.path.exists(report['diff_path']):
+                os.remove(report['diff_path'])
+            report['diff_path'] = ''
+        report['elapsed'] = time.perf_counter() - start_time
+        self.finished.emit(report)
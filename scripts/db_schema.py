@@ -0,0 +1,287 @@
+import sqlite3
+import time
+
+from .connection_manager import get_manager
+from .search_query import ensure_search_indexes
+from .fulltext_index import ensure_fulltext_index
+
+# Schema of the eQSL database, versioned with PRAGMA user_version.
+# Every migration brings the database from version-1 to version and must be
+# idempotent (IF NOT EXISTS ...): a database created before the versioning
+# already has the table, and an interrupted migration simply runs again.
+# Never change a released migration, new indexes or columns get a new entry.
+
+# Canonical match keys of the card importers (call, band and mode as the
+# importers compare them). Virtual generated columns: ALTER TABLE can add them
+# without rewriting a multi-GB table, the values are stored in the index only.
+# The SQL expressions and normalize_match_key() must give the same result.
+MATCH_KEY_COLUMNS = {
+    'CALL_NORM': "upper(trim(CALL))",
+    # 20M -> 20 (ADIF) equals 20 (derived from FREQ); 70CM stays 70CM
+    'BAND_NORM': ("CASE WHEN upper(trim(BAND)) GLOB '*CM' THEN upper(trim(BAND)) "
+                  "WHEN upper(trim(BAND)) GLOB '*M' THEN substr(upper(trim(BAND)), 1, length(trim(BAND)) - 1) "
+                  "ELSE upper(trim(BAND)) END"),
+    'MODE_NORM': "upper(trim(MODE))",
+}
+
+MATCH_INDEX = "idx_eqsl_data_match"
+
+# Since version 6 the match index ends with TIME_ON: the card time window is
+# a range scan inside the (call, date, band, mode) entries
+MATCH_TIME_INDEX = "idx_eqsl_data_match_time"
+
+# Image flag of the default view, kept equal to (EQSL_IMAGE_BLOB IS NOT NULL) by
+# triggers. Values 0/1 are stored in the record header only (no payload), so
+# reading the flag never touches the overflow pages of the image behind it.
+# The partial indexes hold the rows with an image: the default view (rowid or
+# date order) and its count are read from the index without visiting the table.
+IMAGE_FILTER = "HAS_IMAGE = 1"
+
+IMAGE_INDEXES = {
+    'idx_eqsl_data_has_image': "qso_id",
+    'idx_eqsl_data_has_image_date': "QSO_DATE, TIME_ON",
+}
+
+# Side table with the content hash of every card image (card mirror, see mirror_sync).
+# The triggers clear the hash whenever an image is replaced or the QSO is deleted,
+# so a missing hash marks exactly the cards that changed since they were last hashed.
+# Since version 8 they also count image_version up: a hash computed from an older
+# image is not stored (rows without an entry have version 0).
+IMAGE_HASH_TABLE = "eqsl_image_hashes"
+
+
+def normalize_match_key(call: str, band: str, mode: str) -> tuple[str, str, str]:
+    """Python side of MATCH_KEY_COLUMNS: (CALL_NORM, BAND_NORM, MODE_NORM) of the given values."""
+    band = band.strip().upper()
+    if band.endswith('M') and not band.endswith('CM'):
+        band = band[:-1]
+    return call.strip().upper(), band, mode.strip().upper()
+
+
+def _create_qso_table(conn: sqlite3.Connection, table_name: str):
+    """Version 1: the QSO table (previously created by AdifImporter and SettingsManager)."""
+    # HERE IS THE PROTECTION AGAINST DUPLICATES:
+    # Only combinations of CALL, QSO_DATE, and TIME_ON that do not already exist will be inserted.
+    conn.execute(f"""
+    CREATE TABLE IF NOT EXISTS {table_name} (
+        qso_id INTEGER PRIMARY KEY,
+
+        -- IMPORTANT QSO DATA FOR UNIQUE KEY
+        CALL TEXT NOT NULL,       -- Call sign of the QSO partner
+        QSO_DATE TEXT NOT NULL,   -- Date (YYYYMMDD)
+        TIME_ON TEXT NOT NULL,    -- Start time (HHMMSS)
+
+        -- GENERAL QSO DATA
+        BAND TEXT,                -- Band (e.g., 20)
+        MODE TEXT,                -- Mode (e.g., FT8)
+        SUBMODE TEXT,             -- Submode (e.g., FT4)
+        FREQ REAL,                -- Frequency (e.g., 14.0764)
+        RST_SENT TEXT,            -- Sent RST
+        RST_RCVD TEXT,            -- Received RST
+        TX_PWR REAL,              -- Transmit Power (e.g., 30.0)
+
+        -- GEOGRAPHICAL DATA OF THE PARTNER
+        CONT TEXT,                -- Continent
+        COUNTRY TEXT,             -- Country (Name)
+        DXCC INTEGER,             -- DXCC Number
+        PFX TEXT,                 -- Prefix
+        CQZ INTEGER,              -- CQ Zone
+        ITUZ INTEGER,             -- ITU Zone
+        GRIDSQUARE TEXT,          -- Locator (e.g., JO55RM)
+        LAT REAL,                 -- Latitude (N050 51.151)
+        LON REAL,                 -- Longitude (E004 49.287)
+
+        -- PERSONAL DATA OF THE PARTNER
+        NAME TEXT,                -- Name (First and Last)
+        QTH TEXT,                 -- Location/City
+        ADDRESS TEXT,             -- Complete Address
+        EMAIL TEXT,
+        AGE INTEGER,
+
+        -- eQSL-STATUS
+        EQSL_QSL_SENT TEXT,
+        EQSL_QSLS_DATE TEXT,      -- Sent Date (YYYYMMDD)
+        EQSL_QSL_RCVD TEXT,
+        EQSL_QSLR_DATE TEXT,      -- Received Date (YYYYMMDD)
+        EQSL_IMAGE_BLOB BLOB,     -- eQSL Image as BLOB
+
+        -- DX-INDEXES (SOTA/POTA/IOTA)
+        SOTA_REF TEXT,
+        POTA_REF TEXT,
+        IOTA_REF TEXT,
+
+        -- UNIQUE constraint for duplicate detection (important!)
+        UNIQUE(CALL, QSO_DATE, TIME_ON)
+    );
+    """)
+
+
+def _create_search_indexes(conn: sqlite3.Connection, table_name: str):
+    """Version 2: indexes of the field search, the column sort and the facets."""
+    ensure_search_indexes(conn, table_name)
+
+
+def _create_fulltext_index(conn: sqlite3.Connection, table_name: str):
+    """Version 3: FTS5 trigram index (skipped with a warning if SQLite has no FTS5)."""
+    ensure_fulltext_index(conn, table_name)
+
+
+def _add_match_keys(conn: sqlite3.Connection, table_name: str):
+    """Version 4: match key columns and the composite index of the card importers."""
+    # table_xinfo lists generated columns too (table_info hides them)
+    existing = {row[1].upper() for row in conn.execute(f"PRAGMA table_xinfo({table_name})")}
+    for column, expression in MATCH_KEY_COLUMNS.items():
+        if column not in existing:
+            conn.execute(f"ALTER TABLE {table_name} ADD COLUMN {column} TEXT "
+                         f"GENERATED ALWAYS AS ({expression}) VIRTUAL")
+    conn.execute(f"CREATE INDEX IF NOT EXISTS {MATCH_INDEX} "
+                 f"ON {table_name} (CALL_NORM, QSO_DATE, BAND_NORM, MODE_NORM)")
+
+
+def _add_image_flag(conn: sqlite3.Connection, table_name: str):
+    """Version 5: HAS_IMAGE column with its sync triggers and the partial image indexes."""
+    existing = {row[1].upper() for row in conn.execute(f"PRAGMA table_xinfo({table_name})")}
+    if 'HAS_IMAGE' not in existing:
+        conn.execute(f"ALTER TABLE {table_name} ADD COLUMN HAS_IMAGE INTEGER NOT NULL DEFAULT 0")
+        # One scan over the existing cards (IS NOT NULL only reads the record header)
+        conn.execute(f"UPDATE {table_name} SET HAS_IMAGE = 1 WHERE EQSL_IMAGE_BLOB IS NOT NULL")
+
+    # The update trigger also corrects a HAS_IMAGE written by hand
+    conn.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS trg_{table_name}_has_image_insert AFTER INSERT ON {table_name}
+    WHEN new.HAS_IMAGE IS NOT (new.EQSL_IMAGE_BLOB IS NOT NULL) BEGIN
+        UPDATE {table_name} SET HAS_IMAGE = (new.EQSL_IMAGE_BLOB IS NOT NULL) WHERE qso_id = new.qso_id;
+    END
+    """)
+    conn.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS trg_{table_name}_has_image_update
+    AFTER UPDATE OF EQSL_IMAGE_BLOB, HAS_IMAGE ON {table_name}
+    WHEN new.HAS_IMAGE IS NOT (new.EQSL_IMAGE_BLOB IS NOT NULL) BEGIN
+        UPDATE {table_name} SET HAS_IMAGE = (new.EQSL_IMAGE_BLOB IS NOT NULL) WHERE qso_id = new.qso_id;
+    END
+    """)
+    for index_name, columns in IMAGE_INDEXES.items():
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON {table_name} ({columns}) "
+                     f"WHERE {IMAGE_FILTER}")
+
+
+def _add_time_to_match_index(conn: sqlite3.Connection, table_name: str):
+    """Version 6: match index with TIME_ON as last column, replaces the index of version 4."""
+    conn.execute(f"CREATE INDEX IF NOT EXISTS {MATCH_TIME_INDEX} "
+                 f"ON {table_name} (CALL_NORM, QSO_DATE, BAND_NORM, MODE_NORM, TIME_ON)")
+    # Same leading columns: every lookup of the old index uses the new one
+    conn.execute(f"DROP INDEX IF EXISTS {MATCH_INDEX}")
+
+
+def _add_image_hashes(conn: sqlite3.Connection, table_name: str):
+    """Version 7: image hash table of the card mirror with its invalidation triggers."""
+    # Databases synced before version 7 already have them (created by the mirror sync)
+    conn.execute(f"""
+    CREATE TABLE IF NOT EXISTS {IMAGE_HASH_TABLE} (
+        qso_id INTEGER PRIMARY KEY,     -- ROWID of the QSO in {table_name}
+        image_hash TEXT NOT NULL        -- SHA-1 of EQSL_IMAGE_BLOB
+    )
+    """)
+    conn.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS trg_{IMAGE_HASH_TABLE}_image_changed
+    AFTER UPDATE OF EQSL_IMAGE_BLOB ON {table_name}
+    BEGIN
+        DELETE FROM {IMAGE_HASH_TABLE} WHERE qso_id = OLD.qso_id;
+    END
+    """)
+    conn.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS trg_{IMAGE_HASH_TABLE}_qso_deleted
+    AFTER DELETE ON {table_name}
+    BEGIN
+        DELETE FROM {IMAGE_HASH_TABLE} WHERE qso_id = OLD.qso_id;
+    END
+    """)
+
+
+def _add_image_versions(conn: sqlite3.Connection, table_name: str):
+    """Version 8: image version counter in the hash table, kept by the invalidation triggers."""
+    # Replaced below; dropped first so the table can be rebuilt without them
+    conn.execute(f"DROP TRIGGER IF EXISTS trg_{IMAGE_HASH_TABLE}_image_changed")
+    conn.execute(f"DROP TRIGGER IF EXISTS trg_{IMAGE_HASH_TABLE}_qso_deleted")
+
+    columns = {row[1] for row in conn.execute(f"PRAGMA table_info({IMAGE_HASH_TABLE})")}
+    if 'image_version' not in columns:
+        # image_hash becomes nullable: the (small) table is rebuilt, the hashes are kept
+        conn.execute(f"DROP TABLE IF EXISTS {IMAGE_HASH_TABLE}_new")
+        conn.execute(f"""
+        CREATE TABLE {IMAGE_HASH_TABLE}_new (
+            qso_id INTEGER PRIMARY KEY,                 -- ROWID of the QSO in {table_name}
+            image_hash TEXT,                            -- SHA-1 of EQSL_IMAGE_BLOB, NULL = not hashed
+            image_version INTEGER NOT NULL DEFAULT 0    -- counted up by every image change
+        )
+        """)
+        conn.execute(f"INSERT INTO {IMAGE_HASH_TABLE}_new (qso_id, image_hash) "
+                     f"SELECT qso_id, image_hash FROM {IMAGE_HASH_TABLE}")
+        conn.execute(f"DROP TABLE {IMAGE_HASH_TABLE}")
+        conn.execute(f"ALTER TABLE {IMAGE_HASH_TABLE}_new RENAME TO {IMAGE_HASH_TABLE}")
+
+    # A deleted QSO also counts up: its ROWID may be reused by a new QSO
+    for trigger, event in (("image_changed", "UPDATE OF EQSL_IMAGE_BLOB"), ("qso_deleted", "DELETE")):
+        conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{IMAGE_HASH_TABLE}_{trigger}
+        AFTER {event} ON {table_name}
+        BEGIN
+            INSERT INTO {IMAGE_HASH_TABLE} (qso_id, image_hash, image_version) VALUES (OLD.qso_id, NULL, 1)
+            ON CONFLICT(qso_id) DO UPDATE SET image_hash = NULL, image_version = image_version + 1;
+        END
+        """)
+
+
+# (version, description, function) in ascending order
+MIGRATIONS = [
+    (1, "QSO table", _create_qso_table),
+    (2, "search and sort indexes", _create_search_indexes),
+    (3, "full-text index", _create_fulltext_index),
+    (4, "match key columns for the card import", _add_match_keys),
+    (5, "image flag and partial image indexes", _add_image_flag),
+    (6, "TIME_ON in the match index", _add_time_to_match_index),
+    (7, "image hash table of the card mirror", _add_image_hashes),
+    (8, "image version counter of the card mirror", _add_image_versions),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn: sqlite3.Connection, table_name: str = "eqsl_data") -> int:
+    """
+    Applies all migrations newer than the version of the database (no-op if it is current).
+    Returns the schema version afterwards.
+    """
+    version = get_schema_version(conn)
+    if version > SCHEMA_VERSION:
+        print(f"[WARNING] database schema version {version} is newer than this program ({SCHEMA_VERSION}).")
+        return version
+
+    for migration_version, description, apply in MIGRATIONS:
+        if migration_version <= version:
+            continue
+        start_time = time.perf_counter()
+        apply(conn, table_name)
+        conn.commit()
+        # Own statement after the migration: an interrupted migration is repeated
+        conn.execute(f"PRAGMA user_version = {migration_version}")
+        conn.commit()
+        version = migration_version
+        print(f"[INFO] database schema version {version}: {description} "
+              f"({time.perf_counter() - start_time:.2f} s).")
+    return version
+
+
+def migrate_database(db_filepath: str, table_name: str = "eqsl_data") -> bool:
+    """Migrates the database file on the shared writer connection. Returns False on a database error."""
+    try:
+        with get_manager(db_filepath).writer() as conn:
+            migrate(conn, table_name)
+        return True
+    except sqlite3.Error as e:
+        print(f"[CRITICAL] database migration failed: {e}")
+        return False
@@ -0,0 +1,75 @@
+from PySide6.QtCore import Qt, Signal, Slot
+from PySide6.QtWidgets import QDockWidget, QTreeWidget, QTreeWidgetItem, QHeaderView
+
+from .facet_counts import FACETS, facet_query_term
+
+# Item data role holding the search term of a value item
+TERM_ROLE = Qt.ItemDataRole.UserRole
+
+
+class FacetPanel(QDockWidget):
+    """
+    Side panel with the number of matches per band, mode, country, CQ zone and
+    year for the current filter. Clicking a value emits filter_requested with
+    the matching search term (e.g. band:20M), which the main window adds to
+    the search box.
+    """
+
+    filter_requested = Signal(str)
+
+    def __init__(self, parent=None):
+        super().__init__("Facets", parent)
+        self.setObjectName("dock_facets")
+        self.setAllowedAreas(Qt.DockWidgetArea.LeftDockWidgetArea | Qt.DockWidgetArea.RightDockWidgetArea)
+
+        self.tree = QTreeWidget(self)
+        self.tree.setColumnCount(2)
+        self.tree.setHeaderLabels(["Value", "QSOs"])
+        self.tree.setRootIsDecorated(True)
+        self.tree.setUniformRowHeights(True)
+        self.tree.header().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        self.tree.header().setSectionResizeMode(1, QHeaderView.ResizeMode.ResizeToContents)
+        self.tree.header().setStretchLastSection(False)
+        self.tree.itemActivated.connect(self._on_item_activated)
+        self.tree.itemClicked.connect(self._on_item_activated)
+        self.setWidget(self.tree)
+
+        # One group item per facet, filled by show_counts()
+        self._groups: dict[str, QTreeWidgetItem] = {}
+        for facet, (label, _expression, _field) in FACETS.items():
+            group = QTreeWidgetItem(self.tree, [label, ""])
+            group.setFlags(Qt.ItemFlag.ItemIsEnabled)
+            self._groups[facet] = group
+        self.set_counting()
+
+    def set_counting(self):
+        """Marks the counts as outdated while the worker computes new ones."""
+        for group in self._groups.values():
+            group.setText(1, "...")
+
+    @Slot(dict)
+    def show_counts(self, counts: dict):
+        """counts: {facet: [(value, count), ...]} from FacetCountsController."""
+        for facet, group in self._groups.items():
+            expanded = group.isExpanded()
+            group.takeChildren()
+            rows = counts.get(facet, [])
+            for value, count in rows:
+                text = "(empty)" if value is None or str(value).strip() == '' else str(value)
+                item = QTreeWidgetItem(group, [text, str(count)])
+                item.setTextAlignment(1, Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+                term = facet_query_term(facet, value)
+                if term is None:
+                    # Not expressible as a search term, count only
+                    item.setFlags(Qt.ItemFlag.ItemIsEnabled)
+                else:
+                    item.setData(0, TERM_ROLE, term)
+                    item.setToolTip(0, f"Add '{term}' to the search")
+            group.setText(1, "")
+            group.setExpanded(expanded)
+
+    @Slot(QTreeWidgetItem, int)
+    def _on_item_activated(self, item: QTreeWidgetItem, column: int):
+        term = item.data(0, TERM_ROLE)
+        if term:
+            self.filter_requested.emit(term)
@@ -0,0 +1,137 @@
+import sqlite3
+
+from .search_query import SEARCHABLE_COLUMNS, escape_like, LIKE_ESCAPE
+
+# FTS5 external-content table over eqsl_data (the text is not stored twice,
+# only the trigram index). Kept in sync by triggers.
+FTS_TABLE = "eqsl_fts"
+
+# Columns indexed in the full-text table: the requested text columns plus the
+# other columns of the main search box, so the whole search is index based
+FTS_COLUMNS = [
+    'CALL', 'COUNTRY', 'NAME', 'QTH', 'GRIDSQUARE', 'SOTA_REF', 'POTA_REF', 'IOTA_REF',
+    'QSO_DATE', 'TIME_ON', 'BAND', 'MODE', 'SUBMODE', 'FREQ', 'CQZ', 'ITUZ'
+]
+
+# The trigram tokenizer can only match terms with at least 3 characters
+MIN_TERM_LENGTH = 3
+
+
+def fts5_trigram_available(conn: sqlite3.Connection) -> bool:
+    """Checks if the SQLite library supports FTS5 with the trigram tokenizer (SQLite >= 3.34)."""
+    try:
+        conn.execute("CREATE VIRTUAL TABLE temp.fts_probe USING fts5(x, tokenize='trigram')")
+        conn.execute("DROP TABLE temp.fts_probe")
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+
+def has_fulltext_index(conn: sqlite3.Connection) -> bool:
+    """True if the full-text table exists in the database."""
+    row = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (FTS_TABLE,)).fetchone()
+    return row is not None
+
+
+def ensure_fulltext_index(conn: sqlite3.Connection, table_name: str = "eqsl_data") -> bool:
+    """
+    Creates the FTS5 table and its sync triggers and fills it once from the existing data.
+    Returns False if FTS5/trigram is not available (the search then falls back to LIKE).
+    """
+    if has_fulltext_index(conn):
+        return True
+    if not fts5_trigram_available(conn):
+        print("[WARNING] SQLite without FTS5 trigram support, full-text index not created.")
+        return False
+
+    columns = ', '.join(FTS_COLUMNS)
+    new_values = ', '.join(f"new.{col}" for col in FTS_COLUMNS)
+    old_values = ', '.join(f"old.{col}" for col in FTS_COLUMNS)
+
+    conn.executescript(f"""
+    BEGIN;
+    CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+        {columns},
+        content='{table_name}',
+        content_rowid='qso_id',
+        tokenize='trigram'
+    );
+
+    CREATE TRIGGER {FTS_TABLE}_ai AFTER INSERT ON {table_name} BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, {columns}) VALUES (new.qso_id, {new_values});
+    END;
+
+    CREATE TRIGGER {FTS_TABLE}_ad AFTER DELETE ON {table_name} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {columns}) VALUES ('delete', old.qso_id, {old_values});
+    END;
+
+    -- Only text changes touch the index, image updates do not
+    CREATE TRIGGER {FTS_TABLE}_au AFTER UPDATE OF {columns} ON {table_name} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {columns}) VALUES ('delete', old.qso_id, {old_values});
+        INSERT INTO {FTS_TABLE}(rowid, {columns}) VALUES (new.qso_id, {new_values});
+    END;
+
+    INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild');
+    COMMIT;
+    """)
+    print(f"[INFO] Full-text index {FTS_TABLE} created.")
+    return True
+
+
+def build_ranked_select(table_name: str, select_list: str, filter_sql: str, match_sql: str) -> str:
+    """
+    SELECT of the rows matching an FTS5 query, best hits first (bm25 rank).
+    'match_sql' is the query as placeholder or SQL literal, 'filter_sql' an optional
+    additional condition on the table.
+    """
+    statement = (f"SELECT {select_list} FROM "
+                 f"(SELECT rowid AS fts_rowid, rank AS fts_rank FROM {FTS_TABLE} "
+                 f"WHERE {FTS_TABLE} MATCH {match_sql}) AS fts "
+                 f"JOIN {table_name} ON {table_name}.qso_id = fts.fts_rowid")
+    if filter_sql:
+        statement += f" WHERE {filter_sql}"
+    return statement + " ORDER BY fts.fts_rank"
+
+
+def fts_phrase(term: str) -> str:
+    """Quotes a term as FTS5 string, so it is matched as substring (no query syntax)."""
+    return '"' + term.replace('"', '""') + '"'
+
+
+def build_fulltext_filter(text: str, columns: list[str] = SEARCHABLE_COLUMNS) -> dict:
+    """
+    Translates the space separated search text (OR logic) into SQL using the full-text index.
+
+    Returns a dict with
+      'where':  parameterized condition for eqsl_data (empty if there is nothing to filter)
+      'params': parameters of 'where'
+      'match':  FTS5 query of all terms (None if a term is too short for the trigram
+                index; those terms are searched with LIKE and the result is not ranked)
+    """
+    terms = [term.strip() for term in text.split() if term.strip()]
+    if not terms:
+        return {'where': "", 'params': [], 'match': None}
+
+    long_terms = [term for term in terms if len(term) >= MIN_TERM_LENGTH]
+    short_terms = [term for term in terms if len(term) < MIN_TERM_LENGTH]
+
+    conditions = []
+    params = []
+    match_query = None
+
+    if long_terms:
+        match_query = " OR ".join(fts_phrase(term) for term in long_terms)
+        conditions.append(f"qso_id IN (SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH ?)")
+        params.append(match_query)
+
+    for term in short_terms:
+        pattern = f"%{escape_like(term)}%"
+        for column in columns:
+            conditions.append(f"{column} LIKE ? ESCAPE '{LIKE_ESCAPE}'")
+            params.append(pattern)
+
+    return {
+        'where': "(" + " OR ".join(conditions) + ")",
+        'params': params,
+        'match': match_query if not short_terms else None
+    }
@@ -31,7 +31,7 @@ from gui_data.frm_bulk_card_import_ui import Ui_frm_bulk_card_import
 # Importing the logic managers
 from .settings_manager import SettingsManager 
 from .adif_importer import AdifImporter
-from .qsl_image_importer import QslImageImporter 
+from .qsl_image_importer import QslImageImporter, DEFAULT_TIME_TOLERANCE_MINUTES
 from .qsl_single_image_importer import QslSingleImageImporter 
 
 # ----------------------------------------------------
@@ -42,7 +42,7 @@ class EqslSettingsWindow(QDialog):
     new_db_selected = Signal(str)
     existing_db_selected = Signal(str)
     new_download_dir_selected = Signal(str) 
-    adif_import_requested = Signal(str)
+    adif_import_requested = Signal(str, bool)    # path, bulk-load mode
     new_adif_selected = Signal(str)
 
     def __init__(self, settings_manager: SettingsManager, parent: Optional[QWidget] = None):
@@ -204,7 +204,8 @@ class EqslSettingsWindow(QDialog):
             QMessageBox.warning(self, "Import Error", "Please select a valid ADIF file first.")
             return
 
-        self.adif_import_requested.emit(self.selected_adif_path)
+        bulk = hasattr(self.ui, 'chk_bulk_adif') and self.ui.chk_bulk_adif.isChecked()
+        self.adif_import_requested.emit(self.selected_adif_path, bulk)
 
 
 class EqslSingleImportWindow(QDialog): 
@@ -333,7 +334,11 @@ class EqslSingleImportWindow(QDialog):
 class EqslBulkImportWindow(QDialog): 
     new_bulk_card_dir_selected = Signal(str)
     bulk_card_dir_reset = Signal()
-    bulk_card_import_requested = Signal(str)
+    bulk_card_import_requested = Signal(str, bool)    # folder, bulk-load mode
+    bulk_card_plan_requested = Signal(str)
+
+    # Filenames listed per category in the plan view
+    PLAN_LIST_LIMIT = 500
     
     def __init__(self, settings_manager: SettingsManager, parent: Optional[QWidget] = None): 
         super().__init__(parent)
@@ -363,6 +368,9 @@ class EqslBulkImportWindow(QDialog):
                 self.ui.txt_path_bulkcard.setText("Please select the folder for QSL images...")
             self.ui.txt_path_bulkcard.setReadOnly(True)
 
+        # A plan belongs to one folder, a new folder needs a new plan
+        self.clear_plan()
+
     def _setup_connections(self):
         if hasattr(self.ui, 'btn_cancel_frm_bulk_import'):
             self.ui.btn_cancel_frm_bulk_import.clicked.connect(self.close)
@@ -375,6 +383,9 @@ class EqslBulkImportWindow(QDialog):
             
         if hasattr(self.ui, 'btn_import_bulkcard'):
             self.ui.btn_import_bulkcard.clicked.connect(self._handle_import_request)
+
+        if hasattr(self.ui, 'btn_plan_bulkcard'):
+            self.ui.btn_plan_bulkcard.clicked.connect(self._handle_plan_request)
             
     @Slot()
     def _open_select_dir_dialog(self):
@@ -403,9 +414,8 @@ class EqslBulkImportWindow(QDialog):
         self.bulk_card_dir_reset.emit()
         self._setup_ui_state()
 
-    @Slot()
-    def _handle_import_request(self):
-        """Starts the import process if a valid path is set. (KORREKTUR: Nur Signal senden)"""
+    def _selected_dir(self) -> str:
+        """The card folder from the settings, or "" (with a warning) if it is not valid."""
         try:
             current_dir = self.settings_manager.get_bulk_card_dir()
         except AttributeError:
@@ -413,10 +423,61 @@ class EqslBulkImportWindow(QDialog):
         
         if not current_dir or not os.path.isdir(current_dir):
             QMessageBox.warning(self, "Import error", "Please select a valid directory first.")
-            return
+            return ""
+        return current_dir
 
-        # Die Importlogik wurde in den GuiManager verschoben. Hier nur das Signal senden.
-        self.bulk_card_import_requested.emit(current_dir)
+    @Slot()
+    def _handle_import_request(self):
+        """Starts the import process if a valid path is set. (KORREKTUR: Nur Signal senden)"""
+        current_dir = self._selected_dir()
+        if current_dir:
+            # Die Importlogik wurde in den GuiManager verschoben. Hier nur das Signal senden.
+            bulk = hasattr(self.ui, 'chk_bulk_cards') and self.ui.chk_bulk_cards.isChecked()
+            self.bulk_card_import_requested.emit(current_dir, bulk)
+
+    @Slot()
+    def _handle_plan_request(self):
+        """Dry run: the GuiManager matches the cards and passes the plan to show_plan()."""
+        current_dir = self._selected_dir()
+        if current_dir:
+            self.bulk_card_plan_requested.emit(current_dir)
+
+    def _plan_list(self, title: str, entries: list[str]) -> list[str]:
+        if not entries:
+            return []
+        lines = ["", f"{title} ({len(entries)}):"]
+        lines += [f"  {entry}" for entry in entries[:self.PLAN_LIST_LIMIT]]
+        if len(entries) > self.PLAN_LIST_LIMIT:
+            lines.append(f"  ... and {len(entries) - self.PLAN_LIST_LIMIT} more")
+        return lines
+
+    def show_plan(self, plan: dict):
+        """Shows the counts and file lists of a plan (QslImageImporter.plan_import)."""
+        if not hasattr(self.ui, 'txt_plan_bulkcard'):
+            return
+        lines = [
+            f"Plan for {plan['directory']} ({plan['elapsed']:.2f} s), nothing written yet:",
+            f"Cards to import: {len(plan['matches'])} of {plan['total_files']} files",
+            f"QSO already has an image: {len(plan['already_present'])}, "
+            f"second card for the same QSO: {len(plan['duplicates'])}",
+            f"QSO not found: {len(plan['not_found'])}",
+            f"Ambiguous (several QSOs equally near the card time, not imported): {len(plan['ambiguous'])}",
+            f"Filenames not recognized: {len(plan['parse_error'])}",
+        ]
+        if plan['error']:
+            lines.append(f"Error: {plan['error']}")
+        lines += self._plan_list("Ambiguous", [
+            f"{filename}  ->  QSOs at TIME_ON {', '.join(time_on for _qso_id, time_on in candidates)}"
+            for filename, candidates in plan['ambiguous']])
+        lines += self._plan_list("QSO not found", plan['not_found'])
+        lines += self._plan_list("Filenames not recognized", plan['parse_error'])
+        lines += self._plan_list("Second card for the same QSO", plan['duplicates'])
+        self.ui.txt_plan_bulkcard.setPlainText("\n".join(lines))
+
+    def clear_plan(self):
+        """Empties the plan view (after an import or when the folder changes)."""
+        if hasattr(self.ui, 'txt_plan_bulkcard'):
+            self.ui.txt_plan_bulkcard.clear()
 
 
 class EqslHelpWindow(QDialog): 
@@ -582,7 +643,8 @@ class EqslVersionWindow(QDialog):
 class GuiManager(QObject): 
     """Manages instances of all secondary windows and the logic managers."""
     
-    qso_data_updated = Signal(int)
+    # ROWIDs of the inserted/changed QSOs (the main window updates only these rows)
+    qso_data_updated = Signal(list)
 
     # CORRECTED __init__
     def __init__(self, db_conn=None, settings_manager=None, main_window: Optional['QMainWindow'] = None, parent=None):
@@ -599,6 +661,8 @@ class GuiManager(QObject):
         self.settings_window: Optional['EqslSettingsWindow'] = None 
         self.single_import_window: Optional['EqslSingleImportWindow'] = None
         self.bulk_import_window: Optional['EqslBulkImportWindow'] = None
+        # Last dry run of the bulk card import (applied by the next import of the same folder)
+        self.bulk_plan: Optional[dict] = None
         self.help_window: Optional['EqslHelpWindow'] = None 
         self.version_window: Optional['EqslVersionWindow'] = None 
         
@@ -623,13 +687,14 @@ class GuiManager(QObject):
         self.adif_importer.db_filepath = db_path
         self.image_importer.db_filepath = db_path
         self.single_image_importer.db_filepath = db_path 
+        self.bulk_plan = None
         print(f"GuiManager: DB path for importers updated to: {db_path}")
         
-    @Slot(str)
-    def _handle_adif_import_from_settings(self, adif_filepath: str):
+    @Slot(str, bool)
+    def _handle_adif_import_from_settings(self, adif_filepath: str, bulk: bool = False):
         """
         Internal method called by the SettingsWindow 
-        to start the import via the AdifImporter.
+        to start the import via the AdifImporter (bulk: bulk-load mode, see bulk_load).
         """
         db_path = self.settings_manager.get_current_db_path()
         
@@ -643,9 +708,9 @@ class GuiManager(QObject):
              
         self.adif_importer.db_filepath = db_path 
 
-        new_records = self.adif_importer.import_adif_file(adif_filepath)
+        self.adif_importer.import_adif_file(adif_filepath, bulk=bulk)
         
-        self.qso_data_updated.emit(new_records)
+        self.qso_data_updated.emit(self.adif_importer.last_inserted_rowids)
         
     # KORREKTUR 2: Optional[int] durch object ersetzen
     @Slot(str, str, str, str, str, object)
@@ -672,9 +737,15 @@ class GuiManager(QObject):
             if self.single_import_window is not None:
                 self.single_import_window.close()
             
-            if results.get('success'):
-                self.qso_data_updated.emit(1)
+            if results.get('qso_id') is not None:
+                self.qso_data_updated.emit([results['qso_id']])
                 
+        elif results.get('busy'):
+             QMessageBox.information(
+                 self.single_import_window, 
+                 "Database busy", 
+                 f"{results['message']}\n\nDetails: {results['reason']}"
+             )
         else:
              QMessageBox.warning(
                  self.single_import_window, 
@@ -682,10 +753,10 @@ class GuiManager(QObject):
                  f"{results['message']}\n\nDetails: {results['reason']}"
              )
 
-    @Slot(str)
-    def _handle_bulk_card_import_request(self, dir_path: str):
+    @Slot(str, bool)
+    def _handle_bulk_card_import_request(self, dir_path: str, bulk: bool = False):
         """
-        Performs the actual bulk import of images.
+        Performs the actual bulk import of images (bulk: bulk-load mode, see bulk_load).
         """
         db_path = self.settings_manager.get_current_db_path()
         
@@ -696,8 +767,16 @@ class GuiManager(QObject):
         QMessageBox.information(self.bulk_import_window, "Bulk Import started", f"Starting import of images from:\n{dir_path}")
         
         self.image_importer.db_filepath = db_path 
+        self.image_importer.time_tolerance_minutes = self.settings_manager.settings.get(
+            "card_time_tolerance_minutes", DEFAULT_TIME_TOLERANCE_MINUTES)
 
-        results: dict[str, Union[str, int, bool]] = self.image_importer.bulk_import_images(dir_path)
+        # Commit step: applies the plan shown in the window (or plans the folder now)
+        plan, self.bulk_plan = self.bulk_plan, None
+        if plan is None or plan['directory'] != dir_path:
+            plan = self.image_importer.plan_import(dir_path)
+        results: dict[str, Union[str, int, bool]] = self.image_importer.apply_plan(plan, bulk)
+        if self.bulk_import_window is not None:
+            self.bulk_import_window.clear_plan()
         
         # Show the results
         if results.get('imported', 0) > 0:
@@ -708,9 +787,10 @@ class GuiManager(QObject):
                 f"Total files: {results.get('total_files', 0)}\n"
                 f"New images imported: {results.get('imported', 0)}\n"
                 f"Images already present: {results.get('already_present', 0)}\n"
+                f"QSO not found: {results.get('not_found', 0)}, ambiguous: {results.get('ambiguous', 0)}\n"
                 f"Errors (parsing/file): {results.get('parse_error', 0) + results.get('file_error', 0)}"
             )
-            self.qso_data_updated.emit(results['imported']) # type: ignore
+            self.qso_data_updated.emit(results['rowids']) # type: ignore
         else:
              QMessageBox.warning(
                  self.bulk_import_window, 
@@ -719,9 +799,24 @@ class GuiManager(QObject):
                  f"Details:\n"
                  f"Total files: {results.get('total_files', 0)}\n"
                  f"Images already present: {results.get('already_present', 0)}\n"
-                 f"QSO not found: {results.get('not_found', 0)}"
+                 f"QSO not found: {results.get('not_found', 0)}, ambiguous: {results.get('ambiguous', 0)}"
              )
 
+    @Slot(str)
+    def _handle_bulk_card_plan_request(self, dir_path: str):
+        """Dry run of the bulk import: matches all cards of the folder and shows the plan, nothing is written."""
+        db_path = self.settings_manager.get_current_db_path()
+
+        if not db_path:
+            QMessageBox.critical(self.bulk_import_window, "Import Error", "No database selected. Plan aborted.")
+            return
+
+        self.image_importer.db_filepath = db_path
+        self.image_importer.time_tolerance_minutes = self.settings_manager.settings.get(
+            "card_time_tolerance_minutes", DEFAULT_TIME_TOLERANCE_MINUTES)
+        self.bulk_plan = self.image_importer.plan_import(dir_path)
+        self.bulk_import_window.show_plan(self.bulk_plan)
+
 
     # --- OPPENING-SLOTS (MODAL) ---
 
@@ -801,8 +896,12 @@ class GuiManager(QObject):
             self.bulk_import_window.bulk_card_import_requested.connect(
                 self._handle_bulk_card_import_request
             )
+            self.bulk_import_window.bulk_card_plan_requested.connect(
+                self._handle_bulk_card_plan_request
+            )
             
         # KORRIGIERTE EINRÜCKUNG: Diese Zeilen müssen auf derselben Ebene wie der 'if'-Block sein.
+        self.bulk_plan = None
         self.bulk_import_window._setup_ui_state()
         self.bulk_import_window.exec() 
 
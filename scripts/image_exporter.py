@@ -0,0 +1,364 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from PySide6.QtCore import QObject, Signal, Slot, QBuffer, QByteArray, QIODevice
+from PySide6.QtGui import QImage
+
+from .blob_io import open_image_blob, copy_blob_to_stream, read_blob_header
+from .db_federation import Federation
+
+
+# Magic bytes of the image formats that can end up in EQSL_IMAGE_BLOB
+IMAGE_SIGNATURES = [
+    (b'\xff\xd8\xff', 'jpg'),
+    (b'\x89PNG\r\n\x1a\n', 'png'),
+    (b'GIF87a', 'gif'),
+    (b'GIF89a', 'gif'),
+    (b'BM', 'bmp'),
+]
+
+# Formats that are written unchanged (no decoding / re-encoding)
+PASS_THROUGH_FORMATS = {'jpg', 'png'}
+
+# Target format for everything else
+CONVERSION_FORMAT = 'png'
+
+
+def _open_job_blob(conn: sqlite3.Connection, federation: Federation, rowid: int):
+    """Image BLOB of a job, opened in the database of the row (schema of a federated set)."""
+    try:
+        schema, qso_id = federation.locate(rowid)
+    except KeyError:
+        return None
+    return open_image_blob(conn, federation.table_name, qso_id, schema=schema)
+
+
+def sniff_image_format(header: bytes) -> str | None:
+    """Returns the file extension matching the first bytes of an image BLOB, or None."""
+    if not header:
+        return None
+    for signature, extension in IMAGE_SIGNATURES:
+        if header.startswith(signature):
+            return extension
+    if header[:4] == b'RIFF' and header[8:12] == b'WEBP':
+        return 'webp'
+    return None
+
+
+def build_export_filename(call, date, time_on, band, mode) -> str:
+    """Creates the sanitized base filename {call}_{date}_{time}_{band}_{mode} (without extension)."""
+    filename_base = f"{call}_{date}_{time_on}_{band}_{mode}"
+    return re.sub(r'[^\w\-]', '_', str(filename_base))
+
+
+def convert_image(blob_data: bytes, file_path: str) -> int:
+    """Decodes the BLOB and saves it in CONVERSION_FORMAT. Returns bytes written (0 on error)."""
+    # QImage (unlike QPixmap) may be used outside the GUI thread
+    image = QImage()
+    if not image.loadFromData(blob_data):
+        return 0
+    if not image.save(file_path, CONVERSION_FORMAT.upper()):
+        return 0
+    return os.path.getsize(file_path)
+
+
+class ImageExportWorker(QObject):
+    """
+    Exports the images of the given QSO entries into a folder.
+    Runs in its own QThread: JPEG/PNG BLOBs are streamed unchanged from the
+    database into their files here, format conversions (which need the whole
+    image decoded anyway) are distributed over a thread pool.
+    """
+
+    progress = Signal(int, int)     # processed, total
+    finished = Signal(dict)         # export report
+
+    def __init__(self, db_filepath: str, jobs: list[dict], target_dir: str,
+                 table_name: str = "eqsl_data", max_workers: int | None = None,
+                 federation: Federation | None = None):
+        """
+        :param jobs: list of dicts with 'rowid', 'call', 'date', 'time', 'band', 'mode'
+        :param federation: database set the rowids refer to (default: db_filepath alone)
+        """
+        super().__init__()
+        self.db_filepath = db_filepath
+        self.jobs = jobs
+        self.target_dir = target_dir
+        self.table_name = table_name
+        self.federation = federation or Federation(db_filepath, table_name=table_name)
+        self.max_workers = max_workers or min(8, (os.cpu_count() or 2))
+        self._cancel_event = threading.Event()
+
+    def cancel(self):
+        """Requests cancellation; may be called from any thread."""
+        self._cancel_event.set()
+
+    @Slot()
+    def run(self):
+        results = {
+            'total': len(self.jobs),
+            'exported': 0,
+            'passed_through': 0,
+            'converted': 0,
+            'no_image': 0,
+            'failed': 0,
+            'bytes_written': 0,
+            'elapsed': 0.0,
+            'files_per_second': 0.0,
+            'cancelled': False,
+            'destination': self.target_dir
+        }
+        start_time = time.perf_counter()
+        processed = 0
+        conn = None
+
+        try:
+            conn = self.federation.acquire_reader()
+
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                pending = {}
+                # Limit the BLOBs held in memory by the queued conversions
+                max_pending = self.max_workers * 2
+
+                for job in self.jobs:
+                    if self._cancel_event.is_set():
+                        results['cancelled'] = True
+                        break
+
+                    blob = _open_job_blob(conn, self.federation, job['rowid'])
+                    if blob is None or len(blob) == 0:
+                        results['no_image'] += 1
+                        processed += 1
+                        self.progress.emit(processed, results['total'])
+                        continue
+
+                    with blob:
+                        image_format = sniff_image_format(read_blob_header(blob))
+                        base_name = build_export_filename(job['call'], job['date'], job['time'], job['band'], job['mode'])
+
+                        if image_format in PASS_THROUGH_FORMATS:
+                            file_path = os.path.join(self.target_dir, f"{base_name}.{image_format}")
+                            try:
+                                with open(file_path, 'wb') as f:
+                                    bytes_written = copy_blob_to_stream(blob, f)
+                                results['exported'] += 1
+                                results['passed_through'] += 1
+                                results['bytes_written'] += bytes_written
+                            except OSError as e:
+                                print(f"ImageExportWorker: Error writing file: {e}")
+                                results['failed'] += 1
+                            processed += 1
+                            self.progress.emit(processed, results['total'])
+                            continue
+
+                        file_path = os.path.join(self.target_dir, f"{base_name}.{CONVERSION_FORMAT}")
+                        future = pool.submit(convert_image, blob.read(), file_path)
+                        pending[future] = 'converted'
+
+                    if len(pending) >= max_pending:
+                        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                        processed += self._collect(done, pending, results)
+                        self.progress.emit(processed, results['total'])
+
+                if results['cancelled']:
+                    for future in pending:
+                        future.cancel()
+
+                done, _ = wait(pending)
+                processed += self._collect(done, pending, results)
+                self.progress.emit(processed, results['total'])
+
+        except (sqlite3.Error, OSError) as e:
+            print(f"ImageExportWorker: Export aborted: {e}")
+            results['failed'] += results['total'] - processed
+        finally:
+            if conn:
+                self.federation.release_reader(conn)
+
+        results['elapsed'] = time.perf_counter() - start_time
+        if results['elapsed'] > 0:
+            results['files_per_second'] = results['exported'] / results['elapsed']
+
+        print(f"ImageExportWorker: {results['exported']} files, {results['bytes_written']} bytes "
+              f"in {results['elapsed']:.2f} s ({results['files_per_second']:.1f} files/s).")
+        self.finished.emit(results)
+
+    def _collect(self, done, pending: dict, results: dict) -> int:
+        """Evaluates finished tasks, removes them from 'pending' and returns their count."""
+        for future in done:
+            kind = pending.pop(future)
+            if future.cancelled():
+                continue
+            try:
+                bytes_written = future.result()
+            except OSError as e:
+                print(f"ImageExportWorker: Error writing file: {e}")
+                bytes_written = 0
+
+            if bytes_written > 0:
+                results['exported'] += 1
+                results[kind] += 1
+                results['bytes_written'] += bytes_written
+            else:
+                results['failed'] += 1
+        return len(done)
+
+
+class ZipExportWorker(QObject):
+    """
+    Streams the images of the given QSO entries into one ZIP archive.
+    Each BLOB is read in chunks via blobopen (blob_io) and written directly into
+    its archive entry, so no card is buffered in memory as a whole.
+    JPEG/PNG data is stored (ZIP_STORED), other formats are deflated.
+    Archives larger than 4 GB are written as ZIP64.
+    """
+
+    progress = Signal(int, int)     # processed, total
+    finished = Signal(dict)         # export report
+
+    def __init__(self, db_filepath: str, jobs: list[dict], zip_path: str, table_name: str = "eqsl_data",
+                 federation: Federation | None = None):
+        """
+        :param jobs: list of dicts with 'rowid', 'call', 'date', 'time', 'band', 'mode'
+        :param federation: database set the rowids refer to (default: db_filepath alone)
+        """
+        super().__init__()
+        self.db_filepath = db_filepath
+        self.jobs = jobs
+        self.zip_path = zip_path
+        self.table_name = table_name
+        self.federation = federation or Federation(db_filepath, table_name=table_name)
+        self._cancel_event = threading.Event()
+
+    def cancel(self):
+        """Requests cancellation; may be called from any thread."""
+        self._cancel_event.set()
+
+    @Slot()
+    def run(self):
+        results = {
+            'total': len(self.jobs),
+            'exported': 0,
+            'passed_through': 0,
+            'converted': 0,
+            'no_image': 0,
+            'failed': 0,
+            'bytes_written': 0,
+            'elapsed': 0.0,
+            'files_per_second': 0.0,
+            'cancelled': False,
+            'destination': self.zip_path
+        }
+        start_time = time.perf_counter()
+        # Write to a temporary file first, so a cancelled export leaves no broken archive
+        part_path = self.zip_path + ".part"
+        used_names: set[str] = set()
+        conn = None
+
+        try:
+            conn = self.federation.acquire_reader()
+
+            with zipfile.ZipFile(part_path, 'w', allowZip64=True) as archive:
+                for processed, job in enumerate(self.jobs, start=1):
+                    if self._cancel_event.is_set():
+                        results['cancelled'] = True
+                        break
+
+                    base_name = build_export_filename(job['call'], job['date'], job['time'], job['band'], job['mode'])
+                    try:
+                        entry_kind = self._write_entry(conn, archive, job['rowid'], base_name, used_names, results)
+                    except (sqlite3.Error, OSError) as e:
+                        print(f"ZipExportWorker: Error exporting ROWID {job['rowid']}: {e}")
+                        entry_kind = 'failed'
+
+                    results[entry_kind] += 1
+                    if entry_kind in ('passed_through', 'converted'):
+                        results['exported'] += 1
+                    self.progress.emit(processed, results['total'])
+
+            if results['cancelled']:
+                os.remove(part_path)
+            else:
+                os.replace(part_path, self.zip_path)
+                results['bytes_written'] = os.path.getsize(self.zip_path)
+
+        except (sqlite3.Error, OSError, zipfile.LargeZipFile) as e:
+            print(f"ZipExportWorker: Export aborted: {e}")
+            results['failed'] = results['total'] - results['exported'] - results['no_image']
+            results['exported'] = 0
+            if os.path.exists(part_path):
+                os.remove(part_path)
+        finally:
+            if conn:
+                self.federation.release_reader(conn)
+
+        results['elapsed'] = time.perf_counter() - start_time
+        if results['elapsed'] > 0:
+            results['files_per_second'] = results['exported'] / results['elapsed']
+
+        print(f"ZipExportWorker: {results['exported']} entries, {results['bytes_written']} bytes "
+              f"in {results['elapsed']:.2f} s ({results['files_per_second']:.1f} files/s).")
+        self.finished.emit(results)
+
+    def _write_entry(self, conn: sqlite3.Connection, archive: zipfile.ZipFile, rowid: int,
+                     base_name: str, used_names: set, results: dict) -> str:
+        """Writes one card into the archive and returns the result key for the report."""
+        blob = _open_job_blob(conn, self.federation, rowid)
+        if blob is None:
+            # NULL (no image) or ROWID no longer present
+            return 'no_image'
+
+        with blob:
+            blob_size = len(blob)
+            if blob_size == 0:
+                return 'no_image'
+
+            image_format = sniff_image_format(read_blob_header(blob))
+
+            if image_format is None:
+                # Unknown format: decode and store as PNG (needs the complete BLOB in memory)
+                image = QImage()
+                if not image.loadFromData(blob.read()):
+                    return 'failed'
+                entry_name = self._unique_name(base_name, CONVERSION_FORMAT, used_names)
+                data = self._encode_image(image)
+                if not data:
+                    return 'failed'
+                archive.writestr(entry_name, data, compress_type=zipfile.ZIP_STORED)
+                return 'converted'
+
+            entry_name = self._unique_name(base_name, image_format, used_names)
+            info = zipfile.ZipInfo(entry_name, date_time=time.localtime()[:6])
+            info.compress_type = zipfile.ZIP_STORED if image_format in PASS_THROUGH_FORMATS else zipfile.ZIP_DEFLATED
+            # Known size up front lets zipfile decide about ZIP64 for the entry
+            info.file_size = blob_size
+
+            with archive.open(info, 'w') as entry:
+                copy_blob_to_stream(blob, entry)
+        return 'passed_through'
+
+    @staticmethod
+    def _unique_name(base_name: str, extension: str, used_names: set) -> str:
+        """Returns an archive entry name that is not used yet (appends _2, _3, ...)."""
+        entry_name = f"{base_name}.{extension}"
+        counter = 2
+        while entry_name in used_names:
+            entry_name = f"{base_name}_{counter}.{extension}"
+            counter += 1
+        used_names.add(entry_name)
+        return entry_name
+
+    @staticmethod
+    def _encode_image(image: QImage) -> bytes:
+        """Encodes a QImage as CONVERSION_FORMAT and returns the bytes."""
+        buffer_data = QByteArray()
+        buffer = QBuffer(buffer_data)
+        buffer.open(QIODevice.OpenModeFlag.WriteOnly)
+        image.save(buffer, CONVERSION_FORMAT.upper())
+        buffer.close()
+        return bytes(buffer_data.data())
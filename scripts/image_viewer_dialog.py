@@ -1,24 +1,34 @@
 import sys
-from PySide6.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QSizePolicy
-from PySide6.QtGui import QPixmap
-from PySide6.QtCore import Qt, QByteArray
+from PySide6.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QPushButton, QLabel
+from PySide6.QtCore import Qt, QByteArray, QThread, Signal, Slot
+
+from .tiled_image_view import TiledImageView, TilePyramid, PyramidLoader, pyramid_cache
 
 class ImageViewerDialog(QDialog):
-    """Displays a list of images (as QByteArray) in a clickable gallery."""
-    def __init__(self, image_data_list: list[QByteArray], parent=None):
+    """
+    Displays a list of images in a clickable gallery with zoom and pan.
+    Each entry is a tuple (rowid, QByteArray); the rowid keys the tile cache.
+    Images not in the cache are decoded by a PyramidLoader thread.
+    """
+
+    # Internal: queued call into the loader thread
+    _load_requested = Signal(int, int, object)
+
+    def __init__(self, image_data_list: list[tuple[int, QByteArray]], parent=None):
         super().__init__(parent)
         self.setWindowTitle("eQSL Gallery View")
         self.image_data_list = image_data_list
         self.current_index = 0
+        self.generation = 0
         
         # --- UI Elements ---
-        self.image_label = QLabel()
-        self.image_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.image_label.setScaledContents(True)
-        self.image_label.setSizePolicy(QSizePolicy.Policy.Ignored, QSizePolicy.Policy.Ignored)
-        self.image_label.setMinimumSize(700, 400)
+        self.image_view = TiledImageView()
+        self.image_view.setMinimumSize(700, 400)
+        self.status_label = QLabel()
+        self.status_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         
         self.prev_button = QPushButton("<- Back")
+        self.fit_button = QPushButton("Fit")
         self.next_button = QPushButton("Next ->")
         self.counter_label = QLabel()
         self.counter_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
@@ -27,39 +37,48 @@ class ImageViewerDialog(QDialog):
         button_layout = QHBoxLayout()
         button_layout.addWidget(self.prev_button)
         button_layout.addWidget(self.counter_label)
+        button_layout.addWidget(self.fit_button)
         button_layout.addWidget(self.next_button)
         
         main_layout = QVBoxLayout(self)
-        main_layout.addWidget(self.image_label)
+        main_layout.addWidget(self.image_view)
+        main_layout.addWidget(self.status_label)
         main_layout.addLayout(button_layout)
         
         # --- Connections ---
         self.prev_button.clicked.connect(self.show_previous)
         self.next_button.clicked.connect(self.show_next)
+        self.fit_button.clicked.connect(self.image_view.fit_to_window)
+
+        # --- Loader thread ---
+        self.thread = QThread(self)
+        self.loader = PyramidLoader()
+        self.loader.moveToThread(self.thread)
+        self._load_requested.connect(self.loader.load)
+        self.loader.pyramid_ready.connect(self._on_pyramid_ready)
+        self.thread.start()
         
         self.update_viewer()
 
     def update_viewer(self):
         """Loads the current image and updates the controls."""
         if not self.image_data_list:
-            self.image_label.setText("No images available.")
+            self.status_label.setText("No images available.")
             self.prev_button.setEnabled(False)
             self.next_button.setEnabled(False)
             return
 
-        # Load QPixmap from QByteArray
-        pixmap = QPixmap()
-        blob_data = self.image_data_list[self.current_index]
-        
-        if pixmap.loadFromData(blob_data):
-            # Scales the image to the size of the label
-            self.image_label.setPixmap(pixmap.scaled(
-                self.image_label.size(), 
-                Qt.AspectRatioMode.KeepAspectRatio, 
-                Qt.TransformationMode.SmoothTransformation
-            ))
+        # Decode once into a tile pyramid (cached per rowid), then only visible tiles are drawn
+        rowid, blob_data = self.image_data_list[self.current_index]
+        self.generation += 1
+        self.loader.latest_generation = self.generation
+        pyramid = pyramid_cache.get(rowid)
+        if pyramid is not None:
+            self._show_pyramid(pyramid)
         else:
-            self.image_label.setText("Load error (Invalid image format).")
+            self.image_view.set_pyramid(None)
+            self.status_label.setText("Loading image...")
+            self._load_requested.emit(self.generation, rowid, blob_data)
         
         # Update button status and counter
         self.prev_button.setEnabled(self.current_index > 0)
@@ -76,7 +95,24 @@ class ImageViewerDialog(QDialog):
             self.current_index += 1
             self.update_viewer()
 
-    def resizeEvent(self, event):
-        """Ensures the image scales when the window size changes."""
-        super().resizeEvent(event)
-        self.update_viewer()
\ No newline at end of file
+    def _show_pyramid(self, pyramid: TilePyramid | None):
+        self.image_view.set_pyramid(pyramid)
+        if pyramid is not None:
+            self.status_label.setText(f"{pyramid.width} x {pyramid.height} px  (mouse wheel: zoom, drag: pan, double click: fit)")
+        else:
+            self.status_label.setText("Load error (Invalid image format).")
+
+    @Slot(int, int, object)
+    def _on_pyramid_ready(self, generation: int, rowid: int, pyramid: TilePyramid | None):
+        """Pyramid built by the loader: cached, and shown if the card is still the current one."""
+        if pyramid is not None:
+            pyramid_cache.put(rowid, pyramid)
+        if generation == self.generation:
+            self._show_pyramid(pyramid)
+
+    def done(self, result: int):
+        """Closing stops the loader thread (a running decode is finished first)."""
+        self.loader.latest_generation = -1
+        self.thread.quit()
+        self.thread.wait()
+        super().done(result)
@@ -0,0 +1,308 @@
+import sqlite3
+import json
+
+from PySide6.QtCore import QObject, QThread, QTimer, Signal, Slot
+
+from .db_federation import Federation
+from .fulltext_index import build_ranked_select
+from .trigram_index import TrigramIndex
+
+# Delay after the last keystroke before a search is started
+DEBOUNCE_MS = 250
+
+# Rowids delivered with page_ready (one fetch block of the table model)
+PAGE_SIZE = 256
+
+# How often (in rows) the worker checks whether its search is outdated
+CHECK_INTERVAL = 1000
+
+# Above this share of all rows the trigram candidates are not worth a lookup
+# per rowid and the LIKE condition scans the table instead
+TRIGRAM_MAX_CANDIDATE_SHARE = 0.5
+
+
+class SearchWorker(QObject):
+    """
+    Runs the main window search on its own read-only SQLite connection.
+    Lives in a QThread; every search has a generation number and results of
+    outdated generations are dropped. The controller interrupts a running
+    query (Connection.interrupt) as soon as a newer search is submitted.
+    Without FTS5 the plain term search is narrowed down by an in-memory
+    trigram index (built on the first search that needs it).
+    With a federated database set the search runs on the view of the set and
+    returns federated ids (LIKE conditions only, see EqslMainWindow).
+    """
+
+    page_ready = Signal(int, list)      # generation, first PAGE_SIZE rowids
+    results_ready = Signal(int, list)   # generation, all matching rowids (len = total count)
+    failed = Signal(int, str)           # generation, error message
+
+    def __init__(self, table_name: str = "eqsl_data"):
+        super().__init__()
+        self.table_name = table_name
+        self.db_filepath = ""
+        self.federation = Federation("", table_name=table_name)
+        self.conn: sqlite3.Connection | None = None
+        self.trigram_index: TrigramIndex | None = None
+        # Newest generation submitted by the controller (written from the GUI thread)
+        self.latest_generation = 0
+
+    def interrupt(self):
+        """Aborts the running query; may be called from any thread."""
+        conn = self.conn
+        if conn is not None:
+            conn.interrupt()
+
+    @Slot(str)
+    def set_database(self, db_filepath: str):
+        """Switches to another database; the connection is reopened with the next search."""
+        self.set_federation(Federation(db_filepath, table_name=self.table_name))
+
+    @Slot(object)
+    def set_federation(self, federation: Federation):
+        """Switches to another database set; it is attached to the connection with the next search."""
+        self._close()
+        self.trigram_index = None
+        self.federation = federation
+        self.db_filepath = federation.db_filepath
+
+    @Slot()
+    def update_index(self):
+        """
+        Adds newly imported rows to the trigram index (if it was built already).
+        Rows changed in place are reported with mark_rows_changed before; once
+        they would make the index useless as a filter, it is rebuilt.
+        """
+        if self.trigram_index is None or not self.db_filepath or self.federation.is_federated:
+            return
+        try:
+            if self.trigram_index.changed_count > self.trigram_index.row_count * TRIGRAM_MAX_CANDIDATE_SHARE:
+                self.trigram_index.load(self._connect())
+                return
+            added = self.trigram_index.add_new_rows(self._connect())
+            if added:
+                print(f"SearchWorker: {added} new rows added to the trigram index.")
+        except sqlite3.Error as e:
+            print(f"SearchWorker: Trigram index update failed: {e}")
+            self.trigram_index = None
+
+    @Slot(list)
+    def mark_rows_changed(self, rowids: list):
+        """Rows whose searchable text was edited in the table."""
+        if self.trigram_index is not None:
+            self.trigram_index.mark_changed(rowids)
+
+    @Slot()
+    def shutdown(self):
+        self._close()
+
+    def _close(self):
+        if self.conn is not None:
+            self._federation.release_reader(self.conn)
+            self.conn = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self.conn is None:
+            # Read-only: the search can never block or modify the database
+            self._federation = self.federation
+            self.conn = self._federation.acquire_reader()
+        return self.conn
+
+    def _is_outdated(self, generation: int) -> bool:
+        return generation != self.latest_generation
+
+    def _trigram_candidates(self, terms: list[str]) -> list[int] | None:
+        """Candidate rowids from the trigram index, None if the index cannot narrow the search."""
+        if self.trigram_index is None:
+            trigram_index = TrigramIndex(self.table_name)
+            trigram_index.load(self._connect())
+            self.trigram_index = trigram_index
+        candidates = self.trigram_index.lookup(terms)
+        if candidates is None or len(candidates) > self.trigram_index.row_count * TRIGRAM_MAX_CANDIDATE_SHARE:
+            return None
+        return candidates
+
+    @Slot(int, dict, str)
+    def run_search(self, generation: int, search: dict, base_filter: str):
+        """Searches the rowids for the given (already compiled) search."""
+        if self._is_outdated(generation) or not self.db_filepath:
+            return
+
+        where = search['where']
+        params = list(search['params'])
+        match = search['match']
+
+        table_name = self.federation.view_name
+        id_sql = self.federation.id_sql
+        rowids = []
+        try:
+            conn = self._connect()
+            conditions = [base_filter] if base_filter else []
+
+            if match:
+                # Ranked full-text search: the rowids arrive in relevance order
+                sql = build_ranked_select(self.table_name, f"{self.table_name}.qso_id", " AND ".join(conditions), "?")
+                query_params = [match]
+            else:
+                if search.get('terms') and not self.federation.is_federated:
+                    candidates = self._trigram_candidates(search['terms'])
+                    if candidates is not None:
+                        # Only the candidates are checked against the LIKE condition (primary key lookups)
+                        conditions.append("qso_id IN (SELECT value FROM json_each(?))")
+                        params.insert(0, json.dumps(candidates))
+                if where:
+                    conditions.append(where)
+
+                sql = f"SELECT {id_sql} FROM {table_name}"
+                if conditions:
+                    sql += f" WHERE {' AND '.join(conditions)}"
+                query_params = params
+
+            cursor = conn.execute(sql, query_params)
+
+            rowids = [row[0] for row in cursor.fetchmany(PAGE_SIZE)]
+            if self._is_outdated(generation):
+                return
+            self.page_ready.emit(generation, rowids)
+
+            if len(rowids) == PAGE_SIZE:
+                while batch := cursor.fetchmany(CHECK_INTERVAL):
+                    if self._is_outdated(generation):
+                        return
+                    rowids.extend(row[0] for row in batch)
+
+        except sqlite3.OperationalError as e:
+            if self._is_outdated(generation):
+                # Interrupted by a newer search
+                return
+            print(f"SearchWorker: Search failed: {e}")
+            self.failed.emit(generation, str(e))
+            return
+        except sqlite3.Error as e:
+            print(f"SearchWorker: Search failed: {e}")
+            self.failed.emit(generation, str(e))
+            return
+
+        if not self._is_outdated(generation):
+            self.results_ready.emit(generation, rowids)
+
+
+class LiveSearchController(QObject):
+    """
+    Search-as-you-type for the main window: debounces the submitted searches
+    and hands them to the SearchWorker thread. page_ready/results_ready are only
+    emitted for the newest search.
+    """
+
+    page_ready = Signal(int, list)
+    results_ready = Signal(int, list)
+    failed = Signal(int, str)
+
+    # Internal: queued calls into the worker thread
+    _search_requested = Signal(int, dict, str)
+    _database_changed = Signal(str)
+    _federation_changed = Signal(object)
+    _index_update_requested = Signal()
+    _rows_changed = Signal(list)
+
+    def __init__(self, db_filepath: str, base_filter: str, table_name: str = "eqsl_data", parent=None):
+        super().__init__(parent)
+        self.base_filter = base_filter
+        self.generation = 0
+        self._pending: dict | None = None
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(DEBOUNCE_MS)
+        self._timer.timeout.connect(self._start_pending)
+
+        self.thread = QThread(self)
+        self.worker = SearchWorker(table_name)
+        self.worker.set_database(db_filepath)
+        self.worker.moveToThread(self.thread)
+
+        self._search_requested.connect(self.worker.run_search)
+        self._database_changed.connect(self.worker.set_database)
+        self._federation_changed.connect(self.worker.set_federation)
+        self._index_update_requested.connect(self.worker.update_index)
+        self._rows_changed.connect(self.worker.mark_rows_changed)
+        self.worker.page_ready.connect(self._on_page_ready)
+        self.worker.results_ready.connect(self._on_results_ready)
+        self.worker.failed.connect(self._on_failed)
+        self.thread.finished.connect(self.worker.shutdown)
+
+        self.thread.start()
+
+    def submit(self, search: dict, immediate: bool = False):
+        """
+        Schedules a search (dict from build_fulltext_filter / compile_query).
+        Returns the generation number the results will carry.
+        """
+        self.generation += 1
+        self._pending = search
+        # Let a running query stop now instead of after the debounce delay
+        self.cancel_running()
+        if immediate:
+            self._timer.stop()
+            self._start_pending()
+        else:
+            self._timer.start()
+        return self.generation
+
+    def cancel(self):
+        """Drops the pending search and aborts the running one."""
+        self.generation += 1
+        self._pending = None
+        self._timer.stop()
+        self.cancel_running()
+
+    def cancel_running(self):
+        self.worker.latest_generation = self.generation
+        self.worker.interrupt()
+
+    def set_database(self, db_filepath: str):
+        self.cancel()
+        self._database_changed.emit(db_filepath)
+
+    def set_federation(self, federation: Federation):
+        """Searches a federated database set from now on (results are federated ids)."""
+        self.cancel()
+        self._federation_changed.emit(federation)
+
+    def update_index(self):
+        """New rows were imported; the worker adds them to its trigram index."""
+        self._index_update_requested.emit()
+
+    def mark_rows_changed(self, rowids: list):
+        """Searchable columns of these rows were edited."""
+        self._rows_changed.emit(list(rowids))
+
+    def shutdown(self):
+        """Stops the worker thread (call before the application quits)."""
+        self.cancel()
+        self.thread.quit()
+        self.thread.wait()
+
+    @Slot()
+    def _start_pending(self):
+        if self._pending is None:
+            return
+        search = self._pending
+        self._pending = None
+        self.worker.latest_generation = self.generation
+        self._search_requested.emit(self.generation, dict(search), self.base_filter)
+
+    @Slot(int, list)
+    def _on_page_ready(self, generation: int, rowids: list):
+        if generation == self.generation:
+            self.page_ready.emit(generation, rowids)
+
+    @Slot(int, list)
+    def _on_results_ready(self, generation: int, rowids: list):
+        if generation == self.generation:
+            self.results_ready.emit(generation, rowids)
+
+    @Slot(int, str)
+    def _on_failed(self, generation: int, message: str):
+        if generation == self.generation:
+            self.failed.emit(generation, message)
@@ -0,0 +1,194 @@
+import sqlite3
+
+from PySide6.QtCore import Qt, QThread, Slot
+from PySide6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QListWidget,
+                               QListWidgetItem, QTreeWidget, QTreeWidgetItem, QPlainTextEdit,
+                               QProgressBar, QHeaderView, QSplitter)
+
+from .connection_manager import get_manager
+from .db_maintenance import TASKS, MaintenanceWorker, database_info
+
+# Tasks checked when the dialog opens (the quick ones)
+DEFAULT_TASKS = ['optimize', 'checkpoint', 'quick_check', 'space']
+
+# Item data role holding the task name
+TASK_ROLE = Qt.ItemDataRole.UserRole
+
+
+def _megabytes(size: int) -> str:
+    return f"{size / (1024 * 1024):.1f}"
+
+
+class MaintenanceDialog(QDialog):
+    """
+    Database maintenance: runs the selected tasks of db_maintenance in a
+    background thread (cancellable) and shows page counts, free pages and the
+    space used per table and index (dbstat).
+    """
+
+    def __init__(self, db_filepath: str, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Database Maintenance")
+        self.resize(760, 620)
+        self.db_filepath = db_filepath
+        self.thread: QThread | None = None
+        self.worker: MaintenanceWorker | None = None
+
+        # --- UI Elements ---
+        self.info_label = QLabel()
+        self.info_label.setTextInteractionFlags(Qt.TextInteractionFlag.TextSelectableByMouse)
+
+        self.task_list = QListWidget()
+        for name, (label, _writes) in TASKS.items():
+            item = QListWidgetItem(label, self.task_list)
+            item.setData(TASK_ROLE, name)
+            item.setFlags(Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsUserCheckable)
+            item.setCheckState(Qt.CheckState.Checked if name in DEFAULT_TASKS else Qt.CheckState.Unchecked)
+
+        self.space_tree = QTreeWidget()
+        self.space_tree.setColumnCount(6)
+        self.space_tree.setHeaderLabels(["Table / Index", "Table", "MB", "Pages", "Overflow pages", "Unused %"])
+        self.space_tree.setRootIsDecorated(False)
+        self.space_tree.setUniformRowHeights(True)
+        self.space_tree.header().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+
+        self.log_view = QPlainTextEdit()
+        self.log_view.setReadOnly(True)
+
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setValue(0)
+
+        self.run_button = QPushButton("Run")
+        self.cancel_button = QPushButton("Cancel")
+        self.cancel_button.setEnabled(False)
+        self.close_button = QPushButton("Close")
+
+        # --- Layouts ---
+        splitter = QSplitter(Qt.Orientation.Vertical)
+        splitter.addWidget(self.task_list)
+        splitter.addWidget(self.space_tree)
+        splitter.addWidget(self.log_view)
+        splitter.setSizes([180, 260, 140])
+
+        button_layout = QHBoxLayout()
+        button_layout.addWidget(self.progress_bar)
+        button_layout.addWidget(self.run_button)
+        button_layout.addWidget(self.cancel_button)
+        button_layout.addWidget(self.close_button)
+
+        main_layout = QVBoxLayout(self)
+        main_layout.addWidget(self.info_label)
+        main_layout.addWidget(splitter)
+        main_layout.addLayout(button_layout)
+
+        # --- Connections ---
+        self.run_button.clicked.connect(self.run_tasks)
+        self.cancel_button.clicked.connect(self.cancel_tasks)
+        self.close_button.clicked.connect(self.reject)
+
+        self._show_info()
+
+    def _show_info(self, info: dict | None = None):
+        """Page counts from the database header (cheap, no page is scanned)."""
+        if info is None:
+            try:
+                with get_manager(self.db_filepath).reader() as conn:
+                    info = database_info(conn, self.db_filepath)
+            except sqlite3.Error as e:
+                self.info_label.setText(f"Database not readable: {e}")
+                return
+        self.info_label.setText(
+            f"{self.db_filepath}\n"
+            f"File: {_megabytes(info['file_bytes'])} MB, WAL: {_megabytes(info['wal_bytes'])} MB, "
+            f"{info['page_count']} pages of {info['page_size']} bytes\n"
+            f"Free pages: {info['freelist_count']} ({_megabytes(info['free_bytes'])} MB), "
+            f"auto_vacuum: {info['auto_vacuum']}")
+
+    def _show_space(self, space: list[dict]):
+        self.space_tree.clear()
+        for entry in space:
+            unused_percent = 100.0 * entry['unused'] / entry['bytes'] if entry['bytes'] else 0.0
+            item = QTreeWidgetItem(self.space_tree, [
+                entry['name'], entry['table'], _megabytes(entry['bytes']), str(entry['pages']),
+                str(entry['overflow_pages']), f"{unused_percent:.0f}"])
+            for column in range(2, 6):
+                item.setTextAlignment(column, Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+
+    def _selected_tasks(self) -> list[str]:
+        return [self.task_list.item(row).data(TASK_ROLE) for row in range(self.task_list.count())
+                if self.task_list.item(row).checkState() == Qt.CheckState.Checked]
+
+    @Slot()
+    def run_tasks(self):
+        tasks = self._selected_tasks()
+        if not tasks or self.thread is not None:
+            return
+
+        self.worker = MaintenanceWorker(self.db_filepath, tasks)
+        self.thread = QThread(self)
+        self.worker.moveToThread(self.thread)
+
+        self.worker.progress.connect(self._on_progress)
+        self.worker.task_finished.connect(self._on_task_finished)
+        self.worker.finished.connect(self._on_finished)
+        self.thread.started.connect(self.worker.run)
+
+        self.run_button.setEnabled(False)
+        self.task_list.setEnabled(False)
+        self.cancel_button.setEnabled(True)
+        self.progress_bar.setMaximum(len(tasks))
+        self.progress_bar.setValue(0)
+        self.log_view.appendPlainText(f"--- {len(tasks)} task(s) started ---")
+        self.thread.start()
+
+    @Slot()
+    def cancel_tasks(self):
+        if self.worker is not None:
+            # Thread-safe: sets a flag and interrupts the running statement
+            self.worker.cancel()
+            self.cancel_button.setEnabled(False)
+
+    @Slot(int, int)
+    def _on_progress(self, done: int, total: int):
+        self.progress_bar.setMaximum(total)
+        self.progress_bar.setValue(done)
+
+    @Slot(str, str)
+    def _on_task_finished(self, name: str, message: str):
+        self.log_view.appendPlainText(f"{TASKS[name][0]}: {message}")
+
+    @Slot(dict)
+    def _on_finished(self, report: dict):
+        self._stop_thread()
+        self.run_button.setEnabled(True)
+        self.task_list.setEnabled(True)
+        self.cancel_button.setEnabled(False)
+
+        if report['info']:
+            self._show_info(report['info'])
+        if report['space']:
+            self._show_space(report['space'])
+
+        if report['error']:
+            self.log_view.appendPlainText(f"Error: {report['error']}")
+        elif report['cancelled']:
+            self.log_view.appendPlainText("Cancelled.")
+        else:
+            self.log_view.appendPlainText(f"--- Finished in {report['elapsed']:.1f} s ---")
+
+    def _stop_thread(self):
+        if self.thread is None:
+            return
+        self.thread.quit()
+        self.thread.wait()
+        self.worker.deleteLater()
+        self.thread.deleteLater()
+        self.worker = None
+        self.thread = None
+
+    def reject(self):
+        """Closing cancels running tasks (VACUUM is rolled back) and waits for the thread."""
+        if self.worker is not None:
+            self.worker.cancel()
+            self._stop_thread()
+        super().reject()
@@ -0,0 +1,240 @@
+import os
+import json
+import hashlib
+import sqlite3
+import threading
+import time
+
+from PySide6.QtCore import QObject, Signal, Slot
+
+from .image_exporter import (sniff_image_format, build_export_filename, convert_image,
+                             PASS_THROUGH_FORMATS, CONVERSION_FORMAT)
+from .blob_io import open_image_blob, copy_blob_to_stream, read_blob_header
+from .connection_manager import get_manager, WriterBusy
+from .db_schema import IMAGE_HASH_TABLE
+
+
+# Subfolder of the download directory that holds the mirror
+MIRROR_SUBDIR = "eqsl_mirror"
+MANIFEST_FILENAME = ".eqsl_mirror_manifest.json"
+MANIFEST_VERSION = 1
+
+
+class MirrorSyncWorker(QObject):
+    """
+    Keeps a folder mirror of all card images up to date.
+    A manifest (rowid -> image hash, filename) in the mirror folder remembers the
+    last sync, so only new or changed cards are written and files of deleted
+    cards are removed. A sync without changes reads no image data at all.
+    """
+
+    progress = Signal(int, int)     # processed, total
+    finished = Signal(dict)         # sync report
+
+    def __init__(self, db_filepath: str, download_dir: str, table_name: str = "eqsl_data"):
+        super().__init__()
+        self.db_filepath = db_filepath
+        self.mirror_dir = os.path.join(download_dir, MIRROR_SUBDIR)
+        self.manifest_path = os.path.join(self.mirror_dir, MANIFEST_FILENAME)
+        self.table_name = table_name
+        self._cancel_event = threading.Event()
+
+    def cancel(self):
+        """Requests cancellation; may be called from any thread."""
+        self._cancel_event.set()
+
+    def _load_manifest(self) -> dict:
+        """Loads the manifest or returns an empty one for the current database."""
+        empty = {'version': MANIFEST_VERSION, 'database': os.path.abspath(self.db_filepath), 'cards': {}}
+        if not os.path.exists(self.manifest_path):
+            return empty
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (json.JSONDecodeError, IOError) as e:
+            print(f"MirrorSyncWorker: Manifest unreadable ({e}), starting a new mirror.")
+            return empty
+        if manifest.get('version') != MANIFEST_VERSION:
+            return empty
+        return manifest
+
+    def _save_manifest(self, manifest: dict):
+        """Writes the manifest atomically (temporary file + replace)."""
+        temp_path = self.manifest_path + ".tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+        os.replace(temp_path, self.manifest_path)
+
+    def _store_hashes(self, manager, new_hashes: list):
+        """
+        Writes the collected (rowid, hash, image version) entries and clears the list.
+        A hash is only stored if the image version is unchanged: an image replaced
+        since it was hashed stays without hash and is written again by the next sync.
+        """
+        if not new_hashes:
+            return
+        try:
+            # Waits while an import or maintenance task holds the writer
+            with manager.writer(self._cancel_event) as writer:
+                writer.executemany(f"""
+                    INSERT INTO {IMAGE_HASH_TABLE} (qso_id, image_hash, image_version) VALUES (?, ?, ?)
+                    ON CONFLICT(qso_id) DO UPDATE SET image_hash = excluded.image_hash
+                    WHERE image_version = excluded.image_version
+                """, new_hashes)
+        except WriterBusy:
+            # Cancelled while waiting: these images are hashed again by the next sync
+            pass
+        new_hashes.clear()
+
+    def _write_card(self, conn: sqlite3.Connection, rowid: int, base_name: str) -> tuple[str, int, str, int] | None:
+        """
+        Writes one card into the mirror and hashes the image while it is read.
+        Returns (filename, bytes written, hash, image version) or None on error.
+        One read transaction: version, file and hash belong to the same image.
+        """
+        conn.execute("BEGIN")
+        try:
+            row = conn.execute(f"SELECT image_version FROM {IMAGE_HASH_TABLE} WHERE qso_id = ?", (rowid,)).fetchone()
+            image_version = row[0] if row else 0
+
+            blob = open_image_blob(conn, self.table_name, rowid)
+            if blob is None:
+                return None
+
+            sha1 = hashlib.sha1()
+            with blob:
+                image_format = sniff_image_format(read_blob_header(blob))
+
+                if image_format in PASS_THROUGH_FORMATS:
+                    filename = f"{base_name}.{image_format}"
+                    with open(os.path.join(self.mirror_dir, filename), 'wb') as f:
+                        bytes_written = copy_blob_to_stream(blob, f, digest=sha1)
+                    return filename, bytes_written, sha1.hexdigest(), image_version
+
+                filename = f"{base_name}.{CONVERSION_FORMAT}"
+                data = blob.read()
+                sha1.update(data)
+                bytes_written = convert_image(data, os.path.join(self.mirror_dir, filename))
+                return (filename, bytes_written, sha1.hexdigest(), image_version) if bytes_written else None
+        finally:
+            # Read-only, ends the read transaction
+            conn.rollback()
+
+    def _remove_file(self, filename: str, existing_files: set):
+        if filename in existing_files:
+            try:
+                os.remove(os.path.join(self.mirror_dir, filename))
+            except OSError as e:
+                print(f"MirrorSyncWorker: Could not remove {filename}: {e}")
+            existing_files.discard(filename)
+
+    @Slot()
+    def run(self):
+        results = {
+            'total': 0,
+            'written': 0,
+            'unchanged': 0,
+            'removed': 0,
+            'hashed': 0,
+            'failed': 0,
+            'bytes_written': 0,
+            'elapsed': 0.0,
+            'cancelled': False,
+            'destination': self.mirror_dir,
+            'error': ''
+        }
+        start_time = time.perf_counter()
+        conn = None
+
+        try:
+            os.makedirs(self.mirror_dir, exist_ok=True)
+            manifest = self._load_manifest()
+
+            if manifest['database'] != os.path.abspath(self.db_filepath):
+                results['error'] = (f"The mirror folder belongs to another database:\n{manifest['database']}\n"
+                                    f"Please use a different download directory for this database.")
+                return
+
+            old_cards: dict = manifest['cards']
+            new_cards: dict = {}
+            # One directory listing instead of a stat() call per card
+            existing_files = {entry.name for entry in os.scandir(self.mirror_dir) if entry.is_file()}
+
+            # Read on a pooled reader, the hashes go through the shared writer in batches,
+            # so imports are not blocked for the whole sync
+            manager = get_manager(self.db_filepath)
+            conn = manager.acquire_reader()
+            new_hashes = []
+
+            rows = conn.execute(f"""
+                SELECT e.qso_id, h.image_hash, e.CALL, e.QSO_DATE, e.TIME_ON, e.BAND, e.MODE
+                FROM {self.table_name} e
+                LEFT JOIN {IMAGE_HASH_TABLE} h ON h.qso_id = e.qso_id
+                WHERE e.HAS_IMAGE = 1
+            """).fetchall()
+            results['total'] = len(rows)
+
+            for processed, (rowid, image_hash, call, date, time_on, band, mode) in enumerate(rows, start=1):
+                if self._cancel_event.is_set():
+                    results['cancelled'] = True
+                    break
+
+                key = str(rowid)
+                old_entry = old_cards.get(key)
+                base_name = build_export_filename(call, date, time_on, band, mode)
+
+                # A missing hash marks an image that is new or was replaced since it was last hashed
+                if (image_hash is not None and old_entry is not None and old_entry['hash'] == image_hash
+                        and os.path.splitext(old_entry['file'])[0] == base_name
+                        and old_entry['file'] in existing_files):
+                    new_cards[key] = old_entry
+                    results['unchanged'] += 1
+                else:
+                    written = self._write_card(conn, rowid, base_name)
+                    if written is None:
+                        results['failed'] += 1
+                        if old_entry is not None:
+                            new_cards[key] = old_entry
+                        continue
+                    filename, bytes_written, written_hash, image_version = written
+                    if image_hash is None:
+                        new_hashes.append((rowid, written_hash, image_version))
+                        results['hashed'] += 1
+                    existing_files.add(filename)
+                    if old_entry is not None and old_entry['file'] != filename:
+                        self._remove_file(old_entry['file'], existing_files)
+                    new_cards[key] = {'hash': written_hash, 'file': filename}
+                    results['written'] += 1
+                    results['bytes_written'] += bytes_written
+
+                if processed % 500 == 0:
+                    self._store_hashes(manager, new_hashes)
+                    self.progress.emit(processed, results['total'])
+
+            self._store_hashes(manager, new_hashes)
+
+            if results['cancelled']:
+                # Keep the entries that were not processed, they are checked next time
+                for key, entry in old_cards.items():
+                    new_cards.setdefault(key, entry)
+            else:
+                # Cards that are gone from the database (or lost their image)
+                for key, entry in old_cards.items():
+                    if key not in new_cards:
+                        self._remove_file(entry['file'], existing_files)
+                        results['removed'] += 1
+
+            manifest['cards'] = new_cards
+            self._save_manifest(manifest)
+            self.progress.emit(results['total'], results['total'])
+
+        except (sqlite3.Error, OSError) as e:
+            print(f"MirrorSyncWorker: Sync aborted: {e}")
+            results['error'] = str(e)
+        finally:
+            if conn:
+                manager.release_reader(conn)
+            results['elapsed'] = time.perf_counter() - start_time
+            print(f"MirrorSyncWorker: {results['written']} written, {results['unchanged']} unchanged, "
+                  f"{results['removed']} removed in {results['elapsed']:.2f} s.")
+            self.finished.emit(results)
@@ -1,7 +1,43 @@
 import os
+import json
 import sqlite3
 import re
+import time
 from datetime import datetime
+from contextlib import nullcontext
+
+from .blob_io import write_file_to_blob
+from .db_schema import normalize_match_key, MATCH_TIME_INDEX
+from .connection_manager import get_manager
+from .bulk_load import bulk_load
+
+# TEMP table with the parsed card filenames (see plan_import)
+PLAN_TABLE = "card_plan"
+
+# Default of the "card_time_tolerance_minutes" setting: maximum difference
+# between the time in the card filename and TIME_ON of the QSO
+DEFAULT_TIME_TOLERANCE_MINUTES = 10
+
+LAST_SECOND_OF_DAY = 24 * 3600 - 1
+
+
+def _time_seconds(time_str) -> int | None:
+    """Seconds after midnight of an ADIF time (HHMM or HHMMSS), None if it is none."""
+    digits = str(time_str or '').strip()
+    if not digits.isdigit() or len(digits) not in (4, 6):
+        return None
+    return int(digits[:2]) * 3600 + int(digits[2:4]) * 60 + int(digits[4:6] or 0)
+
+
+def _time_window(card_seconds: int, tolerance_seconds: int) -> tuple[str, str]:
+    """TIME_ON bounds (text, as stored) of the window around the card time."""
+    low = max(card_seconds - tolerance_seconds, 0)
+    high = min(card_seconds + tolerance_seconds, LAST_SECOND_OF_DAY)
+    # Lower bound without seconds: a 4-digit TIME_ON (HHMM) sorts before HHMM00.
+    # The window is only the index range, the exact distance is checked afterwards.
+    return (f"{low // 3600:02d}{low % 3600 // 60:02d}",
+            f"{high // 3600:02d}{high % 3600 // 60:02d}{high % 60:02d}")
+
 
 class QslImageImporter:
     """
@@ -21,16 +57,29 @@ class QslImageImporter:
     )
 
     # IMPORTANT: 'table_name' MUST be passed during instantiation (e.g., 'eqsl_data')
-    def __init__(self, db_filepath: str, table_name: str = "eqsl_data"):
+    def __init__(self, db_filepath: str, table_name: str = "eqsl_data",
+                 time_tolerance_minutes: float = DEFAULT_TIME_TOLERANCE_MINUTES):
         self.db_filepath = db_filepath
         self.table_name = table_name
+        self.time_tolerance_minutes = time_tolerance_minutes
+
+    @property
+    def time_tolerance_seconds(self) -> int:
+        try:
+            return max(int(float(self.time_tolerance_minutes) * 60), 0)
+        except (TypeError, ValueError):
+            return DEFAULT_TIME_TOLERANCE_MINUTES * 60
 
     def _get_db_connection(self):
-        """Establishes a connection to the SQLite database."""
+        """The (shared, serialized) writer connection of the database; give it back with _release_db_connection()."""
         if not self.db_filepath or not os.path.exists(self.db_filepath):
             raise FileNotFoundError(f"Database file not found: {self.db_filepath}")
         
-        return sqlite3.connect(self.db_filepath)
+        self._manager = get_manager(self.db_filepath)
+        return self._manager.acquire_writer()
+
+    def _release_db_connection(self):
+        self._manager.release_writer()
 
     def _parse_filename(self, filename: str) -> dict | None:
         """Extracts QSO keys from the filename."""
@@ -62,144 +111,226 @@ class QslImageImporter:
             return None
 
 
-    def _get_qso_id(self, conn: sqlite3.Connection, qso_data: dict) -> int | None:
+    def _load_plan_table(self, conn: sqlite3.Connection, parsed: list[tuple[int, dict]]):
+        """Writes the parsed filenames (file number, match keys, time window) into the TEMP table PLAN_TABLE."""
+        conn.execute(f"DROP TABLE IF EXISTS temp.{PLAN_TABLE}")
+        conn.execute(f"CREATE TEMP TABLE {PLAN_TABLE} ("
+                     f"file_no INTEGER PRIMARY KEY, call1 TEXT, call2 TEXT, qso_date TEXT, band TEXT, mode TEXT, "
+                     f"time_low TEXT, time_high TEXT)")
+        rows = []
+        for file_no, qso_data in parsed:
+            # Same normalization as the match key columns
+            call1, band_val, mode_val = normalize_match_key(qso_data['call1'], qso_data['band'], qso_data['mode'])
+            call2 = qso_data['call2'].strip().upper()
+            time_low, time_high = _time_window(_time_seconds(qso_data['qso_time']), self.time_tolerance_seconds)
+            rows.append((file_no, call1, call2, qso_data['qso_date'], band_val, mode_val, time_low, time_high))
+        conn.executemany(f"INSERT INTO temp.{PLAN_TABLE} VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def _resolve_matches(self, conn: sqlite3.Connection) -> dict[int, list[tuple]]:
         """
-        Finds the ROWID of the QSO entry based on the keys (CALL, QSO_DATE, BAND, and MODE).
+        All candidate QSOs of all cards with ONE join: (Call1 OR Call2) AND QSO_DATE
+        AND BAND AND MODE AND TIME_ON in the time window of the card, two range
+        scans per card in the index (CALL_NORM, QSO_DATE, BAND_NORM, MODE_NORM, TIME_ON).
+        Returns file number -> [(qso_id, HAS_IMAGE, TIME_ON)].
         """
-        
-        # 1. Prepare data
-        band_val = qso_data['band'].replace('M', '').replace('CM', '')
-        
-        # 2. SQL query
-        # The query looks for (Call1 OR Call2) AND QSO_DATE AND BAND AND MODE.
+        # INDEXED BY: without statistics the planner would take the (QSO_DATE, TIME_ON)
+        # sort index and check call, band and mode row by row
         sql = f"""
-        SELECT ROWID FROM {self.table_name}
-        WHERE (UPPER(CALL) = ? OR UPPER(CALL) = ?)
-        AND QSO_DATE = ? 
-        AND BAND = ? 
-        AND UPPER(MODE) = ? 
-        LIMIT 1
+        SELECT p.file_no, t.qso_id, t.HAS_IMAGE, t.TIME_ON
+        FROM temp.{PLAN_TABLE} p
+        JOIN {self.table_name} t INDEXED BY {MATCH_TIME_INDEX}
+          ON t.CALL_NORM IN (p.call1, p.call2)
+         AND t.QSO_DATE = p.qso_date
+         AND t.BAND_NORM = p.band
+         AND t.MODE_NORM = p.mode
+         AND t.TIME_ON BETWEEN p.time_low AND p.time_high
         """
-        
-        # 3. Parameter list for the query (5 values: Call1, Call2, Date, Band, Mode)
-        params = (
-            qso_data['call1'], 
-            qso_data['call2'],
-            qso_data['qso_date'],  # <-- NEW: Third value for QSO_DATE
-            band_val,              # <-- Fourth value for BAND
-            qso_data['mode']       # <-- Fifth value for MODE
-        )
-        
+        candidates: dict[int, list[tuple]] = {}
+        for file_no, qso_id, has_image, time_on in conn.execute(sql):
+            candidates.setdefault(file_no, []).append((qso_id, has_image, time_on))
+        return candidates
+
+    def plan_import(self, directory_path: str) -> dict:
+        """
+        Dry run of the bulk import: parses all filenames, loads them into a TEMP
+        table and resolves the matches with one indexed JOIN on a read-only
+        connection. Nothing is written; apply_plan() imports the planned cards.
+        A card belongs to the QSO whose TIME_ON is nearest to the time in its
+        filename, within time_tolerance_minutes; if several QSOs are equally
+        near, the card is listed as ambiguous instead.
+        """
+        start_time = time.perf_counter()
+        plan = {
+            'directory': directory_path,
+            'total_files': 0,
+            'matches': [],          # (qso_id, filename) to be imported
+            'already_present': [],  # filenames whose QSO has an image
+            'duplicates': [],       # filenames whose QSO gets the card of another file
+            'not_found': [],        # filenames without a matching QSO
+            'ambiguous': [],        # (filename, [(qso_id, TIME_ON), ...]) with several QSOs equally near
+            'parse_error': [],      # filenames not following FILENAME_PATTERN
+            'elapsed': 0.0,
+            'error': ''
+        }
+
+        if not os.path.isdir(directory_path):
+            print(f"Error: '{directory_path}' is not a valid directory.")
+            return plan
+
+        file_list = sorted(f for f in os.listdir(directory_path) if f.lower().endswith(('.jpg', '.jpeg', '.png')))
+        plan['total_files'] = len(file_list)
+
+        parsed = []
+        for file_no, filename in enumerate(file_list):
+            qso_data = self._parse_filename(filename)
+            if qso_data:
+                parsed.append((file_no, qso_data))
+            else:
+                plan['parse_error'].append(filename)
+        if not parsed:
+            return plan
+
         try:
-            cursor = conn.execute(sql, params)
-            result = cursor.fetchone()
-            # print(f"-> Success: QSO found with ID {result[0]} (CALL, DATE, BAND, and MODE match)") # Optional: Debug output
-            return result[0] if result else None
-        except Exception as e:
-            # Hopefully this error no longer occurs, but the output remains
-            print(f"Error during DB query for {qso_data['call1']}/{qso_data['call2']}: {e}")
-            return None
+            if not self.db_filepath or not os.path.exists(self.db_filepath):
+                raise FileNotFoundError(f"Database file not found: {self.db_filepath}")
+            with get_manager(self.db_filepath).reader() as conn:
+                try:
+                    self._load_plan_table(conn, parsed)
+                    candidates = self._resolve_matches(conn)
+                finally:
+                    # Pooled connection: it goes back without the TEMP table
+                    conn.execute(f"DROP TABLE IF EXISTS temp.{PLAN_TABLE}")
+        except (FileNotFoundError, sqlite3.Error) as e:
+            print(f"Critical error: {e}")
+            plan['error'] = str(e)
+            return plan
+
+        planned_ids = set()
+        tolerance_seconds = self.time_tolerance_seconds
+        for file_no, qso_data in parsed:
+            filename = file_list[file_no]
+            card_seconds = _time_seconds(qso_data['qso_time'])
+            # (distance to the card time, qso_id, HAS_IMAGE, TIME_ON), nearest first
+            nearest = sorted(
+                (abs(qso_seconds - card_seconds), qso_id, has_image, time_on)
+                for qso_id, has_image, time_on in candidates.get(file_no, [])
+                if (qso_seconds := _time_seconds(time_on)) is not None
+                and abs(qso_seconds - card_seconds) <= tolerance_seconds)
+            if not nearest:
+                plan['not_found'].append(filename)
+            elif len(nearest) > 1 and nearest[0][0] == nearest[1][0]:
+                plan['ambiguous'].append((filename, [(qso_id, time_on) for distance, qso_id, _has_image, time_on
+                                                     in nearest if distance == nearest[0][0]]))
+            else:
+                _distance, qso_id, has_image, _time_on = nearest[0]
+                if has_image:
+                    plan['already_present'].append(filename)
+                elif qso_id in planned_ids:
+                    plan['duplicates'].append(filename)
+                else:
+                    planned_ids.add(qso_id)
+                    plan['matches'].append((qso_id, filename))
 
-    def _image_to_blob(self, image_path: str) -> bytes | None:
-        """Converts an image file to a BLOB (bytes)."""
+        plan['elapsed'] = time.perf_counter() - start_time
+        return plan
+
+    def _update_qso_with_image(self, conn: sqlite3.Connection, qso_id: int, image_path: str) -> bool:
+        """
+        Streams the image file into the BLOB column (zeroblob + blobopen in chunks),
+        so the file is never held in memory as a whole. Returns False on read/DB errors.
+        Runs inside the import transaction and does not commit: a failed image is
+        rolled back to its savepoint, the images stored before it are kept.
+        """
+        conn.execute("SAVEPOINT card_image")
         try:
-            with open(image_path, 'rb') as f:
-                return f.read()
-        except Exception as e:
-            print(f"Error reading image file {image_path}: {e}")
-            return None
-            
-    def _is_image_present(self, conn: sqlite3.Connection, qso_id: int) -> bool:
-        """Checks if an image is already present for the entry."""
-        sql = f"SELECT EQSL_IMAGE_BLOB FROM {self.table_name} WHERE ROWID = ?"
-        cursor = conn.execute(sql, (qso_id,))
-        result = cursor.fetchone()
-        
-        # True if the column is not NULL
-        return result is not None and result[0] is not None
-        
-    def _update_qso_with_blob(self, conn: sqlite3.Connection, qso_id: int, blob_data: bytes):
-        """Stores the BLOB in the database."""
-        sql = f"UPDATE {self.table_name} SET EQSL_IMAGE_BLOB = ? WHERE ROWID = ?"
-        conn.execute(sql, (blob_data, qso_id))
+            bytes_written = write_file_to_blob(conn, self.table_name, qso_id, image_path)
+            if bytes_written == 0:
+                raise OSError("file is empty")
+            conn.execute("RELEASE card_image")
+        except (OSError, sqlite3.Error) as e:
+            conn.execute("ROLLBACK TO card_image")
+            conn.execute("RELEASE card_image")
+            print(f"Error storing image file {image_path}: {e}")
+            return False
+        return True
+
+    def _import_matches(self, conn: sqlite3.Connection, plan: dict, results: dict):
+        """Streams the planned cards into their QSOs in ONE transaction (counts in 'results')."""
+        conn.execute("BEGIN")
+        # Images stored since the plan was made (one lookup for all QSOs)
+        planned_ids = json.dumps([qso_id for qso_id, _filename in plan['matches']])
+        with_image = {row[0] for row in conn.execute(
+            f"SELECT qso_id FROM {self.table_name} "
+            f"WHERE qso_id IN (SELECT value FROM json_each(?)) AND HAS_IMAGE = 1", (planned_ids,))}
+
+        for qso_id, filename in plan['matches']:
+            if qso_id in with_image:
+                results['already_present'] += 1
+                continue
+
+            full_path = os.path.join(plan['directory'], filename)
+            # A failed image is rolled back to its savepoint, the others stay in the transaction
+            if not self._update_qso_with_image(conn, qso_id, full_path):
+                results['file_error'] += 1
+                continue
+
+            results['imported'] += 1
+            results['rowids'].append(qso_id)
         conn.commit()
 
-    def bulk_import_images(self, directory_path: str) -> dict:
+    def apply_plan(self, plan: dict, bulk: bool = False) -> dict:
         """
-        Performs the bulk import:
-        1. Searches the directory for .jpg/.png files.
-        2. Parses filenames, finds QSO ID, converts image to BLOB, stores it.
+        Commit step of the bulk import: imports the matches of plan_import() in
+        one transaction (an error rolls the whole import back).
+        bulk=True: bulk-load mode for large initial loads (safety backup,
+        synchronous=OFF). The indexes stay, image updates do not change them.
         """
         results = {
-            'total_files': 0,
+            'total_files': plan['total_files'],
             'imported': 0,
-            'already_present': 0,
-            'not_found': 0,
-            'parse_error': 0,
-            'file_error': 0
+            'already_present': len(plan['already_present']) + len(plan['duplicates']),
+            'not_found': len(plan['not_found']),
+            'ambiguous': len(plan['ambiguous']),
+            'parse_error': len(plan['parse_error']),
+            'file_error': 0,
+            'rowids': []        # QSO IDs that received an image (for the view refresh)
         }
-        
-        if not os.path.isdir(directory_path):
-            print(f"Error: '{directory_path}' is not a valid directory.")
-            return results
 
-        file_list = [f for f in os.listdir(directory_path) if f.lower().endswith(('.jpg', '.jpeg', '.png'))]
-        results['total_files'] = len(file_list)
-        
-        if not file_list:
-            print("No relevant image files (.jpg, .png) found in the directory.")
-            return results
+        if plan['matches']:
+            try:
+                conn = self._get_db_connection()
+            except (FileNotFoundError, sqlite3.Error) as e:
+                print(f"Critical error: {e}")
+                return results
+
+            try:
+                with bulk_load(conn, self.db_filepath, self.table_name, rebuild_indexes=False) if bulk else nullcontext():
+                    self._import_matches(conn, plan, results)
+            except Exception as e:
+                print(f"Unknown import error, import rolled back: {e}")
+                results['imported'] = 0
+                results['rowids'] = []
+            finally:
+                self._release_db_connection()
 
-        try:
-            conn = self._get_db_connection()
-            
-            for filename in file_list:
-                full_path = os.path.join(directory_path, filename)
-                # print(f"Processing: {filename}") 
-                
-                # 1. Parse filename
-                qso_data = self._parse_filename(filename)
-                if not qso_data:
-                    results['parse_error'] += 1
-                    continue
-                    
-                # 2. Find QSO ID
-                qso_id = self._get_qso_id(conn, qso_data)
-                
-                if qso_id is None:
-                    # print(f"-> QSO not found: {qso_data['call1']}/{qso_data['call2']} (CALL, DATE, BAND and MODE match)")
-                    results['not_found'] += 1
-                    continue
-                    
-                # 3. Check if image is already present
-                if self._is_image_present(conn, qso_id):
-                    results['already_present'] += 1
-                    continue
-                    
-                # 4. Convert image to BLOB
-                blob_data = self._image_to_blob(full_path)
-                if not blob_data:
-                    results['file_error'] += 1
-                    continue
-                    
-                # 5. DB-Update
-                self._update_qso_with_blob(conn, qso_id, blob_data)
-                results['imported'] += 1
-                
-            conn.close()
-            
-        except FileNotFoundError as e:
-            print(f"Critical error: {e}")
-        except Exception as e:
-            print(f"Unknown import error: {e}")
-        
         # Print summary of the import
         print("\n--- Bulk Card Import Summary ---")
         print(f"Total files: {results['total_files']}")
         print(f"Imported: {results['imported']} NEW images saved.")
         print(f"Already present: {results['already_present']}")
         print(f"QSO not found in DB: {results['not_found']}")
+        print(f"Ambiguous (several QSOs match): {results['ambiguous']}")
         print(f"Parse errors: {results['parse_error']}")
         print(f"File errors (reading): {results['file_error']}")
-            
-        return results
\ No newline at end of file
+
+        return results
+
+    def bulk_import_images(self, directory_path: str, bulk: bool = False) -> dict:
+        """
+        Performs the bulk import: plan_import() matches all .jpg/.png files of
+        the directory, apply_plan() streams the matched images into the BLOB column.
+        """
+        plan = self.plan_import(directory_path)
+        if not plan['total_files']:
+            print("No relevant image files (.jpg, .png) found in the directory.")
+        return self.apply_plan(plan, bulk)
@@ -4,12 +4,16 @@ import re # Although not necessary for single import, it remains for the basic d
 from datetime import datetime
 from typing import Dict, Any, Optional, Union
 
+from .blob_io import write_file_to_blob
+from .db_schema import normalize_match_key
+from .connection_manager import get_manager, WriterBusy
+
 # --- BASE CLASS (Assuming it exists in a separate file or here) ---
 # It provides the generic database and blob functions.
 class QslImageImporterBasis:
     """
     Base class for QSL image imports, contains the generic
-    functions for DB connection, QSO search, blob conversion, and update.
+    functions for DB connection, QSO search and (streamed) image update.
     """
     
     # Example filename: Callsign=IK1ICF_VisitorCallsign=OE4VMB_QSODate=2025-09-02_12_19_00_0_Band=20M_Mode=FT8.jpg
@@ -21,11 +25,15 @@ class QslImageImporterBasis:
         self.table_name = table_name
 
     def _get_db_connection(self):
-        """Establishes a connection to the SQLite database."""
+        """The (shared, serialized) writer connection of the database; give it back with _release_db_connection()."""
         if not self.db_filepath or not os.path.exists(self.db_filepath):
             # Allows raising an error that can be caught by the caller (e.g., the GUI).
             raise FileNotFoundError(f"Database file not found: {self.db_filepath}")
-        return sqlite3.connect(self.db_filepath)
+        self._manager = get_manager(self.db_filepath)
+        return self._manager.acquire_writer()
+
+    def _release_db_connection(self):
+        self._manager.release_writer()
 
     def _get_qso_id(self, conn: sqlite3.Connection, qso_data: dict) -> int | None:
         """
@@ -33,17 +41,16 @@ class QslImageImporterBasis:
         (CALL, QSO_DATE, BAND and MODE) from the manually entered data.
         """
         
-        # 1. Prepare data
-        band_val = qso_data['band'].replace('M', '').replace('CM', '')
-        call_val = qso_data['call'].upper()
+        # 1. Prepare data (same normalization as the match key columns)
+        call_val, band_val, mode_val = normalize_match_key(qso_data['call'], qso_data['band'], qso_data['mode'])
         
-        # 2. SQL query
+        # 2. SQL query (one seek in the index CALL_NORM, QSO_DATE, BAND_NORM, MODE_NORM)
         sql = f"""
         SELECT ROWID FROM {self.table_name}
-        WHERE UPPER(CALL) = ?
+        WHERE CALL_NORM = ?
         AND QSO_DATE = ? 
-        AND BAND = ? 
-        AND UPPER(MODE) = ? 
+        AND BAND_NORM = ? 
+        AND MODE_NORM = ? 
         LIMIT 1
         """
         
@@ -52,7 +59,7 @@ class QslImageImporterBasis:
             call_val,
             qso_data['qso_date'],  # Format: YYYYMMDD
             band_val,              # E.g., '20' for 20M
-            qso_data['mode'].upper()
+            mode_val
         )
         
         try:
@@ -64,30 +71,31 @@ class QslImageImporterBasis:
             print(f"Error during DB query for {call_val}: {e}")
             return None
 
-    def _image_to_blob(self, image_path: str) -> bytes | None:
-        """Converts an image file to a BLOB (bytes)."""
-        try:
-            with open(image_path, 'rb') as f:
-                return f.read()
-        except Exception as e:
-            print(f"Error reading image file {image_path}: {e}")
-            return None
-            
     def _is_image_present(self, conn: sqlite3.Connection, qso_id: int) -> bool:
         """Checks if an image is already present for the entry (EQSL_IMAGE_BLOB != NULL)."""
-        sql = f"SELECT EQSL_IMAGE_BLOB FROM {self.table_name} WHERE ROWID = ?"
+        # Image flag (kept by triggers), the image itself is not loaded
+        sql = f"SELECT HAS_IMAGE FROM {self.table_name} WHERE ROWID = ?"
         cursor = conn.execute(sql, (qso_id,))
         result = cursor.fetchone()
         
-        # True if the column is not NULL
-        # NOTE: Using result[0] is correct here as the column is checked.
-        return result is not None and result[0] is not None
+        # True if the image flag is set
+        return result is not None and bool(result[0])
         
-    def _update_qso_with_blob(self, conn: sqlite3.Connection, qso_id: int, blob_data: bytes):
-        """Stores the BLOB in the database."""
-        sql = f"UPDATE {self.table_name} SET EQSL_IMAGE_BLOB = ? WHERE ROWID = ?"
-        conn.execute(sql, (blob_data, qso_id))
-        conn.commit()
+    def _update_qso_with_image(self, conn: sqlite3.Connection, qso_id: int, image_path: str) -> bool:
+        """
+        Streams the image file into the BLOB column (zeroblob + blobopen in chunks),
+        so the file is never held in memory as a whole. Returns False on read/DB errors.
+        """
+        try:
+            bytes_written = write_file_to_blob(conn, self.table_name, qso_id, image_path)
+            if bytes_written == 0:
+                raise OSError("file is empty")
+            conn.commit()
+            return True
+        except (OSError, sqlite3.Error) as e:
+            conn.rollback()
+            print(f"Error storing image file {image_path}: {e}")
+            return False
 
 # --- NEW CLASS FOR MANUAL IMPORT ---
 
@@ -170,7 +178,8 @@ class QslSingleImageImporter(QslImageImporterBasis):
             'success': False,
             'message': "Import failed.",
             'qso_id': None,
-            'reason': ''
+            'reason': '',
+            'busy': False
         }
         
         # 1. Validate and format data
@@ -181,6 +190,7 @@ class QslSingleImageImporter(QslImageImporterBasis):
             results['reason'] = "Error in data validation/formatting or invalid path."
             return results
 
+        conn = None
         try:
             conn = self._get_db_connection()
             
@@ -196,7 +206,6 @@ class QslSingleImageImporter(QslImageImporterBasis):
             if qso_id is None:
                 results['message'] = "QSO not found in the database."
                 results['reason'] = f"Combination: CALL={qso_data['call']}, DATE={qso_data['qso_date']}, BAND={qso_data['band']}, MODE={qso_data['mode']}"
-                conn.close()
                 return results
 
             # 3. Check if image is already present (nur im reinen Import-Modus relevant)
@@ -205,19 +214,13 @@ class QslSingleImageImporter(QslImageImporterBasis):
                 results['message'] = f"QSO found (ID {qso_id}), but an image is already present. (Not saved)"
                 results['success'] = True 
                 results['qso_id'] = qso_id
-                conn.close()
                 return results
                 
-            # 4. Convert image to BLOB
-            blob_data = self._image_to_blob(qso_data['path'])
-            if not blob_data:
-                results['message'] = "Error converting image file to BLOB."
-                results['reason'] = "The file could not be read."
-                conn.close()
+            # 4. Stream image into the BLOB column (DB-Update)
+            if not self._update_qso_with_image(conn, qso_id, qso_data['path']):
+                results['message'] = "Error storing image file as BLOB."
+                results['reason'] = "The file could not be read or written to the database."
                 return results
-                
-            # 5. DB-Update
-            self._update_qso_with_blob(conn, qso_id, blob_data)
             
             results['success'] = True
             results['qso_id'] = qso_id
@@ -227,14 +230,20 @@ class QslSingleImageImporter(QslImageImporterBasis):
             else:
                 results['message'] = f"Import successful! Image saved to QSO entry ID {qso_id}."
 
-            conn.close()
-            
         except FileNotFoundError as e:
             results['message'] = "Critical error: Database file not found."
             results['reason'] = str(e)
+        except WriterBusy as e:
+            # Another import, merge or maintenance task is writing; nothing was changed
+            results['busy'] = True
+            results['message'] = "The database is busy, please try again in a moment."
+            results['reason'] = str(e)
         except Exception as e:
             results['message'] = "Unknown error during import."
             results['reason'] = str(e)
+        finally:
+            if conn is not None:
+                self._release_db_connection()
             
         return results
 
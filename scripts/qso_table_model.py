@@ -0,0 +1,513 @@
+import json
+from bisect import bisect_left
+
+from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex, QByteArray
+from PySide6.QtSql import QSqlDatabase, QSqlQuery
+
+from .blob_io import IMAGE_COLUMN
+from .db_federation import Federation, SOURCE_COLUMN, SOURCE_NO_COLUMN
+
+# Rows per fetchMore() (the view asks for more while scrolling)
+PAGE_SIZE = 256
+
+# Columns sorted by more than one key (matching the index on QSO_DATE, TIME_ON)
+SORT_KEYS = {
+    'QSO_DATE': ['QSO_DATE', 'TIME_ON'],
+}
+
+# Keys that are never NULL (no NULL handling needed in the keyset condition)
+NOT_NULL_KEYS = {'qso_id', SOURCE_NO_COLUMN}
+
+# Row id condition of a single database (federated sets use Federation.id_list_condition)
+ID_LIST_CONDITION = "qso_id IN (SELECT value FROM json_each(?))"
+
+
+def _sqlite_order(value):
+    """Python sort key matching SQLite's order of values: NULL, numbers, text, BLOB."""
+    if value is None:
+        return (0, 0)
+    if isinstance(value, (int, float)):
+        return (1, value)
+    if isinstance(value, str):
+        return (2, value)
+    return (3, bytes(value))
+
+
+class _Descending:
+    """Inverts the comparison of a sort key (for bisect on a descending order)."""
+    __slots__ = ('key',)
+
+    def __init__(self, key):
+        self.key = key
+
+    def __lt__(self, other: "_Descending") -> bool:
+        return other.key < self.key
+
+
+class QsoTableModel(QAbstractTableModel):
+    """
+    Read-mostly table model for the main view.
+    The columns keep the indexes of the table (COL_* constants), but only the
+    'loaded' columns plus the ROWID (column 0) are selected; EQSL_IMAGE_BLOB is
+    never part of the row query and is read per row on demand (load_image()).
+    Rows are fetched in pages with keyset pagination on (sort column, qso_id),
+    so the first page costs the same for 1,000 or 1,000,000 QSOs.
+    Sorting (header click) is done by SQLite with ORDER BY, supported by
+    the indexes of search_query.SEARCH_INDEXES, and kept across select().
+    Without a sort column the model can show an explicit, ordered list of
+    rowids (e.g. the ranked result of the live search), fetched page by page.
+    After an import refresh_rows() updates single rows instead of select().
+    With a federated database set (db_federation) the model shows the view of
+    the set: rows are identified by federated ids, (qso_id, SOURCE_NO) is the
+    tie-breaker and edits and images go to the row's own database.
+    """
+
+    def __init__(self, db: QSqlDatabase, table_name: str, loaded_columns: list[int], parent=None):
+        super().__init__(parent)
+        self.db = db
+        self.table_name = ""
+        self.federation: Federation | None = None
+        self.column_names: list[str] = []
+        self.requested_columns = loaded_columns
+        self.loaded_columns: list[int] = []
+        self._positions: dict[int, int] = {}     # table column -> position in a cached row
+        self._headers: dict[int, str] = {}
+
+        self._where = ""
+        self._params: list = []
+        self._rowids: list[int] | None = None
+        self._sort_column = -1
+        self._sort_order = Qt.SortOrder.AscendingOrder
+
+        self._rows: list[list] = []
+        self._last_key = None
+        self._rowid_offset = 0
+        self._has_more = False
+
+        self.set_table(table_name)
+
+    # ------------------------------------------------------------------
+    # Configuration
+    # ------------------------------------------------------------------
+
+    def set_table(self, table_name: str, federation: Federation | None = None):
+        """
+        (Re)reads the column names of the table, e.g. after a database change.
+        With a federated set (view attached on the connection) its view is shown
+        instead, plus the SOURCE_DB column.
+        """
+        self.beginResetModel()
+        self.federation = federation if federation is not None and federation.is_federated else None
+        self.table_name = self.federation.view_name if self.federation else table_name
+        record = self.db.record(self.table_name)
+        self.column_names = [record.fieldName(i) for i in range(record.count())
+                             if record.fieldName(i) != SOURCE_NO_COLUMN]
+        requested = set(self.requested_columns)
+        if self.federation and SOURCE_COLUMN in self.column_names:
+            requested.add(self.column_names.index(SOURCE_COLUMN))
+        self.loaded_columns = [0] + sorted(col for col in requested
+                                           if 0 < col < len(self.column_names)
+                                           and self.column_names[col] != IMAGE_COLUMN)
+        self._positions = {col: pos for pos, col in enumerate(self.loaded_columns)}
+        self._clear_rows()
+        self.endResetModel()
+
+    def set_filter(self, where: str, params: list | None = None):
+        """Parameterized WHERE condition (without 'WHERE'); takes effect with select()."""
+        self._where = where
+        self._params = list(params or [])
+
+    def set_rowids(self, rowids: list[int] | None):
+        """Shows exactly these rows in this order (None = all rows matching the filter)."""
+        self._rowids = None if rowids is None else list(rowids)
+
+    def set_sort(self, column: int, order: Qt.SortOrder):
+        """Sort column (-1 = unsorted: rowid list order or qso_id); takes effect with select()."""
+        self._sort_column = column
+        self._sort_order = order
+
+    def sort(self, column: int, order: Qt.SortOrder = Qt.SortOrder.AscendingOrder):
+        """Called by the view on a header click: reloads the rows sorted by SQLite."""
+        self.set_sort(column, order)
+        self.select()
+
+    def _clear_rows(self):
+        self._rows = []
+        self._last_key = None
+        self._rowid_offset = 0
+        self._has_more = False
+
+    def select(self) -> bool:
+        """Discards the cached rows and loads the first page."""
+        self.beginResetModel()
+        self._clear_rows()
+        self._has_more = bool(self.column_names)
+        ok = True
+        if self._has_more:
+            rows = self._fetch_page()
+            ok = rows is not None
+            self._rows = rows or []
+        self.endResetModel()
+        return ok
+
+    # ------------------------------------------------------------------
+    # Paging
+    # ------------------------------------------------------------------
+
+    def _id_keys(self) -> list[str]:
+        """Unique tie-breaker: qso_id, in a federated set together with the source number."""
+        return ['qso_id', SOURCE_NO_COLUMN] if self.federation else ['qso_id']
+
+    def _id_list_condition(self) -> str:
+        return self.federation.id_list_condition if self.federation else ID_LIST_CONDITION
+
+    def _sort_keys(self) -> list[str]:
+        """Columns of the ORDER BY; the id keys are always the last keys (unique tie-breaker)."""
+        keys = []
+        if 0 < self._sort_column < len(self.column_names):
+            name = self.column_names[self._sort_column]
+            if name != IMAGE_COLUMN:
+                keys = SORT_KEYS.get(name, [name])
+        return keys + self._id_keys()
+
+    def _is_unsorted(self, keys: list[str]) -> bool:
+        return len(keys) == len(self._id_keys())
+
+    def _select_list(self, keys: list[str]) -> str:
+        """Row id and loaded columns, followed by the sort keys (needed for the keyset of the next page)."""
+        row_id = self.federation.id_sql if self.federation else self.column_names[0]
+        return ", ".join([row_id] + [self.column_names[col] for col in self.loaded_columns[1:]] + keys)
+
+    def _exec(self, sql: str, params: list) -> QSqlQuery | None:
+        query = QSqlQuery(self.db)
+        query.setForwardOnly(True)
+        if not query.prepare(sql):
+            print(f"QsoTableModel: Query failed: {query.lastError().text()}")
+            return None
+        for value in params:
+            query.addBindValue(value)
+        if not query.exec():
+            print(f"QsoTableModel: Query failed: {query.lastError().text()}")
+            return None
+        return query
+
+    def _read_rows(self, query: QSqlQuery, width: int) -> list[list]:
+        rows = []
+        while query.next():
+            rows.append([query.value(i) for i in range(width)])
+        return rows
+
+    @staticmethod
+    def _keyset_condition(keys: list[str], last: list, descending: bool) -> tuple[str, list]:
+        """
+        Rows after 'last' in the order of 'keys' (lexicographic, NULL-aware:
+        SQLite sorts NULL first ascending and last descending).
+        """
+        alternatives = []
+        params = []
+        for i, key in enumerate(keys):
+            parts = []
+            part_params = []
+            for prev_key, prev_value in zip(keys[:i], last[:i]):
+                if prev_value is None:
+                    parts.append(f"{prev_key} IS NULL")
+                else:
+                    parts.append(f"{prev_key} = ?")
+                    part_params.append(prev_value)
+
+            value = last[i]
+            if descending:
+                if value is None:
+                    continue    # nothing follows NULL in descending order
+                if key in NOT_NULL_KEYS:
+                    parts.append(f"{key} < ?")
+                else:
+                    parts.append(f"({key} < ? OR {key} IS NULL)")
+                part_params.append(value)
+            else:
+                if value is None:
+                    parts.append(f"{key} IS NOT NULL")
+                else:
+                    parts.append(f"{key} > ?")
+                    part_params.append(value)
+
+            alternatives.append(" AND ".join(parts))
+            params.extend(part_params)
+
+        if not alternatives:
+            return "0", []
+        return "(" + " OR ".join(f"({alternative})" for alternative in alternatives) + ")", params
+
+    def _query_page(self, conditions: list[str], params: list, keys: list[str], limit: int) -> list[list] | None:
+        direction = "DESC" if self._sort_order == Qt.SortOrder.DescendingOrder else "ASC"
+        sql = f"SELECT {self._select_list(keys)} FROM {self.table_name}"
+        if conditions:
+            sql += f" WHERE {' AND '.join(conditions)}"
+        sql += " ORDER BY " + ", ".join(f"{key} {direction}" for key in keys) + " LIMIT ?"
+
+        query = self._exec(sql, params + [limit])
+        if query is None:
+            return None
+        return self._read_rows(query, len(self.loaded_columns) + len(keys))
+
+    def _fetch_page(self) -> list[list] | None:
+        """Loads the next page; returns None on a query error."""
+        conditions = [f"({self._where})"] if self._where else []
+        params = list(self._params)
+        keys = self._sort_keys()
+
+        if self._rowids is not None and self._is_unsorted(keys):
+            # Unsorted rowid list: page through the list itself
+            page_ids = self._rowids[self._rowid_offset:self._rowid_offset + PAGE_SIZE]
+            self._rowid_offset += len(page_ids)
+            self._has_more = self._rowid_offset < len(self._rowids)
+            if not page_ids:
+                return []
+
+            conditions.append(self._id_list_condition())
+            params.append(json.dumps(page_ids))
+            sql = f"SELECT {self._select_list(keys)} FROM {self.table_name} WHERE {' AND '.join(conditions)}"
+            query = self._exec(sql, params)
+            if query is None:
+                self._has_more = False
+                return None
+            # Keep the order of the rowid list (e.g. relevance)
+            by_id = {row[0]: row for row in self._read_rows(query, len(self.loaded_columns) + len(keys))}
+            return [by_id[rowid] for rowid in page_ids if rowid in by_id]
+
+        if self._rowids is not None:
+            # Sorted rowid list: the rows of the list, ordered by SQLite
+            conditions.append(self._id_list_condition())
+            params.append(json.dumps(self._rowids))
+
+        descending = self._sort_order == Qt.SortOrder.DescendingOrder
+        first_key = keys[0]
+        page_conditions = list(conditions)
+        page_params = list(params)
+        null_segment_follows = False
+
+        if self._last_key is not None:
+            keyset_sql, keyset_params = self._keyset_condition(keys, self._last_key, descending)
+            page_conditions.append(keyset_sql)
+            page_params.extend(keyset_params)
+
+            # Extra range on the first key so SQLite can seek in its index
+            first_value = self._last_key[0]
+            if first_key not in NOT_NULL_KEYS:
+                if not descending and first_value is not None:
+                    page_conditions.append(f"{first_key} >= ?")
+                    page_params.append(first_value)
+                elif descending and first_value is None:
+                    page_conditions.append(f"{first_key} IS NULL")
+                elif descending:
+                    # Excludes the NULL rows at the end, they are read separately below
+                    page_conditions.append(f"{first_key} <= ?")
+                    page_params.append(first_value)
+                    null_segment_follows = True
+            elif len(keys) > 1:
+                # e.g. (qso_id, SOURCE_NO) of a federated set: the OR of the keyset alone is not seekable
+                page_conditions.append(f"{first_key} {'<=' if descending else '>='} ?")
+                page_params.append(first_value)
+
+        rows = self._query_page(page_conditions, page_params, keys, PAGE_SIZE)
+        if rows is None:
+            self._has_more = False
+            return None
+
+        if null_segment_follows and len(rows) < PAGE_SIZE:
+            null_rows = self._query_page(conditions + [f"{first_key} IS NULL"], params, keys, PAGE_SIZE - len(rows))
+            rows.extend(null_rows or [])
+
+        self._has_more = len(rows) == PAGE_SIZE
+        if rows:
+            self._last_key = rows[-1][len(self.loaded_columns):]
+        return rows
+
+    def canFetchMore(self, parent: QModelIndex = QModelIndex()) -> bool:
+        return not parent.isValid() and self._has_more
+
+    def fetchMore(self, parent: QModelIndex = QModelIndex()):
+        if parent.isValid() or not self._has_more:
+            return
+        rows = self._fetch_page()
+        if not rows:
+            return
+        first = len(self._rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+        self._rows.extend(rows)
+        self.endInsertRows()
+
+    # ------------------------------------------------------------------
+    # Incremental update
+    # ------------------------------------------------------------------
+
+    def _row_order_key(self, row: list):
+        key = tuple(_sqlite_order(value) for value in row[len(self.loaded_columns):])
+        return _Descending(key) if self._sort_order == Qt.SortOrder.DescendingOrder else key
+
+    def refresh_rows(self, rowids: list[int], where: str, params: list | None = None) -> int:
+        """
+        Re-reads the given rows after an import instead of select(), so the view
+        keeps selection, sort and scroll position. Rows matching 'where' (the
+        complete condition of the view, e.g. base filter AND search) are updated
+        in place or inserted at their sort position, the others are removed.
+        New rows behind the loaded pages are left to fetchMore(); in an unsorted
+        rowid list (rank order) they are appended at the end.
+        Returns the number of given rows that are part of the view.
+        """
+        if not rowids or not self.column_names:
+            return 0
+
+        keys = self._sort_keys()
+        key_start = len(self.loaded_columns)
+        conditions = [self._id_list_condition()]
+        query_params = [json.dumps([int(rowid) for rowid in rowids])]
+        if where:
+            conditions.append(f"({where})")
+            query_params.extend(params or [])
+        query = self._exec(f"SELECT {self._select_list(keys)} FROM {self.table_name} "
+                           f"WHERE {' AND '.join(conditions)}", query_params)
+        if query is None:
+            return 0
+        fresh = {int(row[0]): row for row in self._read_rows(query, key_start + len(keys))}
+
+        wanted = {int(rowid) for rowid in rowids}
+        rank_order = self._rowids is not None and self._is_unsorted(keys)
+        loaded = set()
+        removed = []
+        for row_index, row in enumerate(self._rows):
+            rowid = int(row[0])
+            if rowid not in wanted:
+                continue
+            new_row = fresh.get(rowid)
+            if new_row is not None and (rank_order or new_row[key_start:] == row[key_start:]):
+                # Same position: update the cells only
+                self._rows[row_index] = new_row
+                self.dataChanged.emit(self.index(row_index, 0), self.index(row_index, len(self.column_names) - 1))
+                loaded.add(rowid)
+            else:
+                # No longer visible or the sort key changed (reinserted below)
+                removed.append(row_index)
+
+        for row_index in reversed(removed):
+            self.beginRemoveRows(QModelIndex(), row_index, row_index)
+            del self._rows[row_index]
+            self.endRemoveRows()
+
+        inserts = [row for rowid, row in fresh.items() if rowid not in loaded]
+        if self._rowids is not None:
+            # The rowid list is the filter of the view: extend it by the new hits
+            known = set(self._rowids)
+            new_ids = [int(row[0]) for row in inserts if int(row[0]) not in known]
+            self._rowids.extend(new_ids)
+            if rank_order:
+                if not self._has_more and new_ids:
+                    new_ids = set(new_ids)
+                    appended = [row for row in inserts if int(row[0]) in new_ids]
+                    first = len(self._rows)
+                    self.beginInsertRows(QModelIndex(), first, first + len(appended) - 1)
+                    self._rows.extend(appended)
+                    self.endInsertRows()
+                    self._rowid_offset = len(self._rowids)
+                return len(fresh)
+
+        for row in inserts:
+            row_key = self._row_order_key(row)
+            position = bisect_left(self._rows, row_key, key=self._row_order_key)
+            if position == len(self._rows) and self._has_more:
+                continue    # behind the loaded pages, fetchMore() reads it
+            self.beginInsertRows(QModelIndex(), position, position)
+            self._rows.insert(position, row)
+            self.endInsertRows()
+            if position == len(self._rows) - 1:
+                self._last_key = row[key_start:]
+        return len(fresh)
+
+    # ------------------------------------------------------------------
+    # QAbstractTableModel interface
+    # ------------------------------------------------------------------
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.column_names)
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or role not in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole):
+            return None
+        position = self._positions.get(index.column())
+        if position is None:
+            return None
+        return self._rows[index.row()][position]
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            if section in self._headers:
+                return self._headers[section]
+            if 0 <= section < len(self.column_names):
+                return self.column_names[section]
+            return None
+        return section + 1
+
+    def setHeaderData(self, section: int, orientation: Qt.Orientation, value, role: int = Qt.ItemDataRole.EditRole) -> bool:
+        if orientation != Qt.Orientation.Horizontal:
+            return False
+        self._headers[section] = value
+        self.headerDataChanged.emit(orientation, section, section)
+        return True
+
+    def flags(self, index: QModelIndex):
+        flags = super().flags(index)
+        if (index.isValid() and index.column() != 0 and index.column() in self._positions
+                and self.column_names[index.column()] != SOURCE_COLUMN):
+            flags |= Qt.ItemFlag.ItemIsEditable
+        return flags
+
+    def setData(self, index: QModelIndex, value, role: int = Qt.ItemDataRole.EditRole) -> bool:
+        """Writes an edited cell directly to the database (like OnFieldChange)."""
+        if role != Qt.ItemDataRole.EditRole or not (self.flags(index) & Qt.ItemFlag.ItemIsEditable):
+            return False
+        column_name = self.column_names[index.column()]
+        table, qso_id = self._row_table(index.row())
+        query = self._exec(f"UPDATE {table} SET {column_name} = ? WHERE qso_id = ?", [value, qso_id])
+        if query is None:
+            return False
+        row = self._rows[index.row()]
+        row[self._positions[index.column()]] = value
+        # Keep the cached sort key in step (keyset of the next page)
+        keys = self._sort_keys()
+        if column_name in keys:
+            row[len(self.loaded_columns) + keys.index(column_name)] = value
+        self.dataChanged.emit(index, index)
+        return True
+
+    # ------------------------------------------------------------------
+    # Row access
+    # ------------------------------------------------------------------
+
+    def rowid(self, row: int) -> int:
+        """Row id (the qso_id, in a federated set the federated id)."""
+        return int(self._rows[row][0])
+
+    def _row_table(self, row: int) -> tuple[str, int]:
+        """Table holding the row and its qso_id there (edits and BLOBs bypass the view)."""
+        if self.federation is None:
+            return self.table_name, self.rowid(row)
+        schema, qso_id = self.federation.locate(self.rowid(row))
+        return f"{schema}.{self.federation.table_name}", qso_id
+
+    def load_image(self, row: int) -> QByteArray:
+        """Reads the image BLOB of one row (empty QByteArray if there is none)."""
+        table, qso_id = self._row_table(row)
+        query = self._exec(f"SELECT {IMAGE_COLUMN} FROM {table} WHERE qso_id = ?", [qso_id])
+        if query is None or not query.next():
+            return QByteArray()
+        blob_data = query.value(0)
+        if isinstance(blob_data, QByteArray):
+            return blob_data
+        if isinstance(blob_data, (bytes, bytearray)):
+            return QByteArray(bytes(blob_data))
+        return QByteArray()
@@ -0,0 +1,355 @@
+import re
+
+from .search_query import SEARCHABLE_COLUMNS, escape_like, LIKE_ESCAPE
+from .fulltext_index import fts_phrase, MIN_TERM_LENGTH
+from .db_schema import IMAGE_FILTER
+
+# Query grammar of the main search box:
+#
+#   query     := or_expr
+#   or_expr   := and_expr ( "OR" and_expr )*
+#   and_expr  := unary ( ["AND"] unary )*          (juxtaposition = AND)
+#   unary     := ( "-" | "NOT" ) unary | primary
+#   primary   := "(" or_expr ")" | field ":" value | term
+#
+# Examples: call:DL*  band:20 mode:FT8  date:2024-01..2024-06  cqz:14
+#           has:image  -country:Germany  (band:20 OR band:40) call:OE*
+#
+# Values may be quoted ("United States"). Ranges use "..", open ends are allowed.
+# Text without any of this syntax keeps the old behaviour (OR over all terms).
+
+# Values are compared in upper case, as the ADIF import stores all data upper case
+QUERY_FIELDS = ['call', 'band', 'mode', 'date', 'freq', 'cqz', 'ituz', 'country',
+                'grid', 'name', 'qth', 'sota', 'pota', 'iota', 'has']
+
+# has:<value> -> condition
+HAS_CONDITIONS = {
+    'image': IMAGE_FILTER,
+    'sota': "COALESCE(SOTA_REF, '') <> ''",
+    'pota': "COALESCE(POTA_REF, '') <> ''",
+    'iota': "COALESCE(IOTA_REF, '') <> ''",
+}
+
+KEYWORDS = {'AND', 'OR', 'NOT'}
+
+_TOKEN_RE = re.compile(r'''
+    (?P<lparen>\()
+  | (?P<rparen>\))
+  | (?P<minus>-)(?=[^\s)])
+  | (?:(?P<field>[A-Za-z_]+):)?(?:"(?P<quoted>[^"]*)"|(?P<word>[^\s()"]+))
+''', re.VERBOSE)
+
+
+class QuerySyntaxError(ValueError):
+    """Invalid search query; 'position' is the character offset of the error."""
+
+    def __init__(self, message: str, position: int):
+        super().__init__(f"{message} (at position {position + 1})")
+        self.position = position
+
+
+def tokenize(text: str) -> list[tuple]:
+    """Splits the query into tokens (kind, value, field, position)."""
+    tokens = []
+    pos = 0
+    while pos < len(text):
+        if text[pos].isspace():
+            pos += 1
+            continue
+        match = _TOKEN_RE.match(text, pos)
+        if not match:
+            raise QuerySyntaxError("Unterminated quote", text.find('"', pos))
+
+        if match.group('lparen'):
+            tokens.append(('lparen', '(', None, pos))
+        elif match.group('rparen'):
+            tokens.append(('rparen', ')', None, pos))
+        elif match.group('minus'):
+            tokens.append(('not', '-', None, pos))
+        else:
+            field = match.group('field')
+            quoted = match.group('quoted') is not None
+            value = match.group('quoted') if quoted else match.group('word')
+            if field is None and not quoted and value in KEYWORDS:
+                tokens.append((value.lower(), value, None, pos))
+            elif field is not None:
+                tokens.append(('field', value, field.lower(), pos))
+            elif not quoted and re.fullmatch(r'[A-Za-z_]+:', value):
+                raise QuerySyntaxError(f"Missing value for '{value}'", pos)
+            else:
+                tokens.append(('term', value, None, pos))
+        pos = match.end()
+    return tokens
+
+
+def is_structured_query(text: str) -> bool:
+    """True if the text uses the query grammar (fields, operators, parentheses, negation)."""
+    try:
+        tokens = tokenize(text)
+    except QuerySyntaxError:
+        # Let the parser report the error
+        return True
+    return any(kind != 'term' for kind, _value, _field, _pos in tokens)
+
+
+class _Parser:
+    """Recursive descent parser producing a small tuple AST."""
+
+    def __init__(self, tokens: list[tuple], text: str):
+        self.tokens = tokens
+        self.index = 0
+        self.end_position = len(text)
+
+    def _peek(self):
+        return self.tokens[self.index] if self.index < len(self.tokens) else None
+
+    def _next(self):
+        token = self._peek()
+        self.index += 1
+        return token
+
+    def parse(self):
+        if not self.tokens:
+            return None
+        node = self._or_expr()
+        token = self._peek()
+        if token is not None:
+            raise QuerySyntaxError(f"Unexpected '{token[1]}'", token[3])
+        return node
+
+    def _or_expr(self):
+        nodes = [self._and_expr()]
+        while (token := self._peek()) is not None and token[0] == 'or':
+            self._next()
+            nodes.append(self._and_expr())
+        return nodes[0] if len(nodes) == 1 else ('or', nodes)
+
+    def _and_expr(self):
+        nodes = [self._unary()]
+        while (token := self._peek()) is not None and token[0] not in ('or', 'rparen'):
+            if token[0] == 'and':
+                self._next()
+            nodes.append(self._unary())
+        return nodes[0] if len(nodes) == 1 else ('and', nodes)
+
+    def _unary(self):
+        token = self._peek()
+        if token is not None and token[0] == 'not':
+            self._next()
+            return ('not', self._unary())
+        return self._primary()
+
+    def _primary(self):
+        token = self._next()
+        if token is None:
+            raise QuerySyntaxError("Incomplete query", self.end_position)
+
+        kind, value, field, pos = token
+        if kind == 'lparen':
+            node = self._or_expr()
+            closing = self._next()
+            if closing is None or closing[0] != 'rparen':
+                raise QuerySyntaxError("Missing ')'", pos)
+            return node
+        if kind == 'field':
+            return ('field', field, value, pos)
+        if kind == 'term':
+            return ('term', value, pos)
+        raise QuerySyntaxError(f"Unexpected '{value}'", pos)
+
+
+# ----------------------------------------------------------------------
+# Value helpers
+# ----------------------------------------------------------------------
+
+def _split_range(value: str) -> tuple[str, str] | None:
+    """'a..b' -> (a, b); open ends give ''. Returns None if the value is no range."""
+    if '..' not in value:
+        return None
+    start, _, end = value.partition('..')
+    return start, end
+
+
+def _parse_date(value: str, pos: int, range_end: bool) -> str:
+    """Converts 2024, 2024-01, 202401, 2024-01-05 or 20240105 into YYYYMMDD (first or last day)."""
+    digits = value.replace('-', '')
+    if not digits.isdigit() or len(digits) not in (4, 6, 8):
+        raise QuerySyntaxError(f"Invalid date '{value}' (use YYYY, YYYY-MM or YYYY-MM-DD)", pos)
+    if len(digits) >= 6 and not 1 <= int(digits[4:6]) <= 12:
+        raise QuerySyntaxError(f"Invalid month in '{value}'", pos)
+    if len(digits) == 8 and not 1 <= int(digits[6:8]) <= 31:
+        raise QuerySyntaxError(f"Invalid day in '{value}'", pos)
+
+    # QSO_DATE is stored as YYYYMMDD text, so padding with 12/31 keeps the string order
+    if len(digits) == 4:
+        digits += "1231" if range_end else "0101"
+    elif len(digits) == 6:
+        digits += "31" if range_end else "01"
+    return digits
+
+
+def _parse_number(value: str, pos: int, number_type):
+    try:
+        return number_type(value)
+    except ValueError:
+        raise QuerySyntaxError(f"'{value}' is not a number", pos) from None
+
+
+def _has_wildcard(value: str) -> bool:
+    return '*' in value or '?' in value
+
+
+def _glob_pattern(value: str) -> str:
+    """Uses * and ? as they are, escapes the GLOB character class bracket."""
+    return value.replace('[', '[[]')
+
+
+# ----------------------------------------------------------------------
+# Compiler
+# ----------------------------------------------------------------------
+
+def _compile_exact_or_glob(column: str, value: str) -> tuple[str, list]:
+    """Exact (indexable) match, or a GLOB match if the value contains * or ?."""
+    value = value.upper()
+    if _has_wildcard(value):
+        # GLOB is case-sensitive, so SQLite can use an index for a fixed prefix
+        return f"{column} GLOB ?", [_glob_pattern(value)]
+    return f"{column} = ?", [value]
+
+
+def _compile_numeric(column: str, value: str, pos: int, number_type) -> tuple[str, list]:
+    bounds = _split_range(value)
+    if bounds is None:
+        return f"{column} = ?", [_parse_number(value, pos, number_type)]
+
+    start, end = bounds
+    if not start and not end:
+        raise QuerySyntaxError("Empty range", pos)
+    conditions, params = [], []
+    if start:
+        conditions.append(f"{column} >= ?")
+        params.append(_parse_number(start, pos, number_type))
+    if end:
+        conditions.append(f"{column} <= ?")
+        params.append(_parse_number(end, pos, number_type))
+    return " AND ".join(conditions), params
+
+
+def _compile_date(value: str, pos: int) -> tuple[str, list]:
+    bounds = _split_range(value)
+    if bounds is None:
+        start = _parse_date(value, pos, range_end=False)
+        end = _parse_date(value, pos, range_end=True)
+        if start == end:
+            return "QSO_DATE = ?", [start]
+        return "QSO_DATE BETWEEN ? AND ?", [start, end]
+
+    start, end = bounds
+    if not start and not end:
+        raise QuerySyntaxError("Empty date range", pos)
+    if start and end:
+        return "QSO_DATE BETWEEN ? AND ?", [_parse_date(start, pos, False), _parse_date(end, pos, True)]
+    if start:
+        return "QSO_DATE >= ?", [_parse_date(start, pos, False)]
+    return "QSO_DATE <= ?", [_parse_date(end, pos, True)]
+
+
+def _compile_band(value: str, pos: int) -> tuple[str, list]:
+    """band:20, band:20m and band:70cm; the table holds both '20' (from FREQ) and '20M' (from ADIF)."""
+    value = value.upper()
+    unit = 'CM' if value.endswith('CM') else 'M'
+    number = value[:-len(unit)] if value.endswith(unit) else value
+    if not number or not number.replace('.', '', 1).isdigit():
+        raise QuerySyntaxError(f"Invalid band '{value}' (e.g. band:20 or band:70cm)", pos)
+    if unit == 'CM':
+        return "BAND = ?", [f"{number}CM"]
+    return "BAND IN (?, ?)", [number, f"{number}M"]
+
+
+def _compile_like(column: str, value: str) -> tuple[str, list]:
+    """Case-insensitive substring match for free text columns (name, QTH)."""
+    if _has_wildcard(value):
+        pattern = escape_like(value).replace('*', '%').replace('?', '_')
+    else:
+        pattern = f"%{escape_like(value)}%"
+    return f"{column} LIKE ? ESCAPE '{LIKE_ESCAPE}'", [pattern]
+
+
+def _compile_field(field: str, value: str, pos: int) -> tuple[str, list]:
+    if value == '':
+        raise QuerySyntaxError(f"Missing value for '{field}:'", pos)
+
+    if field == 'call':
+        return _compile_exact_or_glob("CALL", value)
+    if field == 'band':
+        return _compile_band(value, pos)
+    if field == 'mode':
+        value = value.upper()
+        return "(MODE = ? OR SUBMODE = ?)", [value, value]
+    if field == 'date':
+        return _compile_date(value, pos)
+    if field == 'freq':
+        return _compile_numeric("FREQ", value, pos, float)
+    if field == 'cqz':
+        return _compile_numeric("CQZ", value, pos, int)
+    if field == 'ituz':
+        return _compile_numeric("ITUZ", value, pos, int)
+    if field == 'country':
+        return _compile_exact_or_glob("COUNTRY", value)
+    if field == 'grid':
+        # Locators are hierarchical, grid:JN88 also finds JN88KG
+        return "GRIDSQUARE GLOB ?", [_glob_pattern(value.upper()) + '*']
+    if field == 'name':
+        return _compile_like("NAME", value)
+    if field == 'qth':
+        return _compile_like("QTH", value)
+    if field in ('sota', 'pota', 'iota'):
+        return _compile_exact_or_glob(f"{field.upper()}_REF", value)
+    if field == 'has':
+        condition = HAS_CONDITIONS.get(value.lower())
+        if condition is None:
+            raise QuerySyntaxError(f"Unknown 'has:{value}' (use {', '.join(HAS_CONDITIONS)})", pos)
+        return condition, []
+
+    raise QuerySyntaxError(f"Unknown field '{field}:' (use {', '.join(QUERY_FIELDS)})", pos)
+
+
+def _compile_term(value: str, fts_table: str | None) -> tuple[str, list]:
+    """A term without field matches any searchable column (full-text index if available)."""
+    if fts_table and len(value) >= MIN_TERM_LENGTH:
+        return f"qso_id IN (SELECT rowid FROM {fts_table} WHERE {fts_table} MATCH ?)", [fts_phrase(value)]
+    pattern = f"%{escape_like(value)}%"
+    conditions = [f"{column} LIKE ? ESCAPE '{LIKE_ESCAPE}'" for column in SEARCHABLE_COLUMNS]
+    return "(" + " OR ".join(conditions) + ")", [pattern] * len(conditions)
+
+
+def _compile_node(node, fts_table: str | None) -> tuple[str, list]:
+    kind = node[0]
+    if kind in ('and', 'or'):
+        parts, params = [], []
+        for child in node[1]:
+            sql, child_params = _compile_node(child, fts_table)
+            parts.append(f"({sql})")
+            params.extend(child_params)
+        return f" {kind.upper()} ".join(parts), params
+    if kind == 'not':
+        sql, params = _compile_node(node[1], fts_table)
+        # IS NOT 1 keeps rows where the column is NULL (e.g. -country:X without country)
+        return f"({sql}) IS NOT 1", params
+    if kind == 'field':
+        return _compile_field(node[1], node[2], node[3])
+    return _compile_term(node[1], fts_table)
+
+
+def compile_query(text: str, fts_table: str | None = None) -> dict:
+    """
+    Compiles a search query into a parameterized WHERE condition for eqsl_data.
+    Free terms use the full-text table 'fts_table' if given, otherwise LIKE.
+    Returns a dict like build_fulltext_filter ('where', 'params', 'match' = None,
+    the result is not ranked). Raises QuerySyntaxError for invalid queries.
+    """
+    tree = _Parser(tokenize(text), text).parse()
+    if tree is None:
+        return {'where': "", 'params': [], 'match': None}
+    sql, params = _compile_node(tree, fts_table)
+    return {'where': f"({sql})", 'params': params, 'match': None}
@@ -0,0 +1,62 @@
+# Columns of eqsl_data searched by the free text search in the main window
+# (same order as SEARCHABLE_COLUMN_INDICES in eqsl_main_prog.py)
+SEARCHABLE_COLUMNS = [
+    'CALL', 'QSO_DATE', 'TIME_ON', 'BAND', 'MODE',
+    'SUBMODE', 'COUNTRY', 'FREQ', 'CQZ', 'ITUZ', 'GRIDSQUARE'
+]
+
+# Escape character for LIKE patterns
+LIKE_ESCAPE = '\\'
+
+
+def escape_like(term: str) -> str:
+    """Escapes the LIKE wildcards (% and _) so a search term matches literally."""
+    return (term.replace(LIKE_ESCAPE, LIKE_ESCAPE * 2)
+                .replace('%', LIKE_ESCAPE + '%')
+                .replace('_', LIKE_ESCAPE + '_'))
+
+
+def build_terms_filter(text: str, columns: list[str] = SEARCHABLE_COLUMNS) -> tuple[str, list]:
+    """
+    Translates the space separated search text into a parameterized WHERE clause.
+    A row matches if ANY term is contained in ANY of the columns (OR logic),
+    compared case-insensitively like the former proxy filter.
+    Returns ("", []) if there is nothing to filter.
+    """
+    terms = [term.strip() for term in text.split() if term.strip()]
+    if not terms:
+        return "", []
+
+    conditions = []
+    params = []
+    for term in terms:
+        pattern = f"%{escape_like(term)}%"
+        for column in columns:
+            # LIKE is case-insensitive for ASCII; numbers (FREQ, CQZ, ...) are compared as text
+            conditions.append(f"{column} LIKE ? ESCAPE '{LIKE_ESCAPE}'")
+            params.append(pattern)
+
+    return "(" + " OR ".join(conditions) + ")", params
+
+
+# Indexes used by the field queries of the search box (query_language):
+# date ranges and exact band/mode/country/zone matches. They also serve the
+# column sort of the main table (ORDER BY column, qso_id with keyset paging)
+# and the GROUP BY of the facet counts. CALL needs its own index for the sort,
+# UNIQUE(CALL, QSO_DATE, TIME_ON) does not end with the rowid.
+SEARCH_INDEXES = {
+    'idx_eqsl_data_call': "CALL",
+    'idx_eqsl_data_qso_date': "QSO_DATE, TIME_ON",
+    'idx_eqsl_data_band': "BAND",
+    'idx_eqsl_data_mode': "MODE",
+    'idx_eqsl_data_submode': "SUBMODE",
+    'idx_eqsl_data_country': "COUNTRY",
+    'idx_eqsl_data_cqz': "CQZ",
+}
+
+
+def ensure_search_indexes(conn, table_name: str = "eqsl_data"):
+    """Creates the search indexes if they do not exist (sqlite3 connection, commits)."""
+    for index_name, columns in SEARCH_INDEXES.items():
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON {table_name} ({columns})")
+    conn.commit()
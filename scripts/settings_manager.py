@@ -4,6 +4,9 @@ import json
 # Import QObject and Signal, as the class should send signals.
 from PySide6.QtCore import Slot, QObject, Signal 
 
+from .connection_manager import get_manager
+from .db_schema import migrate
+
 
 # SettingsManager must inherit from QObject to be able to send signals
 class SettingsManager(QObject):
@@ -55,7 +58,17 @@ class SettingsManager(QObject):
             "last_upload_dir": "",# Last directory for uploads
             "download_directory": "", # Default download directory
             "adif_path": "", # Default path for ADIF import
-            "bulk_card_directory": "" # Path for Bulk Card settings
+            "bulk_card_directory": "", # Path for Bulk Card settings
+            "card_time_tolerance_minutes": 10, # Max. difference between card time and TIME_ON of the QSO
+            "sqlite_profile": {}, # PRAGMA overrides, e.g. {"cache_size": -131072} (see connection_manager)
+            "maintenance_idle_minutes": 10, # Idle time before the background maintenance (0 = off)
+            "backup_directory": "", # Online backups ("" = 'backups' folder next to the database)
+            "backup_compression": "gzip", # none, gzip or lzma
+            "backup_keep": 7, # Number of backups kept per database
+            "backup_step_pages": 1024, # Pages copied per backup step
+            "backup_interval_hours": 0, # Scheduled backup interval (0 = off)
+            "database_sets": {}, # Name -> databases attached to the open one, e.g. {"Archive": ["2010-2019.db"]}
+            "active_database_set": "" # Database set shown at the start ("" = open database only)
         }
         
         if os.path.exists(self.config_filepath):
@@ -229,73 +242,12 @@ class SettingsManager(QObject):
         # NOTE: The table name is read from the settings here (fix from last time)
         table_name = self.settings.get("table_name", "eqsl_data") 
 
-        # SQL command for the uploaded eQSL data
-        EQSL_DATA_SQL = f"""
-        CREATE TABLE IF NOT EXISTS {table_name} (
-            qso_id INTEGER PRIMARY KEY,
-    
-            -- IMPORTANT QSO DATA FOR UNIQUE KEY
-            CALL TEXT NOT NULL,         -- Call sign of the QSO partner
-            QSO_DATE TEXT NOT NULL,     -- Date (YYYYMMDD)
-            TIME_ON TEXT NOT NULL,      -- Start time (HHMMSS)
-    
-            -- GENERAL QSO DATA
-            BAND TEXT,
-            MODE TEXT,
-            SUBMODE TEXT,
-            FREQ REAL,                  -- Frequency (e.g., 14.0764)
-            RST_SENT TEXT,              -- Sent report
-            RST_RCVD TEXT,              -- Received report
-            TX_PWR REAL,                -- Transmit power (e.g., 30.0)
-    
-            -- GEOGRAPHICAL DATA OF THE PARTNER
-            CONT TEXT,                  -- Continent
-            COUNTRY TEXT,               -- Country (Name)
-            DXCC INTEGER,               -- DXCC Number
-            PFX TEXT,                   -- Prefix
-            CQZ INTEGER,                -- CQ Zone
-            ITUZ INTEGER,               -- ITU Zone
-            GRIDSQUARE TEXT,            -- Locator (e.g., JO55RM)
-            LAT REAL,                   -- Latitude
-            LON REAL,                   -- Longitude
-
-            -- PERSONAL DATA OF THE PARTNER
-            NAME TEXT,                  -- Name (First and Last)
-            QTH TEXT,                   -- Location/City
-            ADDRESS TEXT,               -- Complete address
-            EMAIL TEXT,
-            AGE INTEGER,
-    
-            -- eQSL-STATUS
-            EQSL_QSL_SENT TEXT,
-            EQSL_QSLS_DATE TEXT,        -- Sent date (YYYYMMDD)
-            EQSL_QSL_RCVD TEXT,
-            EQSL_QSLR_DATE TEXT,        -- Received date (YYYYMMDD)
-            EQSL_IMAGE_BLOB BLOB,       -- eQSL image as BLOB 
-
-            
-            -- DX-INDEXES 
-            SOTA_REF TEXT, 
-            POTA_REF TEXT,
-            IOTA_REF TEXT,
-    
-            -- UNIQUE Constraint for duplicate detection (important!)
-            UNIQUE(CALL, QSO_DATE, TIME_ON) 
-        );
-        """
-
         try:
-            # Establishes connection and enables Foreign Keys (important for SQLite)
-            conn = sqlite3.connect(db_filepath)
-            cursor = conn.cursor()
-            
-            # Create tables
-            cursor.execute(EQSL_DATA_SQL)
-            
-            # Save changes and close the connection
-            conn.commit()
-            conn.close()
-            print(f"Schema created: {table_name} table is now defined.")
+            # Creates the file on the shared writer connection (WAL and PRAGMA profile)
+            with get_manager(db_filepath).writer() as conn:
+                # Create tables and indexes (all schema migrations, see db_schema)
+                version = migrate(conn, table_name)
+            print(f"Schema created: {table_name} table is now defined (schema version {version}).")
             return True
             
         except sqlite3.Error as e:
@@ -0,0 +1,320 @@
+import math
+from collections import OrderedDict
+from typing import Callable
+
+from PySide6.QtWidgets import QGraphicsView, QGraphicsScene, QGraphicsItem, QStyleOptionGraphicsItem
+from PySide6.QtGui import QImage, QImageReader, QPixmap, QPainter
+from PySide6.QtCore import Qt, QRectF, QBuffer, QByteArray, QIODevice, QObject, Signal, Slot
+
+
+class TilePyramid:
+    """
+    Multi-resolution tile set of a single decoded card image.
+    Level 0 is the full resolution, every further level halves the size
+    until the whole image fits into one tile.
+    Only QImages are built in the constructor, so a pyramid can be built in a
+    worker thread; the tile pixmaps are cut on the GUI thread when painted.
+    """
+
+    TILE_SIZE = 256
+
+    def __init__(self, image: QImage):
+        self.width = image.width()
+        self.height = image.height()
+
+        # Build the level images once by successive halving (cheap compared to decoding)
+        self.levels: list[QImage] = [image]
+        current = image
+        while current.width() > self.TILE_SIZE or current.height() > self.TILE_SIZE:
+            current = current.scaled(
+                max(1, current.width() // 2),
+                max(1, current.height() // 2),
+                Qt.AspectRatioMode.IgnoreAspectRatio,
+                Qt.TransformationMode.SmoothTransformation
+            )
+            self.levels.append(current)
+
+        self._level_bytes = sum(level.sizeInBytes() for level in self.levels)
+
+        # Tiles are cut lazily on first paint, oldest first: {(level, col, row): QPixmap}
+        self._tiles: OrderedDict[tuple[int, int, int], QPixmap] = OrderedDict()
+        self._tile_bytes = 0
+        # Called with (pyramid, added bytes) for every new tile (set by the cache)
+        self.on_tile_added: Callable[["TilePyramid", int], None] | None = None
+
+    @classmethod
+    def from_data(cls, blob_data: QByteArray | bytes) -> "TilePyramid | None":
+        """Decodes the image BLOB and builds the pyramid. Returns None on invalid data."""
+        buffer = QBuffer()
+        buffer.setData(QByteArray(blob_data))
+        buffer.open(QIODevice.OpenModeFlag.ReadOnly)
+
+        reader = QImageReader(buffer)
+        reader.setAutoTransform(True)
+        image = reader.read()
+        buffer.close()
+
+        if image.isNull():
+            print(f"TilePyramid: Could not decode image ({reader.errorString()}).")
+            return None
+        return cls(image)
+
+    def byte_size(self) -> int:
+        """Approximate memory used by all level images and the cut tiles."""
+        return self._level_bytes + self._tile_bytes
+
+    def drop_tiles(self, min_bytes: int) -> int:
+        """Drops the least recently painted tiles until at least 'min_bytes' are freed. Returns the freed bytes."""
+        freed = 0
+        while self._tiles and freed < min_bytes:
+            _, pixmap = self._tiles.popitem(last=False)
+            size = _pixmap_bytes(pixmap)
+            self._tile_bytes -= size
+            freed += size
+        return freed
+
+    def level_for_scale(self, scale: float) -> int:
+        """Returns the coarsest level that still has at least 'scale' pixels per image pixel."""
+        if scale <= 0:
+            return len(self.levels) - 1
+        level = int(math.floor(math.log2(1.0 / scale))) if scale < 1.0 else 0
+        return max(0, min(level, len(self.levels) - 1))
+
+    def level_scale(self, level: int) -> float:
+        """Size factor of a level relative to the full resolution image."""
+        return self.levels[level].width() / self.width
+
+    def tiles_in_rect(self, level: int, rect: QRectF):
+        """
+        Yields (target_rect, pixmap) for all tiles of the level that intersect 'rect'.
+        'rect' and target_rect are given in full resolution (item) coordinates.
+        """
+        scale_x = self.levels[level].width() / self.width
+        scale_y = self.levels[level].height() / self.height
+        level_image = self.levels[level]
+
+        first_col = max(0, int(rect.left() * scale_x) // self.TILE_SIZE)
+        first_row = max(0, int(rect.top() * scale_y) // self.TILE_SIZE)
+        last_col = min((level_image.width() - 1) // self.TILE_SIZE, int(rect.right() * scale_x) // self.TILE_SIZE)
+        last_row = min((level_image.height() - 1) // self.TILE_SIZE, int(rect.bottom() * scale_y) // self.TILE_SIZE)
+
+        for row in range(first_row, last_row + 1):
+            for col in range(first_col, last_col + 1):
+                pixmap = self._tile(level, col, row)
+                target = QRectF(
+                    col * self.TILE_SIZE / scale_x,
+                    row * self.TILE_SIZE / scale_y,
+                    pixmap.width() / scale_x,
+                    pixmap.height() / scale_y
+                )
+                yield target, pixmap
+
+    def _tile(self, level: int, col: int, row: int) -> QPixmap:
+        """Returns the cached tile pixmap or cuts it from the level image."""
+        key = (level, col, row)
+        pixmap = self._tiles.get(key)
+        if pixmap is not None:
+            self._tiles.move_to_end(key)
+            return pixmap
+
+        # Edge tiles are clamped to the level image (copy() would pad them with black)
+        level_image = self.levels[level]
+        left = col * self.TILE_SIZE
+        top = row * self.TILE_SIZE
+        source = level_image.copy(left, top,
+                                  min(self.TILE_SIZE, level_image.width() - left),
+                                  min(self.TILE_SIZE, level_image.height() - top))
+        pixmap = QPixmap.fromImage(source)
+        self._tiles[key] = pixmap
+        size = _pixmap_bytes(pixmap)
+        self._tile_bytes += size
+        if self.on_tile_added is not None:
+            self.on_tile_added(self, size)
+        return pixmap
+
+
+def _pixmap_bytes(pixmap: QPixmap) -> int:
+    return pixmap.width() * pixmap.height() * max(pixmap.depth(), 8) // 8
+
+
+class TilePyramidCache:
+    """
+    LRU cache of tile pyramids keyed by the ROWID of the QSO entry. The limit
+    covers the level images and the tiles cut while painting: every new tile
+    is reported by its pyramid and may evict other pyramids (or the oldest
+    tiles of the painted one, if it alone exceeds the limit).
+    """
+
+    def __init__(self, max_bytes: int = 512 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[int, TilePyramid] = OrderedDict()
+        self._used_bytes = 0
+
+    def get(self, rowid: int) -> TilePyramid | None:
+        """Returns the cached pyramid of the ROWID (None if it has to be built, see PyramidLoader)."""
+        pyramid = self._entries.get(rowid)
+        if pyramid is not None:
+            self._entries.move_to_end(rowid)
+        return pyramid
+
+    def put(self, rowid: int, pyramid: TilePyramid):
+        """Adds a pyramid built by the loader."""
+        self.invalidate(rowid)
+        self._entries[rowid] = pyramid
+        self._used_bytes += pyramid.byte_size()
+        pyramid.on_tile_added = self._on_tile_added
+        self._evict(pyramid)
+
+    def _on_tile_added(self, pyramid: TilePyramid, size: int):
+        self._used_bytes += size
+        self._evict(pyramid)
+
+    def _evict(self, keep: TilePyramid):
+        """Evicts least recently used pyramids, but never 'keep' (the newest or the painted one)."""
+        for rowid in list(self._entries):
+            if self._used_bytes <= self.max_bytes:
+                return
+            if self._entries[rowid] is not keep:
+                self._remove(rowid)
+        if self._used_bytes > self.max_bytes:
+            self._used_bytes -= keep.drop_tiles(self._used_bytes - self.max_bytes)
+
+    def _remove(self, rowid: int):
+        pyramid = self._entries.pop(rowid)
+        pyramid.on_tile_added = None
+        self._used_bytes -= pyramid.byte_size()
+
+    def invalidate(self, rowid: int):
+        """Drops the pyramid of a ROWID, e.g. after its image was replaced."""
+        if rowid in self._entries:
+            self._remove(rowid)
+
+    def clear(self):
+        for pyramid in self._entries.values():
+            pyramid.on_tile_added = None
+        self._entries.clear()
+        self._used_bytes = 0
+
+
+# Shared by all viewer dialogs, so reopening a card does not decode it again
+pyramid_cache = TilePyramidCache()
+
+
+class PyramidLoader(QObject):
+    """
+    Decodes card images and builds their pyramids in a worker thread, so a
+    large scan does not block the GUI. Lives in a QThread; requests of an
+    outdated generation (the user moved on to the next card) are skipped.
+    """
+
+    pyramid_ready = Signal(int, int, object)    # generation, rowid, TilePyramid or None
+
+    def __init__(self):
+        super().__init__()
+        # Newest generation requested by the viewer (written from the GUI thread)
+        self.latest_generation = 0
+
+    @Slot(int, int, object)
+    def load(self, generation: int, rowid: int, blob_data):
+        if generation != self.latest_generation:
+            return
+        pyramid = TilePyramid.from_data(blob_data)
+        self.pyramid_ready.emit(generation, rowid, pyramid)
+
+
+class TiledImageItem(QGraphicsItem):
+    """Graphics item that paints only the exposed tiles of the matching pyramid level."""
+
+    def __init__(self, pyramid: TilePyramid, parent=None):
+        super().__init__(parent)
+        self.pyramid = pyramid
+        # Needed so option.exposedRect contains the actually visible area
+        self.setFlag(QGraphicsItem.GraphicsItemFlag.ItemUsesExtendedStyleOption, True)
+
+    def boundingRect(self) -> QRectF:
+        return QRectF(0, 0, self.pyramid.width, self.pyramid.height)
+
+    def paint(self, painter: QPainter, option: QStyleOptionGraphicsItem, widget=None):
+        scale = QStyleOptionGraphicsItem.levelOfDetailFromTransform(painter.worldTransform())
+        level = self.pyramid.level_for_scale(scale)
+
+        for target, pixmap in self.pyramid.tiles_in_rect(level, option.exposedRect):
+            painter.drawPixmap(target, pixmap, QRectF(pixmap.rect()))
+
+
+class TiledImageView(QGraphicsView):
+    """Zoom (mouse wheel) and pan (drag) view for large card scans."""
+
+    ZOOM_STEP = 1.25
+    MAX_ZOOM = 8.0
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setScene(QGraphicsScene(self))
+        self.setDragMode(QGraphicsView.DragMode.ScrollHandDrag)
+        self.setTransformationAnchor(QGraphicsView.ViewportAnchor.AnchorUnderMouse)
+        self.setResizeAnchor(QGraphicsView.ViewportAnchor.AnchorViewCenter)
+        self.setViewportUpdateMode(QGraphicsView.ViewportUpdateMode.SmartViewportUpdate)
+        self.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform, True)
+        self.setAlignment(Qt.AlignmentFlag.AlignCenter)
+
+        self.image_item: TiledImageItem | None = None
+        self._fit_mode = True
+
+    def set_pyramid(self, pyramid: TilePyramid | None):
+        """Shows a new image (or nothing) and fits it into the window."""
+        self.scene().clear()
+        self.image_item = None
+
+        if pyramid is not None:
+            self.image_item = TiledImageItem(pyramid)
+            self.scene().addItem(self.image_item)
+            self.scene().setSceneRect(self.image_item.boundingRect())
+
+        self.fit_to_window()
+
+    def fit_to_window(self):
+        """Scales the whole image into the visible area."""
+        self._fit_mode = True
+        self.resetTransform()
+        if self.image_item is not None:
+            self.fitInView(self.image_item, Qt.AspectRatioMode.KeepAspectRatio)
+
+    def _fit_scale(self) -> float:
+        if self.image_item is None:
+            return 1.0
+        rect = self.image_item.boundingRect()
+        viewport = self.viewport().rect()
+        return min(viewport.width() / rect.width(), viewport.height() / rect.height())
+
+    def wheelEvent(self, event):
+        """Zooms around the mouse position, limited between 'fit to window' and MAX_ZOOM."""
+        if self.image_item is None:
+            return
+
+        steps = event.angleDelta().y() / 120
+        if not steps:
+            return
+
+        current = self.transform().m11()
+        target = current * (self.ZOOM_STEP ** steps)
+        min_zoom = min(1.0, self._fit_scale())
+        target = max(min_zoom, min(target, self.MAX_ZOOM))
+
+        if target == min_zoom:
+            self.fit_to_window()
+            return
+
+        self._fit_mode = False
+        factor = target / current
+        self.scale(factor, factor)
+
+    def mouseDoubleClickEvent(self, event):
+        """Double click returns to the 'fit to window' view."""
+        self.fit_to_window()
+        super().mouseDoubleClickEvent(event)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        if self._fit_mode:
+            self.fit_to_window()
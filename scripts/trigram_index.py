@@ -0,0 +1,152 @@
+import sqlite3
+import time
+from array import array
+
+from .search_query import SEARCHABLE_COLUMNS
+
+# Substring search without FTS5: an in-memory inverted index trigram -> rowids.
+# Posting lists are sorted rowids stored as delta + varint encoded bytes
+# (most deltas fit into one byte), so the index stays a few MB for 100k QSOs.
+TRIGRAM_LENGTH = 3
+
+# Separator between the column values, no trigram spans two columns
+_COLUMN_SEPARATOR = '\x00'
+
+
+def _encode_varint(value: int, target: bytearray):
+    """Appends an unsigned integer as LEB128 varint."""
+    while value >= 0x80:
+        target.append((value & 0x7F) | 0x80)
+        value >>= 7
+    target.append(value)
+
+
+def decode_postings(data: bytes) -> array:
+    """Decodes a delta/varint posting list into an array of rowids."""
+    rowids = array('q')
+    current = 0
+    value = 0
+    shift = 0
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        current += value
+        rowids.append(current)
+        value = 0
+        shift = 0
+    return rowids
+
+
+def trigrams_of(text: str) -> set[str]:
+    """All trigrams of a (lower case) text that do not span a column separator."""
+    return {text[i:i + TRIGRAM_LENGTH] for i in range(len(text) - TRIGRAM_LENGTH + 1)
+            if _COLUMN_SEPARATOR not in text[i:i + TRIGRAM_LENGTH]}
+
+
+class TrigramIndex:
+    """
+    In-memory trigram index over the searchable columns of eqsl_data.
+    lookup() returns candidate rowids (a superset of the real hits, the caller
+    verifies them in SQL with the LIKE condition on primary key lookups).
+    New rows are appended incrementally (rowids only grow); edited rows are
+    kept in a 'changed' set and always returned as candidates.
+    """
+
+    def __init__(self, table_name: str = "eqsl_data", columns: list[str] = SEARCHABLE_COLUMNS):
+        self.table_name = table_name
+        self.columns = columns
+        self._postings: dict[str, bytearray] = {}
+        self._last_rowid: dict[str, int] = {}   # last rowid per posting list (for the delta)
+        self._changed: set[int] = set()
+        self.max_rowid = 0
+        self.row_count = 0
+        self.loaded = False
+
+    def _row_text(self, values) -> str:
+        return _COLUMN_SEPARATOR.join('' if value is None else str(value) for value in values).lower()
+
+    def _add_row(self, rowid: int, values):
+        postings = self._postings
+        last_rowid = self._last_rowid
+        for trigram in trigrams_of(self._row_text(values)):
+            posting = postings.get(trigram)
+            if posting is None:
+                posting = postings[trigram] = bytearray()
+                _encode_varint(rowid, posting)
+            else:
+                _encode_varint(rowid - last_rowid[trigram], posting)
+            last_rowid[trigram] = rowid
+        self.row_count += 1
+
+    def load(self, conn: sqlite3.Connection):
+        """Builds the index from the database (rows in rowid order)."""
+        start_time = time.perf_counter()
+        self._postings.clear()
+        self._last_rowid.clear()
+        self._changed.clear()
+        self.max_rowid = 0
+        self.row_count = 0
+        self._add_rows_after(conn, 0)
+        self.loaded = True
+        print(f"TrigramIndex: {self.row_count} rows, {len(self._postings)} trigrams, "
+              f"{self.byte_size() / 1024:.0f} KB in {time.perf_counter() - start_time:.2f} s.")
+
+    def _add_rows_after(self, conn: sqlite3.Connection, rowid: int) -> int:
+        columns = ', '.join(self.columns)
+        cursor = conn.execute(f"SELECT qso_id, {columns} FROM {self.table_name} WHERE qso_id > ? ORDER BY qso_id",
+                              (rowid,))
+        added = 0
+        for row in cursor:
+            self._add_row(row[0], row[1:])
+            self.max_rowid = row[0]
+            added += 1
+        return added
+
+    def add_new_rows(self, conn: sqlite3.Connection) -> int:
+        """Indexes the rows added since the last load/update. Returns their count."""
+        if not self.loaded:
+            return 0
+        return self._add_rows_after(conn, self.max_rowid)
+
+    def mark_changed(self, rowids):
+        """Rows whose searchable text was edited; they are always candidates from now on."""
+        self._changed.update(rowid for rowid in rowids if rowid <= self.max_rowid)
+
+    @property
+    def changed_count(self) -> int:
+        return len(self._changed)
+
+    def byte_size(self) -> int:
+        return sum(len(posting) for posting in self._postings.values())
+
+    def _lookup_term(self, term: str) -> set[int]:
+        """Rowids containing all trigrams of the term (intersection, shortest list first)."""
+        postings = []
+        for trigram in trigrams_of(term.lower()):
+            posting = self._postings.get(trigram)
+            if posting is None:
+                return set()
+            postings.append(posting)
+
+        postings.sort(key=len)
+        candidates = set(decode_postings(postings[0]))
+        for posting in postings[1:]:
+            if not candidates:
+                break
+            candidates.intersection_update(decode_postings(posting))
+        return candidates
+
+    def lookup(self, terms: list[str]) -> list[int] | None:
+        """
+        Candidate rowids for the OR search over 'terms' (sorted).
+        Returns None if a term is shorter than a trigram (the index cannot answer it).
+        """
+        if any(len(term) < TRIGRAM_LENGTH for term in terms):
+            return None
+        result: set[int] = set()
+        for term in terms:
+            result |= self._lookup_term(term)
+        result |= self._changed
+        return sorted(result)